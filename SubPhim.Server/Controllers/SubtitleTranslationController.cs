@@ -340,15 +340,21 @@ namespace SubPhim.Server.Controllers
         }
 
         /// <summary>
-        /// Lấy kết quả dịch đầy đủ
+        /// Lấy kết quả dịch (job đang chạy: các dòng của batch đã hoàn thành)
         /// </summary>
         /// <param name="sessionId">ID phiên dịch</param>
+        /// <param name="exclude">Các index client đã có, dạng "1-50,101-150", không trả lại</param>
         [HttpGet("results/{sessionId}")]
-        public async Task<IActionResult> GetResults(string sessionId)
+        public async Task<IActionResult> GetResults(string sessionId, [FromQuery] string? exclude = null)
         {
             try
             {
-                var results = await _orchestratorService.GetJobResultsAsync(sessionId);
+                if (!TryParseIndexRanges(exclude, out var excludeRanges))
+                {
+                    return BadRequest(new ErrorResponse { Error = "exclude không hợp lệ (dạng 1-50,101-150)" });
+                }
+
+                var results = await _orchestratorService.GetJobResultsAsync(sessionId, excludeRanges);
 
                 return Ok(new ResultsResponse
                 {
@@ -378,6 +384,41 @@ namespace SubPhim.Server.Controllers
             }
         }
 
+        /// <summary>
+        /// Hủy job đang chạy: các batch chưa gửi bị bỏ, callback đến sau bị bỏ qua.
+        /// Job chuyển sang "failed" với error "Đã hủy bởi người dùng"; kết quả của các batch
+        /// đã xong vẫn lấy được qua /results. Job đã kết thúc thì trả về trạng thái hiện tại.
+        /// </summary>
+        /// <param name="sessionId">ID phiên dịch</param>
+        [HttpPost("cancel/{sessionId}")]
+        public async Task<IActionResult> Cancel(string sessionId)
+        {
+            try
+            {
+                var status = await _orchestratorService.CancelJobAsync(sessionId);
+
+                return Ok(new StatusResponse
+                {
+                    SessionId = status.SessionId,
+                    Status = status.Status,
+                    Progress = status.Progress,
+                    TotalLines = status.TotalLines,
+                    CompletedLines = status.CompletedLines,
+                    Error = status.Error,
+                    TaskStats = status.TaskStats
+                });
+            }
+            catch (KeyNotFoundException)
+            {
+                return NotFound(new ErrorResponse { Error = $"Job {sessionId} không tồn tại" });
+            }
+            catch (Exception ex)
+            {
+                _logger.LogError(ex, "Error cancelling {SessionId}", sessionId);
+                return StatusCode(500, new ErrorResponse { Error = "Lỗi server", Detail = ex.Message });
+            }
+        }
+
         /// <summary>
         /// Callback endpoint để server dịch gửi kết quả về
         /// </summary>
@@ -422,6 +463,30 @@ namespace SubPhim.Server.Controllers
             }
         }
 
+        private static bool TryParseIndexRanges(string? value, out List<(int Start, int End)> ranges)
+        {
+            ranges = new List<(int Start, int End)>();
+            if (string.IsNullOrWhiteSpace(value))
+            {
+                return true;
+            }
+            foreach (var part in value.Split(',', StringSplitOptions.RemoveEmptyEntries | StringSplitOptions.TrimEntries))
+            {
+                var bounds = part.Split('-', 2);
+                if (!int.TryParse(bounds[0], out var start))
+                {
+                    return false;
+                }
+                var end = start;
+                if (bounds.Length == 2 && (!int.TryParse(bounds[1], out end) || end < start))
+                {
+                    return false;
+                }
+                ranges.Add((start, end));
+            }
+            return true;
+        }
+
         /// <summary>
         /// Health check endpoint
         /// </summary>
@@ -53,6 +53,7 @@ builder.Services.AddHttpClient("AioLauncherClient", client =>
     client.Timeout = TimeSpan.FromMinutes(5); 
 });
 builder.Services.AddControllers();
+builder.Services.AddRequestDecompression(); // Cho phép client gửi body nén (Content-Encoding: gzip/br/deflate)
 builder.Services.AddSingleton<TranslationOrchestratorService>();
 builder.Services.AddSingleton<VipTranslationService>();
 builder.Services.AddScoped<ISubtitleOrchestratorService, SubtitleOrchestratorService>(); // Subtitle distributed translation
@@ -160,6 +161,7 @@ builder.Services.AddAuthorization(options =>
     });
 });
 var app = builder.Build();
+app.UseRequestDecompression();
 app.UseMiddleware<RequestLoggingMiddleware>();
 if (app.Environment.IsDevelopment())
 {
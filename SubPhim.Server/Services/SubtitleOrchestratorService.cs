@@ -13,7 +13,8 @@ namespace SubPhim.Server.Services
     {
         Task<SubtitleJobResponse> SubmitJobAsync(SubtitleTranslationRequest request, int? userId = null, string? externalApiKeyPrefix = null);
         Task<SubtitleJobStatusResponse> GetJobStatusAsync(string sessionId);
-        Task<SubtitleJobResultsResponse> GetJobResultsAsync(string sessionId);
+        Task<SubtitleJobResultsResponse> GetJobResultsAsync(string sessionId, IReadOnlyList<(int Start, int End)>? excludeRanges = null);
+        Task<SubtitleJobStatusResponse> CancelJobAsync(string sessionId);
         Task ProcessCallbackAsync(ServerCallbackData callback);
     }
 
@@ -30,6 +31,11 @@ namespace SubPhim.Server.Services
         // Track failed tasks for retry
         private static readonly ConcurrentDictionary<string, ConcurrentQueue<FailedTaskInfo>> _failedTasksQueue = new();
 
+        // Token hủy của các job đang phân phối (CancelJobAsync hủy các request đang gửi tới server dịch)
+        private static readonly ConcurrentDictionary<string, CancellationTokenSource> _jobCancellations = new();
+
+        public const string JobCancelledMessage = "Đã hủy bởi người dùng";
+
         public SubtitleOrchestratorService(
             IServiceScopeFactory scopeFactory,
             IEncryptionService encryptionService,
@@ -166,8 +172,11 @@ namespace SubPhim.Server.Services
             // Initialize failed tasks queue for this session
             _failedTasksQueue[request.SessionId] = new ConcurrentQueue<FailedTaskInfo>();
 
+            var cancellation = new CancellationTokenSource();
+            _jobCancellations[request.SessionId] = cancellation;
+
             // Start distribution in background
-            _ = Task.Run(async () => await DistributeJobAsync(job.SessionId, request.Lines, batchPlan, settings, availableServers, availableKeys));
+            _ = Task.Run(async () => await DistributeJobAsync(job.SessionId, request.Lines, batchPlan, settings, availableServers, availableKeys, cancellation.Token));
 
             return new SubtitleJobResponse
             {
@@ -243,7 +252,30 @@ namespace SubPhim.Server.Services
             List<BatchInfo> batchPlan,
             SubtitleApiSetting settings,
             List<SubtitleTranslationServer> servers,
-            List<SubtitleApiKey> apiKeys)
+            List<SubtitleApiKey> apiKeys,
+            CancellationToken cancellationToken)
+        {
+            try
+            {
+                await DistributeBatchesAsync(sessionId, lines, batchPlan, settings, servers, apiKeys, cancellationToken);
+            }
+            finally
+            {
+                if (_jobCancellations.TryRemove(sessionId, out var cancellation))
+                {
+                    cancellation.Dispose();
+                }
+            }
+        }
+
+        private async Task DistributeBatchesAsync(
+            string sessionId,
+            List<SubtitleLine> lines,
+            List<BatchInfo> batchPlan,
+            SubtitleApiSetting settings,
+            List<SubtitleTranslationServer> servers,
+            List<SubtitleApiKey> apiKeys,
+            CancellationToken cancellationToken)
         {
             using var scope = _scopeFactory.CreateScope();
             var context = scope.ServiceProvider.GetRequiredService<AppDbContext>();
@@ -264,6 +296,9 @@ namespace SubPhim.Server.Services
 
             foreach (var batch in batchPlan)
             {
+                // Job đã bị hủy: không gửi các batch còn lại
+                if (cancellationToken.IsCancellationRequested) break;
+
                 var server = servers[serverIndex % servers.Count];
                 serverIndex++;
 
@@ -309,7 +344,8 @@ namespace SubPhim.Server.Services
                     batchLines,
                     keysForServer,
                     settings,
-                    semaphore
+                    semaphore,
+                    cancellationToken
                 ));
 
                 if (settings.DelayBetweenServerBatchesMs > 0)
@@ -320,12 +356,22 @@ namespace SubPhim.Server.Services
 
             // Không cần SaveChanges() ở đây nữa vì đã lưu trong loop
 
-            job.Status = SubtitleJobStatus.Processing;
-            await context.SaveChangesAsync();
+            // CancelJobAsync đã đặt trạng thái job, không ghi đè
+            if (!cancellationToken.IsCancellationRequested)
+            {
+                job.Status = SubtitleJobStatus.Processing;
+                await context.SaveChangesAsync();
+            }
 
             // Wait for all tasks
             await Task.WhenAll(tasks);
 
+            if (cancellationToken.IsCancellationRequested)
+            {
+                _logger.LogInformation("Job {SessionId} was cancelled during distribution.", sessionId);
+                return;
+            }
+
             // Process retry queue if any failed tasks
             await ProcessRetryQueueAsync(sessionId, lines, settings);
 
@@ -341,10 +387,17 @@ namespace SubPhim.Server.Services
             List<SubtitleLine> lines,
             List<string> apiKeys,
             SubtitleApiSetting settings,
-            SemaphoreSlim semaphore)
+            SemaphoreSlim semaphore,
+            CancellationToken cancellationToken)
         {
             await semaphore.WaitAsync();
 
+            if (cancellationToken.IsCancellationRequested)
+            {
+                semaphore.Release();
+                return;
+            }
+
             // === THÊM DEBUG LOG: Ghi lại thông tin trước khi gửi ===
             _logger.LogInformation(
                 "Attempting to send task for SessionId: {SessionId}, BatchIndex: {BatchIndex} to Server: {ServerUrl}",
@@ -407,7 +460,7 @@ namespace SubPhim.Server.Services
 
                 try
                 {
-                    var response = await httpClient.PostAsJsonAsync($"{server.ServerUrl}/translate", serverRequest);
+                    var response = await httpClient.PostAsJsonAsync($"{server.ServerUrl}/translate", serverRequest, cancellationToken);
 
                     if (response.IsSuccessStatusCode)
                     {
@@ -430,6 +483,13 @@ namespace SubPhim.Server.Services
                         AddToRetryQueue(job.SessionId, task, lines);
                     }
                 }
+                catch (OperationCanceledException) when (cancellationToken.IsCancellationRequested)
+                {
+                    // Job bị hủy khi đang gửi: không tính lỗi cho server, không retry
+                    taskInDb.Status = ServerTaskStatus.Failed;
+                    taskInDb.ErrorMessage = JobCancelledMessage;
+                    _logger.LogInformation("Sending Batch {BatchIndex} aborted: job {SessionId} was cancelled", task.BatchIndex, job.SessionId);
+                }
                 catch (Exception ex)
                 {
                     // === SỬA LỖI QUAN TRỌNG: CẬP NHẬT TRẠNG THÁI FAILED KHI CÓ EXCEPTION (VD: TIMEOUT, CONNECTION REFUSED) ===
@@ -509,6 +569,12 @@ namespace SubPhim.Server.Services
             var job = await context.SubtitleTranslationJobs.FindAsync(sessionId);
             if (job == null) return;
 
+            if (IsCancelled(job))
+            {
+                _failedTasksQueue.TryRemove(sessionId, out _);
+                return;
+            }
+
             // Lấy API key mới (không bị cooldown)
             var now = DateTime.UtcNow;
             var freshKeys = await context.SubtitleApiKeys
@@ -746,6 +812,15 @@ namespace SubPhim.Server.Services
                 return;
             }
 
+            // Job đã bị hủy: bỏ qua kết quả đến muộn, không retry
+            var cancelled = await context.SubtitleTranslationJobs.AnyAsync(j => j.SessionId == originalSessionId
+                && j.Status == SubtitleJobStatus.Failed && j.ErrorMessage == JobCancelledMessage);
+            if (cancelled)
+            {
+                _logger.LogInformation("Ignoring callback for cancelled job {OriginalSessionId}, BatchIndex: {BatchIndex}", originalSessionId, batchIndex);
+                return;
+            }
+
             var settings = await context.SubtitleApiSettings.FindAsync(1) ?? new SubtitleApiSetting();
 
             task.Status = callback.Status == "completed" ? ServerTaskStatus.Completed : ServerTaskStatus.Failed;
@@ -886,7 +961,7 @@ namespace SubPhim.Server.Services
                 .Include(j => j.ServerTasks)
                 .FirstOrDefaultAsync(j => j.SessionId == sessionId);
 
-            if (job == null) return;
+            if (job == null || IsCancelled(job)) return;
 
             var allTasks = job.ServerTasks.ToList();
             var completedTasks = allTasks.Where(t => t.Status == ServerTaskStatus.Completed).ToList();
@@ -991,6 +1066,91 @@ namespace SubPhim.Server.Services
             }
         }
 
+        private static bool IsCancelled(SubtitleTranslationJob job)
+        {
+            return job.Status == SubtitleJobStatus.Failed && job.ErrorMessage == JobCancelledMessage;
+        }
+
+        /// <summary>
+        /// Hủy job theo yêu cầu của client: dừng gửi các batch còn lại, hủy các request đang gửi
+        /// tới server dịch, bỏ qua callback đến muộn và hoàn lượt dịch cho các dòng chưa dịch xong.
+        /// Kết quả của các batch đã hoàn thành vẫn lấy được qua GetJobResultsAsync.
+        /// Job đã kết thúc thì giữ nguyên.
+        /// </summary>
+        public async Task<SubtitleJobStatusResponse> CancelJobAsync(string sessionId)
+        {
+            using (var scope = _scopeFactory.CreateScope())
+            {
+                var context = scope.ServiceProvider.GetRequiredService<AppDbContext>();
+
+                var job = await context.SubtitleTranslationJobs
+                    .Include(j => j.ServerTasks)
+                    .FirstOrDefaultAsync(j => j.SessionId == sessionId);
+
+                if (job == null)
+                {
+                    throw new KeyNotFoundException($"Job {sessionId} không tồn tại.");
+                }
+
+                bool finished = job.Status == SubtitleJobStatus.Completed
+                    || job.Status == SubtitleJobStatus.PartialCompleted
+                    || job.Status == SubtitleJobStatus.Failed;
+
+                if (!finished)
+                {
+                    var now = DateTime.UtcNow;
+                    foreach (var task in job.ServerTasks.Where(t => t.Status != ServerTaskStatus.Completed && t.Status != ServerTaskStatus.Failed))
+                    {
+                        task.Status = ServerTaskStatus.Failed;
+                        task.ErrorMessage = JobCancelledMessage;
+                        task.CompletedAt = now;
+                    }
+
+                    int completedLines = job.ServerTasks.Where(t => t.Status == ServerTaskStatus.Completed).Sum(t => t.LineCount);
+                    job.CompletedLines = completedLines;
+                    job.Progress = job.TotalLines > 0 ? (float)completedLines / job.TotalLines * 100 : 0;
+                    job.Status = SubtitleJobStatus.Failed;
+                    job.ErrorMessage = JobCancelledMessage;
+                    job.CompletedAt = now;
+
+                    // Hoàn lượt dịch cho các dòng chưa dịch xong
+                    if (job.UserId.HasValue)
+                    {
+                        var user = await context.Users.FindAsync(job.UserId.Value);
+                        if (user != null)
+                        {
+                            int linesToRefund = Math.Min(job.TotalLines - completedLines, user.LocalSrtLinesUsedToday);
+                            if (linesToRefund > 0)
+                            {
+                                user.LocalSrtLinesUsedToday -= linesToRefund;
+                                _logger.LogInformation("Refunded {Lines} LocalSRT lines to user {UserId} for cancelled job {SessionId}. New usage: {Used}/{Limit}",
+                                    linesToRefund, job.UserId.Value, sessionId, user.LocalSrtLinesUsedToday, user.DailyLocalSrtLimit);
+                            }
+                        }
+                    }
+
+                    await context.SaveChangesAsync();
+
+                    // Dừng phân phối sau khi đã lưu trạng thái hủy để DistributeJobAsync không ghi đè
+                    if (_jobCancellations.TryRemove(sessionId, out var cancellation))
+                    {
+                        cancellation.Cancel();
+                    }
+                    _failedTasksQueue.TryRemove(sessionId, out _);
+
+                    _logger.LogInformation("Job {SessionId} cancelled: {Completed}/{Total} lines completed",
+                        sessionId, job.CompletedLines, job.TotalLines);
+
+                    if (!string.IsNullOrEmpty(job.CallbackUrl))
+                    {
+                        await SendClientCallbackAsync(job);
+                    }
+                }
+            }
+
+            return await GetJobStatusAsync(sessionId);
+        }
+
         public async Task<SubtitleJobStatusResponse> GetJobStatusAsync(string sessionId)
         {
             using var scope = _scopeFactory.CreateScope();
@@ -1019,7 +1179,11 @@ namespace SubPhim.Server.Services
             };
         }
 
-        public async Task<SubtitleJobResultsResponse> GetJobResultsAsync(string sessionId)
+        /// <summary>
+        /// Lấy kết quả của job. Job chưa xong thì trả về kết quả của các batch đã hoàn thành
+        /// để client lấy dần; excludeRanges (index từ-đến) là các dòng client đã có, không gửi lại.
+        /// </summary>
+        public async Task<SubtitleJobResultsResponse> GetJobResultsAsync(string sessionId, IReadOnlyList<(int Start, int End)>? excludeRanges = null)
         {
             using var scope = _scopeFactory.CreateScope();
             var context = scope.ServiceProvider.GetRequiredService<AppDbContext>();
@@ -1036,6 +1200,34 @@ namespace SubPhim.Server.Services
             {
                 results = JsonSerializer.Deserialize<List<TranslatedLineResult>>(job.ResultsJson) ?? new();
             }
+            else
+            {
+                // Job đang chạy: gom kết quả của các batch đã hoàn thành
+                var completedTasks = await context.SubtitleServerTasks
+                    .Where(t => t.SessionId == sessionId && t.Status == ServerTaskStatus.Completed && t.ResultJson != null)
+                    .OrderBy(t => t.StartLineIndex)
+                    .ToListAsync();
+                foreach (var task in completedTasks)
+                {
+                    try
+                    {
+                        var taskResults = JsonSerializer.Deserialize<List<TranslatedLineResult>>(task.ResultJson!);
+                        if (taskResults != null)
+                        {
+                            results.AddRange(taskResults);
+                        }
+                    }
+                    catch (JsonException ex)
+                    {
+                        _logger.LogError(ex, "Error parsing results for task {TaskId}", task.Id);
+                    }
+                }
+            }
+
+            if (excludeRanges != null && excludeRanges.Count > 0)
+            {
+                results = results.Where(r => !excludeRanges.Any(range => r.Index >= range.Start && r.Index <= range.End)).ToList();
+            }
 
             return new SubtitleJobResultsResponse
             {
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end: client thật (SubtitleApiService + run_translation_job)
+chạy với server giả lập (mock_server.py) trong cùng tiến trình.
+
+Đo số job/phút cho kịch bản chạy lần lượt từng file (single) và batch song song,
+cùng số request mà server nhận được. Kết quả lưu JSON để so sánh regression.
+
+    python benchmarks/bench_e2e.py [--lines 2000] [--files 8] [--concurrency 4] [--callbacks]
+                                   [--latency 0.02] [--partial-rate 0.05] [--json out.json]
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+FLY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FLY_DIR)
+
+from quicktranslate.api import ServerConfig, AuthService, SubtitleApiService  # noqa: E402
+from quicktranslate.callbacks import CallbackReceiver  # noqa: E402
+from quicktranslate.cli import run_batch  # noqa: E402
+from quicktranslate.jobs import DEFAULT_PROMPT, DEFAULT_SYSTEM_INSTRUCTION, run_translation_job  # noqa: E402
+from bench_srt import make_srt  # noqa: E402
+from mock_server import MockSettings, MockSubtitleServer  # noqa: E402
+from report import save_results, compare_with_baseline  # noqa: E402
+
+def _write_files(folder: str, count: int, lines: int) -> list:
+    content = make_srt(lines)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"bench_{i:03d}.srt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+def _scenario(name: str, server: MockSubtitleServer, files: list, lines: int, run) -> dict:
+    before = dict(server.stats.requests)
+    started = time.monotonic()
+    completed = run()
+    elapsed = time.monotonic() - started
+    requests = {k: v - before.get(k, 0) for k, v in server.stats.requests.items()}
+    return {
+        "name": name,
+        "files": len(files),
+        "completed": completed,
+        "elapsed_s": elapsed,
+        "jobs_per_min": completed / elapsed * 60,
+        "lines_per_s": completed * lines / elapsed,
+        "requests": sum(requests.values()),
+        "requests_by_endpoint": requests,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=2000, help="Số dòng mỗi file")
+    parser.add_argument("--files", type=int, default=8, help="Số file cho kịch bản batch")
+    parser.add_argument("--single-runs", type=int, default=2, help="Số file dịch lần lượt cho kịch bản single")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--callbacks", action="store_true", help="Dùng callback receiver thay vì chỉ polling")
+    parser.add_argument("--latency", type=float, default=0.02, help="Độ trễ mỗi request của mock (giây)")
+    parser.add_argument("--lines-per-second", type=float, default=2000.0, help="Tốc độ dịch của mock")
+    parser.add_argument("--partial-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="Lưu kết quả ra file JSON")
+    parser.add_argument("--baseline", help="File JSON của lần chạy trước để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    settings = MockSettings(latency=args.latency, lines_per_second=args.lines_per_second,
+                            partial_rate=args.partial_rate, error_rate=args.error_rate, seed=1)
+    workdir = tempfile.mkdtemp(prefix="qt-bench-")
+    receiver = CallbackReceiver(host="127.0.0.1").start() if args.callbacks else None
+    try:
+        with MockSubtitleServer(settings) as server:
+            config = ServerConfig(base_url=server.url, poll_min_interval=0.2)
+            auth = AuthService(config)
+            ok, message = auth.login("bench", "bench")
+            if not ok:
+                print(f"Đăng nhập mock thất bại: {message}", file=sys.stderr)
+                return 2
+            translator = SubtitleApiService(config, auth)
+            job_options = {"callback_receiver": receiver, "recovery_rounds": 1 if args.partial_rate else 0}
+
+            single_files = _write_files(os.path.join(workdir, "single"), args.single_runs, args.lines)
+            batch_files = _write_files(os.path.join(workdir, "batch"), args.files, args.lines)
+
+            def run_single():
+                return sum(1 for f in single_files if run_translation_job(
+                    translator, f, DEFAULT_PROMPT, DEFAULT_SYSTEM_INSTRUCTION, log=lambda m: None, **job_options))
+
+            def run_parallel():
+                return len(run_batch(translator, batch_files, DEFAULT_PROMPT, DEFAULT_SYSTEM_INSTRUCTION,
+                                     concurrency=args.concurrency, **job_options))
+
+            results = [
+                _scenario("single", server, single_files, args.lines, run_single),
+                _scenario(f"batch[{args.concurrency}]", server, batch_files, args.lines, run_parallel),
+            ]
+    finally:
+        if receiver:
+            receiver.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    for r in results:
+        print(f"{r['name']:<10} {r['completed']}/{r['files']} job  {r['elapsed_s']:6.1f}s  "
+              f"{r['jobs_per_min']:7.2f} job/phút  {r['lines_per_s']:9.0f} dòng/s  {r['requests']} request")
+
+    if args.json:
+        save_results(args.json, "e2e", results, vars(args))
+    if args.baseline:
+        return 0 if compare_with_baseline(args.baseline, results, {"jobs_per_min": True}, args.tolerance) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark thời gian import đường headless (không GUI).
+
+Mỗi phép đo chạy trong một tiến trình Python mới để không bị cache module,
+lấy trung vị của nhiều lần chạy và so với ngân sách (ms). Đồng thời kiểm tra
+tkinter không bị import. Exit code 1 nếu vượt ngân sách hoặc có Tk.
+
+    python benchmarks/bench_import.py [--runs 15] [--budget-ms 250]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+FLY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> ngân sách mặc định (ms). quicktranslate.srt không được kéo theo requests.
+TARGETS = {
+    "quicktranslate.srt": 50.0,
+    "quicktranslate.api": 250.0,
+    "Server": 250.0,
+}
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "tkinter": "tkinter" in sys.modules}}))
+"""
+
+def measure(module: str, runs: int) -> dict:
+    samples, tk_loaded = [], False
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            cwd=FLY_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        data = json.loads(output.strip().splitlines()[-1])
+        samples.append(data["ms"])
+        tk_loaded = tk_loaded or data["tkinter"]
+    return {
+        "module": module,
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "tkinter_loaded": tk_loaded,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, help="Ghi đè ngân sách cho mọi module")
+    parser.add_argument("--json", help="Lưu kết quả ra file JSON")
+    args = parser.parse_args(argv)
+
+    results, ok = [], True
+    for module, default_budget in TARGETS.items():
+        result = measure(module, args.runs)
+        result["budget_ms"] = args.budget_ms or default_budget
+        result["passed"] = result["median_ms"] <= result["budget_ms"] and not result["tkinter_loaded"]
+        ok = ok and result["passed"]
+        results.append(result)
+        print(f"{module:<22} median {result['median_ms']:7.1f} ms  (min {result['min_ms']:.1f}, max {result['max_ms']:.1f})"
+              f"  budget {result['budget_ms']:.0f} ms  tkinter={result['tkinter_loaded']}  {'OK' if result['passed'] else 'FAIL'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
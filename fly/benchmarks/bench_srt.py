@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark parse_srt / build_srt / write_subtitles trên file SRT tổng hợp 10k–100k dòng.
+
+Mỗi kích thước được đo nhiều lần, lấy trung vị. Kết quả có thể lưu JSON và so
+với baseline để phát hiện regression (exit code 1 nếu chậm đi quá --tolerance).
+
+    python benchmarks/bench_srt.py [--sizes 10000 50000 100000] [--json out.json] [--baseline old.json]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+FLY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FLY_DIR)
+
+from quicktranslate.srt import parse_srt, build_srt, write_subtitles, format_srt_timestamp  # noqa: E402
+from report import save_results, compare_with_baseline  # noqa: E402
+
+_SAMPLE_TEXTS = [
+    "Hello there.",
+    "Where are you going?",
+    "<i>I told you, it's not safe here.</i>",
+    "- Come on!\n- Wait for me!",
+    "♪ Music playing ♪",
+    "We need to leave before sunrise, otherwise they'll find us.",
+]
+
+def make_srt(line_count: int) -> str:
+    """SRT tổng hợp: phụ đề 2 giây, cách nhau 0.5 giây, xen kẽ dòng đơn / nhiều dòng"""
+    blocks = []
+    for i in range(1, line_count + 1):
+        start = i * 2500
+        text = _SAMPLE_TEXTS[i % len(_SAMPLE_TEXTS)]
+        blocks.append(f"{i}\n{format_srt_timestamp(start)} --> {format_srt_timestamp(start + 2000)}\n{text}\n")
+    return "\n".join(blocks)
+
+def _median_seconds(func, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def bench_size(line_count: int, runs: int) -> list:
+    content = make_srt(line_count)
+    entries = list(parse_srt(content))
+    assert len(entries) == line_count, f"parse_srt trả về {len(entries)}/{line_count} entry"
+    translations = {e.index: f"[VI] {e.text}" for e in entries}
+
+    parse_s = _median_seconds(lambda: list(parse_srt(content)), runs)
+    build_s = _median_seconds(lambda: build_srt(entries, translations), runs)
+    with tempfile.TemporaryDirectory() as folder:
+        output_path = os.path.join(folder, "out.srt")
+        write_s = _median_seconds(lambda: write_subtitles(output_path, entries, translations), runs)
+    return [
+        {"name": f"parse_srt[{line_count}]", "lines": line_count, "bytes": len(content.encode("utf-8")),
+         "median_ms": parse_s * 1000, "lines_per_s": line_count / parse_s},
+        {"name": f"build_srt[{line_count}]", "lines": line_count,
+         "median_ms": build_s * 1000, "lines_per_s": line_count / build_s},
+        {"name": f"write_subtitles[{line_count}]", "lines": line_count,
+         "median_ms": write_s * 1000, "lines_per_s": line_count / write_s},
+    ]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="Lưu kết quả ra file JSON")
+    parser.add_argument("--baseline", help="File JSON của lần chạy trước để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Mức chậm đi cho phép so với baseline")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        for result in bench_size(size, args.runs):
+            results.append(result)
+            print(f"{result['name']:<24} median {result['median_ms']:9.1f} ms  {result['lines_per_s']:12,.0f} dòng/s")
+
+    if args.json:
+        save_results(args.json, "srt", results, {"runs": args.runs})
+    if args.baseline:
+        return 0 if compare_with_baseline(args.baseline, results, {"lines_per_s": True}, args.tolerance) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
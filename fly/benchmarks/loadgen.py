@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Tạo tải cho tầng phân phối /api/subtitle để tìm điểm bão hòa của cụm server dịch.
+
+Mỗi session là một "virtual user" (VU): gửi job bằng SubtitleApiService, polling
+trạng thái với chu kỳ cố định rồi tải kết quả. Session đến theo tốc độ mục tiêu
+(phân phối Poisson, hoặc đều với --arrival constant) và chạy tối đa --users VU
+cùng lúc; --rate 0 là vòng kín (mỗi VU gửi session kế tiếp ngay khi xong).
+Có nhiều mức --rate thì chạy lần lượt từng mức để thấy throughput ngừng tăng
+theo tải và độ trễ tăng vọt ở đâu.
+
+Mỗi session ghi lại: độ trễ gửi job, thời gian tới tiến trình đầu tiên, thời gian
+hoàn thành và loại lỗi (xem quicktranslate.errors). Kết quả: histogram độ trễ,
+percentile, throughput và bảng tổng kết theo từng mức tải; --json lưu kết quả.
+
+    python benchmarks/loadgen.py --server http://host:5000 -u user -p pass \\
+        --corpus ./srt --users 20 --rate 0.5,1,2,4 --duration 120
+    python benchmarks/loadgen.py --mock --lines 300 --users 8 --rate 2 --duration 30
+"""
+import os
+import sys
+import math
+import time
+import random
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+FLY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FLY_DIR)
+
+from quicktranslate.api import ServerConfig, AuthService, SubtitleApiService, DEFAULT_MODEL  # noqa: E402
+from quicktranslate.cli import collect_srt_files  # noqa: E402
+from quicktranslate.errors import classify_error  # noqa: E402
+from quicktranslate.jobs import DEFAULT_PROMPT, DEFAULT_SYSTEM_INSTRUCTION  # noqa: E402
+from quicktranslate.polling import QUEUED_STATUSES  # noqa: E402
+from quicktranslate.srt import parse_srt, parse_srt_file  # noqa: E402
+from bench_srt import make_srt  # noqa: E402
+from mock_server import MockSettings, MockSubtitleServer  # noqa: E402
+from report import save_results  # noqa: E402
+
+# Kết quả của session ngoài các loại lỗi gửi job trong quicktranslate.errors
+OUTCOME_COMPLETED = "completed"
+OUTCOME_PARTIAL = "partial"             # partialcompleted: có batch lỗi
+OUTCOME_JOB_FAILED = "job_failed"       # server báo failed sau khi đã nhận job
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_RESULTS_ERROR = "results_error"
+OUTCOME_CLIENT_ERROR = "client_error"   # exception phía client
+
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+
+@dataclass
+class SessionRecord:
+    """Số liệu của một session (thời gian tính bằng giây)"""
+    step_rate: float
+    lines: int
+    scheduled: float                        # thời điểm dự kiến đến (tính từ đầu mức tải)
+    dispatch_lag: float = 0.0               # chờ VU rảnh: client không theo kịp tốc độ đến
+    submit_s: Optional[float] = None
+    first_progress_s: Optional[float] = None
+    complete_s: Optional[float] = None
+    outcome: str = ""
+    error: Optional[str] = None
+
+def load_corpus(inputs: List[str], lines: int, count: int) -> List[List[Dict]]:
+    """Các file SRT (dạng dòng của API); không có corpus thì tạo `count` file tổng hợp `lines` dòng"""
+    if inputs:
+        corpus = [[{"index": e.index, "text": e.text} for e in parse_srt_file(path)]
+                  for path in collect_srt_files(inputs, recursive=True)]
+        return [lines_ for lines_ in corpus if lines_]
+    entries = [{"index": e.index, "text": e.text} for e in parse_srt(make_srt(lines))]
+    return [entries] * max(1, count)
+
+def run_session(api: SubtitleApiService, lines: List[Dict], record: SessionRecord,
+                poll_interval: float, timeout: float) -> SessionRecord:
+    """Một session: gửi job, polling tới khi kết thúc, tải kết quả"""
+    started = time.monotonic()
+    success, message, session_id = api.start_translation_job(lines, DEFAULT_PROMPT, DEFAULT_SYSTEM_INSTRUCTION,
+                                                            model=DEFAULT_MODEL)
+    record.submit_s = time.monotonic() - started
+    if not success:
+        record.outcome, record.error = classify_error(message), message
+        return record
+
+    deadline = started + timeout
+    while True:
+        status_data = api.poll_status(session_id)
+        status = status_data.get("status", "unknown").lower()
+        elapsed = time.monotonic() - started
+        progressed = (status not in QUEUED_STATUSES and status != "unknown") or status_data.get("completedLines")
+        if record.first_progress_s is None and progressed:
+            record.first_progress_s = elapsed
+        if status in ("completed", "partialcompleted"):
+            break
+        if status == "failed":
+            error = status_data.get("error") or ""
+            # Lỗi của chính request polling (mất kết nối, 5xx) khác với job thất bại trên server
+            is_request_error = error.startswith("Lỗi kết nối") or error.startswith("Lỗi HTTP")
+            record.outcome = classify_error(error) if is_request_error else OUTCOME_JOB_FAILED
+            record.error = error
+            return record
+        if time.monotonic() >= deadline:
+            record.outcome, record.error = OUTCOME_TIMEOUT, f"Quá {timeout:.0f}s, trạng thái cuối: {status}"
+            return record
+        time.sleep(poll_interval)
+
+    results = api.get_results(session_id)
+    record.complete_s = time.monotonic() - started
+    if results.get("status", "").lower() not in ("completed", "partialcompleted"):
+        record.outcome, record.error = OUTCOME_RESULTS_ERROR, results.get("error")
+    else:
+        record.outcome = OUTCOME_COMPLETED if status == "completed" else OUTCOME_PARTIAL
+    return record
+
+def run_step(api: SubtitleApiService, corpus: List[List[Dict]], rate: float, users: int, duration: float,
+             arrival: str, poll_interval: float, timeout: float, rng: random.Random) -> List[SessionRecord]:
+    """
+    Chạy một mức tải trong `duration` giây (session đã bắt đầu được chờ tới khi xong).
+    rate > 0: vòng mở, session đến theo `arrival` với tốc độ `rate`/giây, tối đa `users` VU.
+    rate = 0: vòng kín, `users` VU gửi liên tục.
+    """
+    records: List[SessionRecord] = []
+    lock = threading.Lock()
+    free_users = threading.Semaphore(users)
+    threads: List[threading.Thread] = []
+    step_start = time.monotonic()
+
+    def worker(record: SessionRecord, lines: List[Dict]):
+        try:
+            run_session(api, lines, record, poll_interval, timeout)
+        except Exception as e:              # không để một VU lỗi làm dừng cả đợt đo
+            record.outcome, record.error = OUTCOME_CLIENT_ERROR, str(e)
+        finally:
+            with lock:
+                records.append(record)
+            free_users.release()
+
+    def closed_loop_user():
+        while time.monotonic() - step_start < duration:
+            lines = rng.choice(corpus)
+            record = SessionRecord(rate, len(lines), time.monotonic() - step_start)
+            free_users.acquire()
+            worker(record, lines)
+
+    if rate <= 0:
+        threads = [threading.Thread(target=closed_loop_user, name=f"VU-{i}", daemon=True) for i in range(users)]
+        for thread in threads:
+            thread.start()
+    else:
+        scheduled = 0.0
+        while scheduled < duration:
+            delay = step_start + scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            free_users.acquire()
+            lines = rng.choice(corpus)
+            record = SessionRecord(rate, len(lines), scheduled,
+                                   dispatch_lag=max(0.0, time.monotonic() - step_start - scheduled))
+            thread = threading.Thread(target=worker, args=(record, lines), name=f"VU-{len(threads)}", daemon=True)
+            thread.start()
+            threads.append(thread)
+            scheduled += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+    for thread in threads:
+        thread.join()
+    return records
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+def histogram(values: List[float], buckets=HISTOGRAM_BUCKETS) -> Dict[str, int]:
+    counts = {f"<={bound}": 0 for bound in buckets}
+    counts["+Inf"] = 0
+    for value in values:
+        for bound in buckets:
+            if value <= bound:
+                counts[f"<={bound}"] += 1
+                break
+        else:
+            counts["+Inf"] += 1
+    return counts
+
+def summarize(rate: float, records: List[SessionRecord], elapsed: float) -> Dict:
+    """Tổng kết một mức tải: throughput, percentile, histogram và số lỗi theo loại"""
+    done = [r for r in records if r.outcome in (OUTCOME_COMPLETED, OUTCOME_PARTIAL)]
+    outcomes: Dict[str, int] = {}
+    for r in records:
+        outcomes[r.outcome] = outcomes.get(r.outcome, 0) + 1
+    metrics = {
+        "submit_s": [r.submit_s for r in records if r.submit_s is not None],
+        "first_progress_s": [r.first_progress_s for r in records if r.first_progress_s is not None],
+        "complete_s": [r.complete_s for r in done],
+        "dispatch_lag_s": [r.dispatch_lag for r in records],
+    }
+    summary = {
+        "name": f"rate={rate:g}" if rate > 0 else "closed-loop",
+        "offered_rate": rate,
+        "sessions": len(records),
+        "completed": len(done),
+        "elapsed_s": elapsed,
+        "throughput_per_min": len(done) / elapsed * 60 if elapsed else 0.0,
+        "lines_per_s": sum(r.lines for r in done) / elapsed if elapsed else 0.0,
+        "error_rate": 1 - len(done) / len(records) if records else 0.0,
+        "outcomes": outcomes,
+    }
+    for name, values in metrics.items():
+        for q in (50, 90, 99):
+            summary[f"{name}_p{q}"] = percentile(values, q)
+        summary[f"{name}_max"] = max(values) if values else None
+        summary[f"{name}_histogram"] = histogram(values)
+    return summary
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:8.2f}" if value is not None else "       -"
+
+def print_step(summary: Dict):
+    print(f"\n=== {summary['name']}: {summary['completed']}/{summary['sessions']} session xong trong "
+          f"{summary['elapsed_s']:.1f}s — {summary['throughput_per_min']:.2f} session/phút, "
+          f"{summary['lines_per_s']:.1f} dòng/s ===")
+    print(f"{'':<18}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}")
+    for name in ("submit_s", "first_progress_s", "complete_s", "dispatch_lag_s"):
+        print(f"{name:<18}" + "".join(_fmt(summary[f'{name}_{k}']) for k in ("p50", "p90", "p99", "max")))
+    counts = summary["complete_s_histogram"]
+    peak = max(counts.values()) or 1
+    print("Histogram thời gian hoàn thành (giây):")
+    for bucket, count in counts.items():
+        if count:
+            print(f"  {bucket:>8} {count:6d} {'#' * max(1, round(40 * count / peak))}")
+    print("Kết quả: " + ", ".join(f"{outcome}={count}" for outcome, count in sorted(summary["outcomes"].items())))
+
+def print_capacity_table(summaries: List[Dict]):
+    print("\n=== Theo mức tải ===")
+    print(f"{'mức tải':<14}{'session':>8}{'xong/phút':>11}{'lỗi':>8}{'hoàn thành p50':>16}{'p90':>9}")
+    for s in summaries:
+        print(f"{s['name']:<14}{s['sessions']:>8}{s['throughput_per_min']:>11.2f}{s['error_rate']:>8.1%}"
+              f"{_fmt(s['complete_s_p50']):>16}{_fmt(s['complete_s_p90']):>9}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default=ServerConfig.base_url, help="URL server cần đo")
+    parser.add_argument("--mock", action="store_true", help="Đo với server giả lập chạy trong tiến trình")
+    parser.add_argument("--mock-lines-per-second", type=float, default=500.0)
+    parser.add_argument("--mock-no-server-rate", type=float, default=0.0)
+    parser.add_argument("-u", "--username", default=os.environ.get("SUBPHIM_USERNAME"))
+    parser.add_argument("-p", "--password", default=os.environ.get("SUBPHIM_PASSWORD"))
+    parser.add_argument("--corpus", nargs="*", default=[], help="Thư mục / glob / file .srt dùng làm tải")
+    parser.add_argument("--lines", type=int, default=500, help="Số dòng mỗi file tổng hợp (khi không có --corpus)")
+    parser.add_argument("--users", type=int, default=10, help="Số virtual user (session đồng thời) tối đa")
+    parser.add_argument("--rate", default="1", help="Tốc độ đến (session/giây), nhiều mức phân cách bằng dấu phẩy; 0 = vòng kín")
+    parser.add_argument("--arrival", choices=("poisson", "constant"), default="poisson")
+    parser.add_argument("--duration", type=float, default=60.0, help="Thời gian tạo tải mỗi mức (giây)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Chu kỳ polling trạng thái (giây)")
+    parser.add_argument("--session-timeout", type=float, default=1800.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="Lưu kết quả ra file JSON")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    try:
+        rates = [float(rate) for rate in args.rate.split(",") if rate.strip()]
+    except ValueError:
+        parser.error("--rate phải là số, vd. 0.5,1,2")
+    corpus = load_corpus(args.corpus, args.lines, args.users)
+    if not corpus:
+        print("Corpus không có file SRT hợp lệ.", file=sys.stderr)
+        return 2
+    rng = random.Random(args.seed)
+
+    server = None
+    if args.mock:
+        server = MockSubtitleServer(MockSettings(lines_per_second=args.mock_lines_per_second,
+                                                 no_server_rate=args.mock_no_server_rate, seed=args.seed)).start()
+    try:
+        config = ServerConfig(base_url=server.url if server else args.server.rstrip("/"))
+        config.pool_maxsize = max(config.pool_maxsize, args.users)
+        auth = AuthService(config)
+        ok, message = auth.login(args.username or "loadgen", args.password or "loadgen")
+        if not ok:
+            print(f"Đăng nhập thất bại: {message}", file=sys.stderr)
+            return 2
+        api = SubtitleApiService(config, auth)
+
+        summaries = []
+        for rate in rates:
+            print(f"\nMức tải {rate:g} session/s ({args.arrival}), {args.users} VU, {args.duration:.0f}s, "
+                  f"{len(corpus)} file trong corpus..." if rate > 0 else
+                  f"\nVòng kín: {args.users} VU, {args.duration:.0f}s...")
+            started = time.monotonic()
+            records = run_step(api, corpus, rate, args.users, args.duration, args.arrival,
+                               args.poll_interval, args.session_timeout, rng)
+            summary = summarize(rate, records, time.monotonic() - started)
+            summary["records"] = [asdict(r) for r in records]
+            print_step(summary)
+            summaries.append(summary)
+    finally:
+        if server:
+            server.stop()
+
+    if len(summaries) > 1:
+        print_capacity_table(summaries)
+    if args.json:
+        settings = {k: v for k, v in vars(args).items() if k != "password"}
+        save_results(args.json, "loadgen", summaries, settings)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Server giả lập SubtitleApi để đo client mà không cần SubPhim server thật.
+
+Cài đặt các endpoint theo docs/SubtitleApi-Documentation.md:
+    POST /api/auth/login
+    POST /api/subtitle/translate      (nhận cả body gzip)
+    GET  /api/subtitle/status/{id}
+    GET  /api/subtitle/results/{id}   (có ?exclude=1-50,101-150)
+    POST /api/subtitle/cancel/{id}
+    GET  /api/subtitle/health
+Job được "dịch" theo từng batch với tốc độ cấu hình được, có thể gọi callbackUrl
+khi xong, và có thể tiêm lỗi: batch lỗi (partialcompleted), 5xx, hết server dịch.
+Token đăng nhập có dạng JWT (claim exp); --token-ttl ngắn để thử token hết hạn (401).
+
+    python benchmarks/mock_server.py --port 5000 --lines-per-second 500 --partial-rate 0.1
+
+Dùng trong code:
+
+    with MockSubtitleServer(MockSettings(latency=0.02)) as server:
+        config = ServerConfig(base_url=server.url)
+"""
+import sys
+import json
+import gzip
+import base64
+import math
+import time
+import random
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Tuple
+
+NO_SERVER_ERROR = "Không có server dịch nào khả dụng"
+CANCELLED_ERROR = "Đã hủy bởi người dùng"
+
+@dataclass
+class MockSettings:
+    """Hành vi của server giả lập"""
+    latency: float = 0.0                # độ trễ thêm vào mỗi request (giây)
+    lines_per_second: float = 1000.0    # tốc độ dịch của mỗi job
+    batch_size: int = 50                # số dòng mỗi batch; tiến độ tăng theo batch
+    partial_rate: float = 0.0           # tỉ lệ batch lỗi -> job kết thúc partialcompleted
+    error_rate: float = 0.0             # tỉ lệ request trả 503
+    no_server_rate: float = 0.0         # tỉ lệ yêu cầu dịch bị từ chối vì hết server
+    daily_line_limit: Optional[int] = None  # giới hạn dòng/ngày như SRT Local; hết thì từ chối 'hết lượt dịch'
+    token_ttl: float = 7 * 24 * 3600    # hạn token (giây) như JWT của server; hết hạn thì trả 401
+    seed: Optional[int] = None
+
+@dataclass
+class _MockJob:
+    lines: List[Dict]
+    created: float
+    created_at: str
+    failed_batches: set
+    callback_url: Optional[str] = None
+    cancelled_at: Optional[float] = None   # monotonic; tiến độ dừng tại thời điểm hủy
+
+@dataclass
+class MockStats:
+    """Đếm request theo endpoint, để benchmark đối chiếu với phía client"""
+    requests: Dict[str, int] = field(default_factory=dict)
+    bytes_received: int = 0
+    callbacks_sent: int = 0
+    injected_errors: int = 0
+    lines_charged: int = 0
+    jobs_cancelled: int = 0
+    logins: int = 0
+    tokens_rejected: int = 0
+
+class MockSubtitleServer:
+    """Server giả lập chạy trên thread nền"""
+
+    def __init__(self, settings: Optional[MockSettings] = None, host: str = "127.0.0.1", port: int = 0):
+        self.settings = settings or MockSettings()
+        self.stats = MockStats()
+        self._random = random.Random(self.settings.seed)
+        self._jobs: Dict[str, _MockJob] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockSubtitleServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MockSubtitleServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Chạy trên thread hiện tại (chế độ dòng lệnh)"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- trạng thái job ---
+
+    def _chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def _count(self, endpoint: str, body_size: int = 0):
+        with self._lock:
+            self.stats.requests[endpoint] = self.stats.requests.get(endpoint, 0) + 1
+            self.stats.bytes_received += body_size
+
+    def _count_injected(self):
+        with self._lock:
+            self.stats.injected_errors += 1
+
+    def login(self, data: Dict) -> Tuple[int, Dict]:
+        username = data.get("username")
+        claims = {"name": username, "exp": int(time.time() + self.settings.token_ttl)}
+        token = ".".join(base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+                         for part in ({"alg": "none", "typ": "JWT"}, claims)) + ".mock"
+        with self._lock:
+            self.stats.logins += 1
+        return 200, {"token": token, "id": 1, "username": username}
+
+    def token_rejected(self, authorization: str, required: bool) -> bool:
+        """Token hết hạn / sai dạng thì từ chối; thiếu header chỉ bị từ chối nếu required"""
+        scheme, _, token = authorization.partition(" ")
+        if scheme != "Bearer":
+            rejected = required
+        else:
+            try:
+                claims = token.split(".")[1]
+                rejected = json.loads(base64.urlsafe_b64decode(claims + "=" * (-len(claims) % 4)))["exp"] <= time.time()
+            except (IndexError, KeyError, ValueError):
+                rejected = True
+        if rejected:
+            with self._lock:
+                self.stats.tokens_rejected += 1
+        return rejected
+
+    def submit(self, data: Dict) -> Tuple[int, Dict]:
+        session_id = data.get("sessionId")
+        lines = data.get("lines") or []
+        if not session_id:
+            return 400, {"error": "sessionId là bắt buộc"}
+        if not lines:
+            return 400, {"error": "Không có dòng nào để dịch"}
+        if self._chance(self.settings.no_server_rate):
+            self._count_injected()
+            return 400, {"error": NO_SERVER_ERROR}
+        limit = self.settings.daily_line_limit
+        if limit is not None:
+            # Như server thật: hết lượt thì từ chối, còn ít hơn yêu cầu thì chỉ dịch phần còn lại
+            with self._lock:
+                remaining = limit - self.stats.lines_charged
+                if remaining <= 0:
+                    return 400, {"error": f"Bạn đã hết lượt dịch SRT Local hôm nay. Giới hạn: {limit} dòng/ngày."}
+                lines = lines[:remaining]
+                self.stats.lines_charged += len(lines)
+
+        batch_count = math.ceil(len(lines) / self.settings.batch_size)
+        failed = {b for b in range(batch_count) if self._chance(self.settings.partial_rate)}
+        job = _MockJob(lines=lines, created=time.monotonic(),
+                       created_at=datetime.now(timezone.utc).isoformat(),
+                       failed_batches=failed, callback_url=data.get("callbackUrl"))
+        with self._lock:
+            if session_id in self._jobs:
+                return 400, {"error": f"Session {session_id} đã tồn tại"}
+            self._jobs[session_id] = job
+        if job.callback_url:
+            timer = threading.Timer(self._duration(job) + 0.01, self._send_callback, (session_id,))
+            timer.daemon = True
+            timer.start()
+        return 200, {"sessionId": session_id, "status": "pending", "totalLines": len(lines),
+                     "batchCount": batch_count, "serversAssigned": 1,
+                     "message": "Job đã được tạo và đang phân phối đến các server."}
+
+    def _duration(self, job: _MockJob) -> float:
+        return len(job.lines) / self.settings.lines_per_second
+
+    def _progress(self, job: _MockJob):
+        """(status, số batch đã xử lý xong, số dòng dịch thành công)"""
+        total = len(job.lines)
+        size = self.settings.batch_size
+        batch_count = math.ceil(total / size)
+        now = job.cancelled_at if job.cancelled_at is not None else time.monotonic()
+        processed_lines = min(total, int((now - job.created) * self.settings.lines_per_second))
+        done_batches = batch_count if processed_lines >= total else processed_lines // size
+        completed = sum(min(size, total - b * size) for b in range(done_batches) if b not in job.failed_batches)
+        if job.cancelled_at is not None and done_batches < batch_count:
+            status = "failed"
+        elif done_batches < batch_count:
+            status = "processing" if done_batches or processed_lines else "pending"
+        elif completed == 0:
+            status = "failed"
+        else:
+            status = "partialcompleted" if job.failed_batches else "completed"
+        return status, done_batches, completed
+
+    def _status_payload(self, session_id: str, job: _MockJob) -> Dict:
+        status, done_batches, completed = self._progress(job)
+        total = len(job.lines)
+        failed = len([b for b in job.failed_batches if b < done_batches])
+        if status == "failed" and job.cancelled_at is not None:
+            error = CANCELLED_ERROR
+        else:
+            error = f"{failed} batch lỗi" if failed else None
+        return {
+            "sessionId": session_id,
+            "status": status,
+            "progress": round(100.0 * completed / total, 2) if status != "completed" else 100,
+            "totalLines": total,
+            "completedLines": completed,
+            "error": error,
+            "taskStats": {"Completed": done_batches - failed, "Processing": math.ceil(total / self.settings.batch_size) - done_batches,
+                          "Failed": failed},
+        }
+
+    def status(self, session_id: str) -> Tuple[int, Dict]:
+        job = self._jobs.get(session_id)
+        if job is None:
+            return 404, {"error": f"Không tìm thấy job với ID: {session_id}"}
+        return 200, self._status_payload(session_id, job)
+
+    def cancel(self, session_id: str) -> Tuple[int, Dict]:
+        """Như server thật: dừng job, hoàn lượt các dòng chưa dịch, giữ kết quả đã xong"""
+        job = self._jobs.get(session_id)
+        if job is None:
+            return 404, {"error": f"Job {session_id} không tồn tại"}
+        with self._lock:
+            status, _, completed = self._progress(job)
+            cancelled = status in ("pending", "processing")
+            if cancelled:
+                job.cancelled_at = time.monotonic()
+                self.stats.jobs_cancelled += 1
+                if self.settings.daily_line_limit is not None:
+                    self.stats.lines_charged -= len(job.lines) - completed
+        if cancelled and job.callback_url:
+            threading.Thread(target=self._send_callback, args=(session_id,), daemon=True).start()
+        return 200, self._status_payload(session_id, job)
+
+    def results(self, session_id: str, exclude: Optional[str] = None) -> Tuple[int, Dict]:
+        job = self._jobs.get(session_id)
+        if job is None:
+            return 404, {"error": f"Không tìm thấy job với ID: {session_id}"}
+        try:
+            ranges = [tuple(int(bound) for bound in (part.split("-", 1) * 2)[:2])
+                      for part in (exclude or "").split(",") if part.strip()]
+        except ValueError:
+            return 400, {"error": "exclude không hợp lệ (dạng 1-50,101-150)"}
+        payload = self._status_payload(session_id, job)
+        _, done_batches, _ = self._progress(job)
+        size = self.settings.batch_size
+        results = []
+        for position, line in enumerate(job.lines[:min(len(job.lines), done_batches * size)]):
+            if any(start <= line.get("index", 0) <= end for start, end in ranges):
+                continue
+            translated = None if position // size in job.failed_batches else f"[VI] {line.get('text', '')}"
+            results.append({"index": line.get("index"), "original": line.get("text"), "translated": translated})
+        payload.update(results=results, createdAt=job.created_at,
+                       completedAt=datetime.now(timezone.utc).isoformat() if payload["status"] != "processing" else None)
+        return 200, payload
+
+    def _send_callback(self, session_id: str):
+        job = self._jobs.get(session_id)
+        if job is None or not job.callback_url:
+            return
+        payload = self._status_payload(session_id, job)
+        payload.pop("taskStats", None)
+        request = urllib.request.Request(job.callback_url, data=json.dumps(payload).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+            with self._lock:
+                self.stats.callbacks_sent += 1
+        except OSError:
+            pass
+
+def _make_handler(server: MockSubtitleServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code: int, payload: Dict):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> Optional[Dict]:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            server._count(self.path, len(body))
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            elif self.headers.get("Content-Encoding"):
+                return None
+            return json.loads(body or b"{}")
+
+        def _unauthorized(self, required: bool = False) -> bool:
+            if server.token_rejected(self.headers.get("Authorization", ""), required):
+                self._send(401, {"error": "Chưa đăng nhập"})
+                return True
+            return False
+
+        def _inject(self) -> bool:
+            if server.settings.latency:
+                time.sleep(server.settings.latency)
+            if server._chance(server.settings.error_rate):
+                server._count_injected()
+                self._send(503, {"error": "Service Unavailable (giả lập)"})
+                return True
+            return False
+
+        def do_POST(self):
+            prefix, _, session_id = self.path.rpartition("/")
+            if prefix == "/api/subtitle/cancel":
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server._count(prefix)
+                if self._inject() or self._unauthorized():
+                    return
+                return self._send(*server.cancel(session_id))
+            data = self._read_json()
+            if data is None:
+                return self._send(415, {"title": "Unsupported Media Type"})
+            if self._inject():
+                return
+            if self.path == "/api/auth/login":
+                return self._send(*server.login(data))
+            if self.path == "/api/subtitle/translate":
+                if self._unauthorized(required=True):
+                    return
+                return self._send(*server.submit(data))
+            self._send(404, {"error": "Not found"})
+
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            prefix, _, session_id = path.rpartition("/")
+            server._count(prefix)
+            if self._inject():
+                return
+            if path == "/api/subtitle/health":
+                return self._send(200, {"service": "Mock SubtitleApi", "status": "running",
+                                        "timestamp": datetime.now(timezone.utc).isoformat()})
+            if prefix in ("/api/subtitle/status", "/api/subtitle/results") and self._unauthorized():
+                return
+            if prefix == "/api/subtitle/status":
+                return self._send(*server.status(session_id))
+            if prefix == "/api/subtitle/results":
+                exclude = urllib.parse.parse_qs(query).get("exclude", [None])[0]
+                return self._send(*server.results(session_id, exclude))
+            self._send(404, {"error": "Not found"})
+
+    return Handler
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Độ trễ mỗi request (giây)")
+    parser.add_argument("--lines-per-second", type=float, default=1000.0, help="Tốc độ dịch mỗi job")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--partial-rate", type=float, default=0.0, help="Tỉ lệ batch lỗi (partialcompleted)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Tỉ lệ request trả 503")
+    parser.add_argument("--no-server-rate", type=float, default=0.0, help=f"Tỉ lệ submit bị từ chối '{NO_SERVER_ERROR}'")
+    parser.add_argument("--daily-line-limit", type=int, help="Giới hạn số dòng dịch mỗi ngày (mặc định: không giới hạn)")
+    parser.add_argument("--token-ttl", type=float, default=MockSettings.token_ttl,
+                        help="Hạn token đăng nhập (giây); đặt ngắn để thử đăng nhập lại khi gặp 401")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    settings = MockSettings(latency=args.latency, lines_per_second=args.lines_per_second, batch_size=args.batch_size,
+                            partial_rate=args.partial_rate, error_rate=args.error_rate,
+                            no_server_rate=args.no_server_rate,
+                            daily_line_limit=args.daily_line_limit, token_ttl=args.token_ttl, seed=args.seed)
+    server = MockSubtitleServer(settings, host=args.host, port=args.port)
+    print(f"Mock SubtitleApi đang chạy tại {server.url} (Ctrl+C để dừng)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Lưu kết quả benchmark ra JSON và so sánh với một lần chạy trước (baseline).
+
+Mỗi file kết quả có dạng {"benchmark", "timestamp", "python", "results": [...]};
+mỗi phần tử của results có "name" và các chỉ số số học.
+"""
+import sys
+import json
+import platform
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+def save_results(path: str, benchmark: str, results: List[Dict], settings: Optional[Dict] = None):
+    data = {
+        "benchmark": benchmark,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": settings or {},
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def compare_with_baseline(path: str, results: List[Dict], higher_is_better: Dict[str, bool],
+                          tolerance: float = 0.10) -> bool:
+    """
+    In thay đổi (%) của từng chỉ số so với baseline. Trả về False nếu có chỉ số
+    xấu đi quá `tolerance` (mặc định 10%).
+    """
+    with open(path, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f).get("results", [])}
+    ok = True
+    for result in results:
+        before = baseline.get(result["name"])
+        if before is None:
+            continue
+        for metric, higher in higher_is_better.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = (change < -tolerance) if higher else (change > tolerance)
+            ok = ok and not regressed
+            print(f"  {result['name']:<28} {metric:<18} {old:12.2f} -> {new:12.2f}  ({change:+.1%})"
+                  f"{'  REGRESSION' if regressed else ''}", file=sys.stderr if regressed else sys.stdout)
+    return ok
@@ -0,0 +1,94 @@
+"""
+QuickTranslate Client cho SubPhim Server.
+
+Các tên công khai được import lazy để `import quicktranslate.srt` không kéo theo
+requests, và không module nào ngoài `quicktranslate.gui` import tkinter.
+"""
+import importlib
+
+_EXPORTS = {
+    # srt
+    "SrtEntry": "srt",
+    "parse_srt": "srt",
+    "parse_srt_file": "srt",
+    "build_srt": "srt",
+    "format_srt_timestamp": "srt",
+    "format_vtt_timestamp": "srt",
+    "write_subtitles": "srt",
+    # api
+    "DEFAULT_MODEL": "api",
+    "ServerConfig": "api",
+    "UserSession": "api",
+    "AuthService": "api",
+    "SubtitleApiService": "api",
+    "create_http_session": "api",
+    "get_http_session": "api",
+    # aio (cần aiohttp)
+    "AsyncHttpClient": "aio",
+    "AsyncAuthService": "aio",
+    "AsyncSubtitleApiService": "aio",
+    # balancer
+    "LoadBalancedApiService": "balancer",
+    # cache
+    "TranslationCache": "cache",
+    "make_cache_key": "cache",
+    # callbacks
+    "CallbackReceiver": "callbacks",
+    # credentials
+    "TokenStore": "credentials",
+    # journal
+    "JobJournal": "journal",
+    # logpump
+    "LogPump": "logpump",
+    # metrics
+    "JobMetrics": "metrics",
+    "JsonLinesExporter": "metrics",
+    "PrometheusExporter": "metrics",
+    "combine_hooks": "metrics",
+    # polling
+    "AdaptivePoller": "polling",
+    "format_eta": "polling",
+    # payload
+    "dumps_json": "payload",
+    "compress_body": "payload",
+    # prefilter
+    "PrefilterPolicy": "prefilter",
+    "prefilter_lines": "prefilter",
+    # sharding
+    "ShardPolicy": "sharding",
+    "plan_shards": "sharding",
+    # scheduler
+    "JobScheduler": "scheduler",
+    "SchedulerPolicy": "scheduler",
+    "QuotaDeferred": "scheduler",
+    # errors
+    "classify_error": "errors",
+    # jobs
+    "DEFAULT_PROMPT": "jobs",
+    "DEFAULT_SYSTEM_INSTRUCTION": "jobs",
+    "OUTPUT_FOLDER_NAME": "jobs",
+    "JobResult": "jobs",
+    "get_output_path": "jobs",
+    "run_translation_job": "jobs",
+    # cli
+    "collect_srt_files": "cli",
+    "run_batch": "cli",
+    "run_cli": "cli",
+    "build_arg_parser": "cli",
+    "main": "cli",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,308 @@
+"""
+Client asyncio cho SubPhim Server: một event loop điều khiển hàng trăm session
+với connection pool dùng chung và giới hạn số request đang bay toàn cục.
+
+Cần gói tùy chọn aiohttp. API giống AuthService / SubtitleApiService nhưng các
+hàm là coroutine; payload và cách diễn giải response dùng chung với quicktranslate.api.
+"""
+import asyncio
+import random
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp là tùy chọn
+    aiohttp = None
+
+from .api import (ServerConfig, UserSession, DEFAULT_MODEL, machine_hwid, session_from_login, auth_headers,
+                  bearer_token, create_session_id, build_translate_payload, translate_result, status_result, results_result,
+                  confirm_submission_result, results_url, UNCONFIRMED_STATUSES, _parse_json, _is_encoding_rejected, _log_payload_size)
+from .metrics import record_request
+from .payload import dumps_json, compress_body
+from .polling import AdaptivePoller
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUSES = (502, 503, 504)
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+if aiohttp is not None:
+    _CONNECTION_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+    # Lỗi chứng minh request chưa tới server (ConnectionTimeoutError có từ aiohttp 3.10)
+    _NOT_DELIVERED_ERRORS = (aiohttp.ClientConnectorError,) + tuple(
+        cls for cls in (getattr(aiohttp, "ConnectionTimeoutError", None),) if cls)
+else:
+    _CONNECTION_ERRORS = (asyncio.TimeoutError,)
+    _NOT_DELIVERED_ERRORS = ()
+
+class AsyncHttpClient:
+    """
+    Connection pool aiohttp dùng chung cho mọi service async, kèm semaphore giới hạn
+    config.max_in_flight request đồng thời. Retry GET với backoff có jitter như client sync.
+    """
+
+    def __init__(self, config: ServerConfig):
+        if aiohttp is None:
+            raise ImportError("Client async cần aiohttp: pip install aiohttp")
+        self.config = config
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._limit = asyncio.Semaphore(config.max_in_flight)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.config.max_in_flight,
+                                             limit_per_host=self.config.pool_maxsize)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.config.connect_timeout,
+                                            sock_read=self.config.timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _backoff(self, attempt: int) -> float:
+        backoff = min(self.config.backoff_factor * (2 ** (attempt - 1)), self.config.backoff_max)
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+    async def request(self, method: str, url: str, data: Optional[bytes] = None,
+                      headers: Optional[Dict[str, str]] = None, endpoint: Optional[str] = None) -> Tuple[int, bytes]:
+        """
+        Gửi request, trả về (status_code, body). Lỗi kết nối sau khi hết retry được raise.
+        Có `endpoint` thì request được ghi vào metrics của job hiện tại.
+        """
+        retries = self.config.max_retries
+        attempt = 0
+        while True:
+            try:
+                async with self._limit:
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                    try:
+                        async with self._get_session().request(method, url, data=data, headers=headers) as response:
+                            status, body = response.status, await response.read()
+                    finally:
+                        self.in_flight -= 1
+                if status not in _RETRY_STATUSES or method not in _IDEMPOTENT_METHODS or attempt >= retries:
+                    if endpoint:
+                        record_request(endpoint, len(data or b""), len(body), attempt)
+                    return status, body
+            except _CONNECTION_ERRORS:
+                if method not in _IDEMPOTENT_METHODS or attempt >= retries:
+                    raise
+            attempt += 1
+            await asyncio.sleep(self._backoff(attempt))
+
+class AsyncAuthService:
+    """Bản async của AuthService"""
+
+    def __init__(self, config: ServerConfig, http: Optional[AsyncHttpClient] = None, token_store=None):
+        self.config = config
+        self.http = http or AsyncHttpClient(config)
+        self.session: Optional[UserSession] = None
+        self.token_store = token_store
+        self._credentials: Optional[Tuple[str, str]] = None
+        self._refresh_lock = asyncio.Lock()
+
+    async def register(self, username: str, password: str, email: str) -> Tuple[bool, str]:
+        """Đăng ký tài khoản mới"""
+        url = f"{self.config.base_url}/api/auth/register"
+        payload = {"username": username, "password": password, "email": email, "hwid": machine_hwid()}
+        try:
+            status, body = await self.http.request("POST", url, data=dumps_json(payload),
+                                                   headers={"Content-Type": "application/json"})
+            if status == 200:
+                return True, "Đăng ký thành công!"
+            return False, f"Lỗi {status}: {body.decode('utf-8', 'replace')}"
+        except _CONNECTION_ERRORS as e:
+            return False, f"Lỗi kết nối: {str(e)}"
+
+    async def login(self, username: str, password: str) -> Tuple[bool, str]:
+        """Đăng nhập"""
+        url = f"{self.config.base_url}/api/auth/login"
+        payload = {"username": username, "password": password, "hwid": machine_hwid()}
+        try:
+            status, body = await self.http.request("POST", url, data=dumps_json(payload),
+                                                   headers={"Content-Type": "application/json"})
+            if status == 200:
+                self.session = session_from_login(_parse_json(body) or {})
+                self._credentials = (username, password)
+                if self.token_store is not None:
+                    self.token_store.save(self.config.base_url, self.session)
+                return True, "Đăng nhập thành công!"
+            return False, f"Lỗi {status}: {body.decode('utf-8', 'replace')}"
+        except _CONNECTION_ERRORS as e:
+            return False, f"Lỗi kết nối: {str(e)}"
+
+    def restore_session(self, username: Optional[str] = None) -> bool:
+        """Dùng lại token còn hạn đã lưu (như AuthService.restore_session)"""
+        session = self.token_store.load(self.config.base_url, username) if self.token_store is not None else None
+        if session is None:
+            return False
+        self.session = session
+        return True
+
+    def remember_credentials(self, username: str, password: str):
+        """Giữ username/password trong bộ nhớ để tự đăng nhập lại khi token bị từ chối"""
+        self._credentials = (username, password)
+
+    async def refresh(self, rejected_token: Optional[str] = None) -> bool:
+        """Đăng nhập lại khi token hết hạn / bị từ chối (như AuthService.refresh)"""
+        async with self._refresh_lock:
+            session = self.session
+            if session is not None and session.token != rejected_token and not session.is_expired():
+                return True
+            if self._credentials is None:
+                if session is not None and session.token == rejected_token and self.token_store is not None:
+                    self.token_store.remove(self.config.base_url, session.username)
+                return False
+            success, message = await self.login(*self._credentials)
+            if success:
+                logger.info(f"Token của {self.config.base_url} hết hạn hoặc bị từ chối, đã đăng nhập lại.")
+            else:
+                logger.warning(f"Đăng nhập lại {self.config.base_url} thất bại: {message}")
+            return success
+
+    def get_auth_headers(self) -> Dict[str, str]:
+        """Lấy headers xác thực"""
+        return auth_headers(self.session)
+
+    async def fresh_auth_headers(self) -> Dict[str, str]:
+        """Headers xác thực, token sắp hết hạn thì đăng nhập lại trước"""
+        session = self.session
+        if session is not None and session.is_expired() and self._credentials is not None:
+            await self.refresh(session.token)
+        return self.get_auth_headers()
+
+    def is_authenticated(self) -> bool:
+        """Kiểm tra đã đăng nhập chưa"""
+        return self.session is not None
+
+class AsyncSubtitleApiService:
+    """Bản async của SubtitleApiService (/api/subtitle)"""
+
+    def __init__(self, config: ServerConfig, auth_service: AsyncAuthService):
+        self.config = config
+        self.auth = auth_service
+        self.http = auth_service.http
+        self._compression_rejected: set = set()
+
+    def create_session_id(self) -> str:
+        """Tạo Session ID duy nhất theo format gợi ý trong API doc"""
+        return create_session_id()
+
+    async def start_translation_job(self, srt_lines: List[Dict], prompt: str, system_instruction: str,
+                                    session_id: Optional[str] = None,
+                                    callback_url: Optional[str] = None,
+                                    model: str = DEFAULT_MODEL,
+                                    payload_stats: Optional[Dict] = None) -> Tuple[bool, str, Optional[str]]:
+        """
+        Bắt đầu một job dịch mới.
+        Returns: (success, message, session_id)
+        """
+        session_id = session_id or self.create_session_id()
+        url = f"{self.config.base_url}/api/subtitle/translate"
+        payload = build_translate_payload(session_id, srt_lines, prompt, system_instruction, callback_url, model)
+        logger.info(f"Gửi job dịch mới với Session ID: {session_id}")
+
+        raw_body = dumps_json(payload)
+        encoding = None if self.config.base_url in self._compression_rejected else self.config.request_compression
+        try:
+            status, body, sent_bytes, used_encoding = await self._post_body(url, raw_body, encoding)
+            if used_encoding and _is_encoding_rejected(status, body):
+                logger.warning(f"Server không nhận body nén {used_encoding} (HTTP {status}), gửi lại không nén.")
+                self._compression_rejected.add(self.config.base_url)
+                status, body, sent_bytes, used_encoding = await self._post_body(url, raw_body, None)
+            _log_payload_size(session_id, len(raw_body), sent_bytes, used_encoding, payload_stats)
+            result = translate_result(status, body, session_id)
+            if not result[0] and status in UNCONFIRMED_STATUSES:
+                return confirm_submission_result(await self.poll_status(session_id), session_id, result[1])
+            return result
+        except _CONNECTION_ERRORS as e:
+            logger.error(f"Lỗi kết nối khi bắt đầu job: {e!r}")
+            if isinstance(e, _NOT_DELIVERED_ERRORS):
+                return False, f"Lỗi kết nối: {e}", None
+            # Read timeout / mất kết nối sau khi gửi: server có thể đã nhận job
+            error = f"Lỗi kết nối: {e}"
+        return confirm_submission_result(await self.poll_status(session_id), session_id, error)
+
+    async def _post_body(self, url: str, raw_body: bytes, encoding: Optional[str]):
+        body, used_encoding = compress_body(raw_body, encoding, self.config.compression_min_bytes)
+        headers = {"Content-Encoding": used_encoding} if used_encoding else None
+        status, response_body = await self._send("POST", url, data=body, headers=headers, endpoint="translate")
+        return status, response_body, len(body), used_encoding
+
+    async def _send(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs):
+        """Gửi request kèm token; 401 thì đăng nhập lại và gửi lại một lần (như SubtitleApiService._send)"""
+        auth = await self.auth.fresh_auth_headers()
+        status, body = await self.http.request(method, url, headers={**auth, **(headers or {})}, **kwargs)
+        if status == 401 and await self.auth.refresh(bearer_token(auth)):
+            auth = await self.auth.fresh_auth_headers()
+            status, body = await self.http.request(method, url, headers={**auth, **(headers or {})}, **kwargs)
+        return status, body
+
+    async def poll_status(self, session_id: str) -> Dict:
+        """Lấy trạng thái job."""
+        url = f"{self.config.base_url}/api/subtitle/status/{session_id}"
+        try:
+            status, body = await self._send("GET", url, endpoint="status")
+            return status_result(status, body, session_id)
+        except _CONNECTION_ERRORS as e:
+            logger.error(f"Lỗi kết nối khi polling status: {e}")
+            return {"status": "failed", "error": f"Lỗi kết nối: {e}"}
+
+    async def get_results(self, session_id: str, exclude: Optional[Iterable[int]] = None) -> Dict:
+        """Lấy kết quả của job (như SubtitleApiService.get_results)."""
+        url = results_url(self.config.base_url, session_id, exclude)
+        try:
+            status, body = await self._send("GET", url, endpoint="results")
+            return results_result(status, body)
+        except _CONNECTION_ERRORS as e:
+            logger.error(f"Lỗi kết nối khi lấy kết quả: {e}")
+            return {"status": "failed", "error": f"Lỗi kết nối: {e}"}
+
+    async def cancel_job(self, session_id: str) -> Dict:
+        """Hủy job trên server (như SubtitleApiService.cancel_job)."""
+        url = f"{self.config.base_url}/api/subtitle/cancel/{session_id}"
+        try:
+            status, body = await self._send("POST", url, endpoint="cancel")
+            return status_result(status, body, session_id)
+        except _CONNECTION_ERRORS as e:
+            logger.error(f"Lỗi kết nối khi hủy job: {e}")
+            return {"status": "failed", "error": f"Lỗi kết nối: {e}"}
+
+    async def wait_for_results(self, session_id: str, total_lines: int,
+                               on_status: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Polling thích ứng (asyncio.sleep, không chiếm thread) tới khi job kết thúc rồi lấy kết quả.
+        Trả về response của /results, hoặc status 'failed' nếu job thất bại.
+        Task bị hủy (task.cancel()) thì job trên server cũng bị hủy để giải phóng server dịch.
+        """
+        poller = AdaptivePoller(min_interval=self.config.poll_min_interval,
+                                max_interval=self.config.poll_max_interval,
+                                initial_interval=3 if total_lines < 500 else 5)
+        try:
+            while True:
+                status_data = await self.poll_status(session_id)
+                if on_status:
+                    on_status(status_data)
+                status = status_data.get('status', 'unknown').lower()
+                if status in ('completed', 'partialcompleted'):
+                    return await self.get_results(session_id)
+                if status == 'failed':
+                    return status_data
+                poller.observe(status, status_data.get('completedLines', 0), status_data.get('totalLines', total_lines))
+                await asyncio.sleep(poller.next_delay())
+        except asyncio.CancelledError:
+            await asyncio.shield(self.cancel_job(session_id))
+            raise
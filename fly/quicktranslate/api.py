@@ -0,0 +1,516 @@
+"""
+Client HTTP cho SubPhim Server: cấu hình, connection pool, xác thực và /api/subtitle.
+"""
+import json
+import time
+import uuid
+import base64
+import random
+import hashlib
+import logging
+import threading
+import functools
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Dict, Iterable, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.retry import Retry
+
+from .errors import JOB_NOT_FOUND_ERROR, UNCONFIRMED_ERROR, is_job_not_found, is_status_unavailable
+from .metrics import record_request
+from .payload import dumps_json, compress_body, format_size
+from .ranges import to_ranges
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# HTTP status của /translate không chứng minh được server chưa nhận job (khác 503 từ chối rõ ràng)
+UNCONFIRMED_STATUSES = (500, 502, 504)
+
+# Server cấp JWT hạn 7 ngày; token không đọc được claim exp thì tính hạn này từ lúc đăng nhập
+DEFAULT_TOKEN_TTL = 7 * 24 * 3600
+# Coi token hết hạn sớm hơn một chút để không gửi job bằng token sắp hết hạn
+TOKEN_EXPIRY_MARGIN = 60
+
+# ==============================================================================
+# DATA CLASSES
+# ==============================================================================
+
+@dataclass
+class ServerConfig:
+    """Cấu hình server"""
+    base_url: str = "http://localhost:5000"
+    timeout: int = 60                   # read timeout (giây)
+    connect_timeout: float = 10.0
+    pool_connections: int = 4           # số host được giữ pool
+    pool_maxsize: int = 16              # số socket keep-alive tối đa mỗi host
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    backoff_max: float = 30.0
+    request_compression: Optional[str] = None   # 'gzip' cho body /translate, None = không nén
+    compression_min_bytes: int = 8 * 1024
+    max_in_flight: int = 32                 # giới hạn request đồng thời toàn cục (client async)
+    endpoints: List[str] = field(default_factory=list)  # URL server dự phòng ngoài base_url
+    breaker_threshold: int = 3              # số lỗi liên tiếp trước khi tạm ngắt một endpoint
+    breaker_cooldown: float = 30.0          # thời gian ngắt (giây) trước khi thử lại endpoint
+    probe_interval: float = 30.0            # chu kỳ kiểm tra health/độ trễ các endpoint
+    probe_timeout: float = 2.0              # timeout (giây) của một lần health probe, không retry
+    poll_min_interval: float = 1.0
+    poll_max_interval: float = 30.0
+
+    @property
+    def request_timeout(self) -> Tuple[float, float]:
+        """Timeout (connect, read) truyền cho requests"""
+        return (self.connect_timeout, self.timeout)
+
+    @property
+    def all_endpoints(self) -> List[str]:
+        """base_url và các endpoint dự phòng, không trùng lặp"""
+        urls = []
+        for url in [self.base_url, *self.endpoints]:
+            url = url.rstrip('/')
+            if url and url not in urls:
+                urls.append(url)
+        return urls
+
+@dataclass
+class UserSession:
+    """Thông tin phiên đăng nhập"""
+    token: str
+    user_id: int
+    username: str
+    expires_at: Optional[float] = None  # epoch; None = không rõ
+
+    def is_expired(self, margin: float = TOKEN_EXPIRY_MARGIN) -> bool:
+        return self.expires_at is not None and time.time() >= self.expires_at - margin
+
+# ==============================================================================
+# HTTP CONNECTION POOL
+# ==============================================================================
+
+class _JitteredRetry(Retry):
+    """Retry với exponential backoff có jitter (full jitter) để tránh dồn request cùng lúc"""
+    backoff_cap: float = 30.0
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.backoff_cap = self.backoff_cap
+        return retry
+
+    def get_backoff_time(self) -> float:
+        backoff = min(super().get_backoff_time(), self.backoff_cap)
+        if backoff <= 0:
+            return 0
+        return random.uniform(0, backoff)
+
+_http_sessions: Dict[Tuple, requests.Session] = {}
+_http_sessions_lock = threading.Lock()
+
+def create_http_session(config: ServerConfig) -> requests.Session:
+    """Tạo requests.Session với pool keep-alive và retry theo cấu hình"""
+    retry = _JitteredRetry(
+        total=config.max_retries,
+        connect=config.max_retries,
+        read=config.max_retries,
+        status=config.max_retries,
+        backoff_factor=config.backoff_factor,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        raise_on_status=False,
+    )
+    retry.backoff_cap = config.backoff_max
+    adapter = HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_http_session(config: ServerConfig) -> requests.Session:
+    """Lấy Session dùng chung cho mọi service có cùng cấu hình pool/retry"""
+    key = (config.pool_connections, config.pool_maxsize, config.max_retries,
+           config.backoff_factor, config.backoff_max)
+    with _http_sessions_lock:
+        session = _http_sessions.get(key)
+        if session is None:
+            session = create_http_session(config)
+            _http_sessions[key] = session
+        return session
+
+# ==============================================================================
+# AUTHENTICATION SERVICE
+# ==============================================================================
+
+class AuthService:
+    """
+    Service xử lý đăng ký/đăng nhập. Có token_store (credentials.TokenStore) thì token
+    được lưu sau khi đăng nhập và restore_session() dùng lại nó ở lần chạy sau.
+    """
+    
+    def __init__(self, config: ServerConfig, http: Optional[requests.Session] = None, token_store=None):
+        self.config = config
+        self.http = http or get_http_session(config)
+        self.session: Optional[UserSession] = None
+        self.token_store = token_store
+        self._credentials: Optional[Tuple[str, str]] = None   # chỉ giữ trong bộ nhớ, để đăng nhập lại
+        self._refresh_lock = threading.Lock()
+    
+    def _get_hwid(self) -> str:
+        """Tạo HWID dựa trên thông tin máy tính"""
+        return machine_hwid()
+    
+    def register(self, username: str, password: str, email: str) -> Tuple[bool, str]:
+        """Đăng ký tài khoản mới"""
+        url = f"{self.config.base_url}/api/auth/register"
+        payload = {"username": username, "password": password, "email": email, "hwid": self._get_hwid()}
+        try:
+            response = self.http.post(url, json=payload, timeout=self.config.request_timeout)
+            if response.status_code == 200:
+                return True, "Đăng ký thành công!"
+            return False, f"Lỗi {response.status_code}: {response.text}"
+        except requests.RequestException as e:
+            return False, f"Lỗi kết nối: {str(e)}"
+    
+    def login(self, username: str, password: str) -> Tuple[bool, str]:
+        """Đăng nhập"""
+        url = f"{self.config.base_url}/api/auth/login"
+        payload = {"username": username, "password": password, "hwid": self._get_hwid()}
+        try:
+            response = self.http.post(url, json=payload, timeout=self.config.request_timeout)
+            if response.status_code == 200:
+                self.session = session_from_login(response.json())
+                self._credentials = (username, password)
+                if self.token_store is not None:
+                    self.token_store.save(self.config.base_url, self.session)
+                return True, "Đăng nhập thành công!"
+            return False, f"Lỗi {response.status_code}: {response.text}"
+        except requests.RequestException as e:
+            return False, f"Lỗi kết nối: {str(e)}"
+
+    def restore_session(self, username: Optional[str] = None) -> bool:
+        """Dùng lại token còn hạn đã lưu cho server này, không gọi server (username None: phiên gần nhất)"""
+        session = self.token_store.load(self.config.base_url, username) if self.token_store is not None else None
+        if session is None:
+            return False
+        self.session = session
+        return True
+
+    def remember_credentials(self, username: str, password: str):
+        """Giữ username/password trong bộ nhớ để tự đăng nhập lại khi token bị từ chối"""
+        self._credentials = (username, password)
+
+    def refresh(self, rejected_token: Optional[str] = None) -> bool:
+        """
+        Đăng nhập lại bằng thông tin đã nhớ khi token hết hạn hoặc bị server từ chối (401).
+        Nhiều thread cùng gặp 401 thì chỉ một thread đăng nhập, các thread khác dùng token mới.
+        """
+        with self._refresh_lock:
+            session = self.session
+            if session is not None and session.token != rejected_token and not session.is_expired():
+                return True
+            if self._credentials is None:
+                if session is not None and session.token == rejected_token and self.token_store is not None:
+                    self.token_store.remove(self.config.base_url, session.username)
+                return False
+            success, message = self.login(*self._credentials)
+            if success:
+                logger.info(f"Token của {self.config.base_url} hết hạn hoặc bị từ chối, đã đăng nhập lại.")
+            else:
+                logger.warning(f"Đăng nhập lại {self.config.base_url} thất bại: {message}")
+            return success
+    
+    def get_auth_headers(self) -> Dict[str, str]:
+        """Lấy headers xác thực (token sắp hết hạn thì đăng nhập lại trước)"""
+        session = self.session
+        if session is not None and session.is_expired() and self._credentials is not None:
+            self.refresh(session.token)
+        if not self.session:
+            raise ValueError("Chưa đăng nhập")
+        return auth_headers(self.session)
+    
+    def is_authenticated(self) -> bool:
+        """Kiểm tra đã đăng nhập chưa"""
+        return self.session is not None
+
+# ==============================================================================
+# PHẦN DÙNG CHUNG CHO CLIENT SYNC VÀ ASYNC
+# ==============================================================================
+# Client sync (requests) và async (quicktranslate.aio) chỉ khác phần transport;
+# payload và cách diễn giải response nằm ở đây.
+
+@functools.lru_cache(maxsize=None)
+def machine_hwid() -> str:
+    """HWID dựa trên thông tin máy tính (tính một lần mỗi tiến trình: uuid.getnode() có thể chậm)"""
+    import platform
+    machine_info = f"{platform.node()}-{uuid.getnode()}"
+    return hashlib.md5(machine_info.encode()).hexdigest()
+
+def token_expiry(token: Optional[str]) -> Optional[float]:
+    """Claim exp (epoch) của JWT, không kiểm chữ ký; None nếu token không phải JWT"""
+    try:
+        claims = token.split('.')[1]
+        return float(json.loads(base64.urlsafe_b64decode(claims + '=' * (-len(claims) % 4)))['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+def session_from_login(data: Dict) -> UserSession:
+    token = data.get('token')
+    expires_at = token_expiry(token) or time.time() + DEFAULT_TOKEN_TTL
+    return UserSession(token=token, user_id=data.get('id'), username=data.get('username'), expires_at=expires_at)
+
+def auth_headers(session: Optional[UserSession]) -> Dict[str, str]:
+    if not session:
+        raise ValueError("Chưa đăng nhập")
+    return {"Authorization": f"Bearer {session.token}", "Content-Type": "application/json"}
+
+def bearer_token(headers: Dict[str, str]) -> str:
+    """Token trong header Authorization đã gửi (để biết token nào bị server từ chối)"""
+    return headers.get("Authorization", "").partition(" ")[2]
+
+def create_session_id() -> str:
+    """Tạo Session ID duy nhất theo format gợi ý trong API doc"""
+    return f"job-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+def build_translate_payload(session_id: str, srt_lines: List[Dict], prompt: str, system_instruction: str,
+                            callback_url: Optional[str], model: str) -> Dict:
+    payload = {
+        "sessionId": session_id,
+        "prompt": prompt,
+        "systemInstruction": system_instruction,
+        "lines": srt_lines,
+        "model": model,
+        "callbackUrl": callback_url
+    }
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Payload (first 2 lines): {json.dumps({**payload, 'lines': payload['lines'][:2]}, indent=2, ensure_ascii=False)}")
+    return payload
+
+def _parse_json(body: bytes):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+def _is_encoding_rejected(status_code: int, body: bytes) -> bool:
+    """
+    Server không giải nén được body: 415, hoặc 400 từ tầng model binding
+    (ProblemDetails, không phải lỗi nghiệp vụ dạng {"error": ...} của controller).
+    """
+    if status_code == 415:
+        return True
+    if status_code != 400:
+        return False
+    data = _parse_json(body)
+    return not (isinstance(data, dict) and "error" in data)
+
+def _request_not_delivered(error: requests.RequestException) -> bool:
+    """True nếu request chắc chắn chưa tới server (không mở được kết nối)"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], "reason", error.args[0]), (NewConnectionError, ConnectTimeoutError))
+    return False
+
+def _retry_count(response: requests.Response) -> int:
+    """Số lần urllib3 đã retry trước khi có response này"""
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None and retries.history else 0
+
+def _log_payload_size(session_id: str, raw_bytes: int, sent_bytes: int, encoding: Optional[str],
+                      payload_stats: Optional[Dict]):
+    size_text = f"Payload {format_size(raw_bytes)}"
+    if encoding:
+        size_text += f" -> {format_size(sent_bytes)} ({encoding})"
+    logger.debug(f"{size_text} cho session {session_id}")
+    if payload_stats is not None:
+        payload_stats.update(raw_bytes=raw_bytes, sent_bytes=sent_bytes, encoding=encoding)
+
+def translate_result(status_code: int, body: bytes, session_id: str) -> Tuple[bool, str, Optional[str]]:
+    """Diễn giải response của POST /translate thành (success, message, session_id)"""
+    data = _parse_json(body)
+    if status_code == 200:
+        return True, (data or {}).get('message', 'Job đã được tạo.'), session_id
+    # Lấy trường "error" (JSON của ASP.NET escape tiếng Việt thành \uXXXX)
+    if isinstance(data, dict) and data.get('error'):
+        detail = data['error']
+    else:
+        detail = body.decode('utf-8', 'replace')
+    error_message = f"Lỗi {status_code}: {detail}"
+    logger.error(error_message)
+    return False, error_message, None
+
+def confirm_submission_result(status: Dict, session_id: str, error: str) -> Tuple[bool, str, Optional[str]]:
+    """
+    Kết quả gửi job sau khi hỏi lại /status: job có trên server thì coi như đã nhận;
+    server trả 404 thì chắc chắn chưa nhận (gửi lại / sang endpoint khác an toàn);
+    không hỏi được thì báo UNCONFIRMED_ERROR để không ai tự gửi lại.
+    """
+    if is_job_not_found(status):
+        return False, error, None
+    if is_status_unavailable(status):
+        logger.error(f"Không xác nhận được server đã nhận job {session_id}: {status.get('error')}")
+        return False, f"{UNCONFIRMED_ERROR} ({error})", None
+    logger.warning(f"Server đã nhận job {session_id} dù request gửi bị lỗi ({error}).")
+    return True, "Job đã được server nhận", session_id
+
+def status_result(status_code: int, body: bytes, session_id: str) -> Dict:
+    """Diễn giải response của GET /status"""
+    if status_code == 200:
+        return _parse_json(body) or {"status": "failed", "error": "Response không hợp lệ"}
+    if status_code == 404:
+        return {"status": "failed", "error": f"{JOB_NOT_FOUND_ERROR} với ID: {session_id}"}
+    return {"status": "failed", "error": f"Lỗi HTTP {status_code}"}
+
+def results_url(base_url: str, session_id: str, exclude: Optional[Iterable[int]] = None) -> str:
+    """URL của GET /results; `exclude` là các index đã có, gửi dạng '1-50,101-150'"""
+    url = f"{base_url}/api/subtitle/results/{session_id}"
+    if exclude:
+        ranges = to_ranges(exclude)
+        url += "?exclude=" + ",".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+    return url
+
+def results_result(status_code: int, body: bytes) -> Dict:
+    """Diễn giải response của GET /results"""
+    if status_code == 200:
+        return _parse_json(body) or {"status": "failed", "error": "Response không hợp lệ"}
+    return {"status": "failed", "error": f"Lỗi HTTP {status_code}"}
+
+# ==============================================================================
+# SUBTITLE API SERVICE (Đã chỉnh sửa để tương thích với API)
+# ==============================================================================
+
+class SubtitleApiService:
+    """Service gọi đến endpoint dịch phụ đề phân tán /api/subtitle"""
+    
+    def __init__(self, config: ServerConfig, auth_service: AuthService):
+        self.config = config
+        self.auth = auth_service
+        self.http = auth_service.http
+        # Các base_url đã từ chối body nén: từ đó gửi không nén
+        self._compression_rejected: set = set()
+
+    def create_session_id(self) -> str:
+        """Tạo Session ID duy nhất theo format gợi ý trong API doc"""
+        return create_session_id()
+
+    def start_translation_job(self, srt_lines: List[Dict], prompt: str, system_instruction: str,
+                              session_id: Optional[str] = None,
+                              callback_url: Optional[str] = None,
+                              model: str = DEFAULT_MODEL,
+                              payload_stats: Optional[Dict] = None) -> Tuple[bool, str, Optional[str]]:
+        """
+        Bắt đầu một job dịch mới. Body được mã hóa JSON nhanh và nén nếu
+        config.request_compression bật; server không nhận body nén thì tự gửi lại không nén.
+        payload_stats (nếu truyền vào) được điền raw_bytes / sent_bytes / encoding.
+        Returns: (success, message, session_id)
+        """
+        session_id = session_id or self.create_session_id()
+        url = f"{self.config.base_url}/api/subtitle/translate"
+        payload = build_translate_payload(session_id, srt_lines, prompt, system_instruction, callback_url, model)
+        logger.info(f"Gửi job dịch mới với Session ID: {session_id}")
+
+        raw_body = dumps_json(payload)
+        encoding = None if self.config.base_url in self._compression_rejected else self.config.request_compression
+        try:
+            response, sent_bytes, used_encoding = self._post_body(url, raw_body, encoding)
+            if used_encoding and _is_encoding_rejected(response.status_code, response.content):
+                logger.warning(f"Server không nhận body nén {used_encoding} (HTTP {response.status_code}), gửi lại không nén.")
+                self._compression_rejected.add(self.config.base_url)
+                response, sent_bytes, used_encoding = self._post_body(url, raw_body, None)
+            _log_payload_size(session_id, len(raw_body), sent_bytes, used_encoding, payload_stats)
+            result = translate_result(response.status_code, response.content, session_id)
+            if not result[0] and response.status_code in UNCONFIRMED_STATUSES:
+                return self._confirm_submission(session_id, result[1])
+            return result
+        except requests.RequestException as e:
+            logger.error(f"Lỗi kết nối khi bắt đầu job: {e}")
+            if _request_not_delivered(e):
+                return False, f"Lỗi kết nối: {e}", None
+            return self._confirm_submission(session_id, f"Lỗi kết nối: {e}")
+
+    def _confirm_submission(self, session_id: str, error: str) -> Tuple[bool, str, Optional[str]]:
+        """
+        Request gửi job có thể đã tới server (read timeout, mất kết nối giữa chừng, 500/502/504):
+        hỏi /status trước khi báo lỗi, để không gửi lại (tốn lượt dịch hai lần) job server đã nhận.
+        """
+        return confirm_submission_result(self.poll_status(session_id), session_id, error)
+
+    def _post_body(self, url: str, raw_body: bytes, encoding: Optional[str]) -> Tuple[requests.Response, int, Optional[str]]:
+        body, used_encoding = compress_body(raw_body, encoding, self.config.compression_min_bytes)
+        headers = {"Content-Encoding": used_encoding} if used_encoding else None
+        response = self._send("POST", url, data=body, headers=headers)
+        record_request("translate", len(body), len(response.content), _retry_count(response))
+        return response, len(body), used_encoding
+
+    def poll_status(self, session_id: str) -> Dict:
+        """Lấy trạng thái job. Trả về một dictionary chứa thông tin trạng thái."""
+        url = f"{self.config.base_url}/api/subtitle/status/{session_id}"
+        try:
+            response = self._send("GET", url)
+            record_request("status", 0, len(response.content), _retry_count(response))
+            return status_result(response.status_code, response.content, session_id)
+        except requests.RequestException as e:
+            logger.error(f"Lỗi kết nối khi polling status: {e}")
+            return {"status": "failed", "error": f"Lỗi kết nối: {e}"}
+
+    def get_results(self, session_id: str, exclude: Optional[Iterable[int]] = None) -> Dict:
+        """
+        Lấy kết quả của job. Gọi khi job đang chạy thì nhận các dòng đã dịch xong;
+        `exclude` là các index đã nhận trước đó (server không trả lại).
+        """
+        url = results_url(self.config.base_url, session_id, exclude)
+        try:
+            response = self._send("GET", url)
+            record_request("results", 0, len(response.content), _retry_count(response))
+            return results_result(response.status_code, response.content)
+        except requests.RequestException as e:
+            logger.error(f"Lỗi kết nối khi lấy kết quả: {e}")
+            return {"status": "failed", "error": f"Lỗi kết nối: {e}"}
+
+    def cancel_job(self, session_id: str) -> Dict:
+        """
+        Hủy job trên server (POST /cancel): các batch chưa dịch bị bỏ và được hoàn lượt,
+        kết quả đã dịch xong vẫn lấy được. Trả về trạng thái job sau khi hủy (như poll_status).
+        """
+        url = f"{self.config.base_url}/api/subtitle/cancel/{session_id}"
+        try:
+            response = self._send("POST", url)
+            record_request("cancel", 0, len(response.content), _retry_count(response))
+            return status_result(response.status_code, response.content, session_id)
+        except requests.RequestException as e:
+            logger.error(f"Lỗi kết nối khi hủy job: {e}")
+            return {"status": "failed", "error": f"Lỗi kết nối: {e}"}
+
+    def _send(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        """
+        Gửi request kèm token. Server trả 401 (token hết hạn / bị thu hồi) thì đăng nhập lại
+        bằng thông tin đã nhớ và gửi lại một lần, job đang chạy không bị gián đoạn.
+        """
+        auth = self.auth.get_auth_headers()
+        response = self.http.request(method, url, headers={**auth, **(headers or {})},
+                                     timeout=self.config.request_timeout, **kwargs)
+        if response.status_code == 401 and self.auth.refresh(bearer_token(auth)):
+            auth = self.auth.get_auth_headers()
+            response = self.http.request(method, url, headers={**auth, **(headers or {})},
+                                         timeout=self.config.request_timeout, **kwargs)
+        return response
+
+    def check_health(self, http: Optional[requests.Session] = None, timeout: Optional[float] = None) -> Dict:
+        """
+        Gọi /api/subtitle/health. Trả về {"status": "running", ...} hoặc status 'failed'.
+        http/timeout: session và timeout riêng cho probe (mặc định dùng của service).
+        """
+        url = f"{self.config.base_url}/api/subtitle/health"
+        try:
+            response = (http or self.http).get(url, timeout=timeout or self.config.request_timeout)
+            record_request("health", 0, len(response.content), _retry_count(response))
+            return results_result(response.status_code, response.content)
+        except requests.RequestException as e:
+            return {"status": "failed", "error": f"Lỗi kết nối: {e}"}
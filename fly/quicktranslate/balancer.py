@@ -0,0 +1,293 @@
+"""
+Cân bằng tải phía client giữa nhiều SubPhim server.
+
+Mỗi endpoint có phiên đăng nhập riêng, độ trễ đo được (health probe + thời gian
+gửi job) và circuit breaker. Job mới được gửi tới endpoint ít session nhất và
+nhanh nhất; endpoint trả lỗi tạm thời (hết server dịch, hết API key, 5xx, mất
+kết nối) thì chuyển sang endpoint kế tiếp. Session luôn được poll/lấy kết quả
+trên đúng endpoint đã nhận nó.
+"""
+import time
+import logging
+import threading
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .api import (ServerConfig, UserSession, AuthService, SubtitleApiService, DEFAULT_MODEL, create_session_id,
+                  create_http_session)
+from .errors import JOB_NOT_FOUND_ERROR, TRANSIENT_ERRORS, classify_error, is_job_not_found, is_status_unavailable
+
+logger = logging.getLogger(__name__)
+
+_TERMINAL_STATUSES = frozenset({"completed", "partialcompleted", "failed"})
+
+class Endpoint:
+    """Trạng thái của một server: dịch vụ, độ trễ, số session đang chạy, circuit breaker"""
+
+    def __init__(self, config: ServerConfig, token_store=None):
+        self.config = config
+        self.url = config.base_url
+        self.auth = AuthService(config, token_store=token_store)
+        self.api = SubtitleApiService(config, self.auth)
+        # Probe không retry: endpoint chết phải bị phát hiện sau một timeout ngắn
+        self.probe_http = create_http_session(replace(config, max_retries=0))
+        self.latency: Optional[float] = None    # EWMA (giây)
+        self.active_sessions = 0
+        self.failures = 0
+        self.open_until = 0.0
+
+    def is_open(self, now: float) -> bool:
+        """Circuit breaker đang ngắt (không nhận job mới)"""
+        return now < self.open_until
+
+    def score(self) -> float:
+        """Càng nhỏ càng ưu tiên: độ trễ nhân với số session đang chạy"""
+        return (self.latency if self.latency is not None else 1.0) * (1 + self.active_sessions)
+
+    def observe_latency(self, seconds: float, alpha: float = 0.3):
+        self.latency = seconds if self.latency is None else (1 - alpha) * self.latency + alpha * seconds
+
+    def record_success(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self, now: float) -> bool:
+        """Ghi nhận lỗi; trả về True nếu breaker vừa ngắt endpoint"""
+        self.failures += 1
+        if self.failures >= self.config.breaker_threshold:
+            # Half-open: hết cooldown thì cho thử một lần, lỗi tiếp là ngắt lại ngay
+            self.failures = self.config.breaker_threshold - 1
+            self.open_until = now + self.config.breaker_cooldown
+            return True
+        return False
+
+class LoadBalancedApiService:
+    """
+    Thay thế AuthService + SubtitleApiService khi có nhiều endpoint
+    (ServerConfig.base_url + ServerConfig.endpoints): cùng login / is_authenticated /
+    start_translation_job / poll_status / get_results / cancel_job.
+    """
+
+    def __init__(self, config: ServerConfig, token_store=None):
+        self.config = config
+        urls = config.all_endpoints
+        # Mỗi host cần một pool riêng trong HTTPAdapter
+        pool_connections = max(config.pool_connections, len(urls))
+        self.endpoints = [Endpoint(replace(config, base_url=url, endpoints=[], pool_connections=pool_connections),
+                                   token_store)
+                          for url in urls]
+        self._pinned: Dict[str, Endpoint] = {}
+        self._active: set = set()
+        self._lock = threading.Lock()
+        self._last_probe = 0.0
+        self._probing = False
+
+    # --- đăng nhập ---
+
+    def login(self, username: str, password: str) -> Tuple[bool, str]:
+        """Đăng nhập mọi endpoint; thành công nếu ít nhất một endpoint đăng nhập được"""
+        errors = []
+        for endpoint in self.endpoints:
+            success, message = endpoint.auth.login(username, password)
+            if not success:
+                errors.append(f"{endpoint.url}: {message}")
+                logger.warning(f"Đăng nhập {endpoint.url} thất bại: {message}")
+        ready = sum(1 for endpoint in self.endpoints if endpoint.auth.is_authenticated())
+        if not ready:
+            return False, "; ".join(errors)
+        self._probe_in_background()
+        return True, f"Đăng nhập thành công {ready}/{len(self.endpoints)} server!"
+
+    def restore_session(self, username: Optional[str] = None) -> bool:
+        """
+        Dùng lại token đã lưu cho từng endpoint. True nếu mọi endpoint đều có token còn hạn;
+        endpoint nào có token vẫn được dùng ngay cả khi trả về False.
+        """
+        restored = 0
+        for endpoint in self.endpoints:
+            if endpoint.auth.restore_session(username):
+                restored += 1
+                # Không chỉ định username: mọi endpoint dùng cùng tài khoản với endpoint đầu tiên
+                username = username or endpoint.auth.session.username
+        return restored == len(self.endpoints)
+
+    def remember_credentials(self, username: str, password: str):
+        for endpoint in self.endpoints:
+            endpoint.auth.remember_credentials(username, password)
+
+    def register(self, username: str, password: str, email: str) -> Tuple[bool, str]:
+        """Đăng ký cùng tài khoản trên mọi endpoint"""
+        results = [(endpoint.url, *endpoint.auth.register(username, password, email)) for endpoint in self.endpoints]
+        if any(success for _, success, _ in results):
+            return True, "Đăng ký thành công!"
+        return False, "; ".join(f"{url}: {message}" for url, _, message in results)
+
+    def is_authenticated(self) -> bool:
+        return any(endpoint.auth.is_authenticated() for endpoint in self.endpoints)
+
+    @property
+    def session(self) -> Optional[UserSession]:
+        """Phiên đăng nhập của endpoint đầu tiên đã đăng nhập (để hiển thị)"""
+        for endpoint in self.endpoints:
+            if endpoint.auth.session is not None:
+                return endpoint.auth.session
+        return None
+
+    # --- health / chọn endpoint ---
+
+    def probe(self):
+        """Kiểm tra health và đo độ trễ của mọi endpoint"""
+        self._last_probe = time.monotonic()
+        for endpoint in self.endpoints:
+            started = time.monotonic()
+            health = endpoint.api.check_health(endpoint.probe_http, self.config.probe_timeout)
+            now = time.monotonic()
+            with self._lock:
+                if health.get("status") == "failed":
+                    opened = endpoint.record_failure(now)
+                    logger.warning(f"Endpoint {endpoint.url} không khỏe: {health.get('error')}"
+                                   + (" — tạm ngắt" if opened else ""))
+                else:
+                    endpoint.observe_latency(now - started)
+                    endpoint.record_success()
+
+    def _probe_in_background(self):
+        """Chạy probe() trong thread riêng (nếu chưa có probe nào đang chạy)"""
+        with self._lock:
+            if self._probing:
+                return
+            self._probing = True
+            self._last_probe = time.monotonic()
+
+        def run():
+            try:
+                self.probe()
+            except Exception as e:
+                logger.warning(f"Health probe lỗi: {e}")
+            finally:
+                with self._lock:
+                    self._probing = False
+
+        threading.Thread(target=run, name="endpoint-probe", daemon=True).start()
+
+    def _candidates(self) -> List[Endpoint]:
+        # Không chờ probe trên đường gửi job: chọn theo độ trễ/breaker hiện có
+        now = time.monotonic()
+        if now - self._last_probe >= self.config.probe_interval:
+            self._probe_in_background()
+        with self._lock:
+            ready = [e for e in self.endpoints if e.auth.is_authenticated()]
+            closed = sorted((e for e in ready if not e.is_open(now)), key=Endpoint.score)
+            if closed:
+                return closed
+            # Mọi endpoint đều đang ngắt: vẫn thử, endpoint sắp hết cooldown trước
+            return sorted(ready, key=lambda e: e.open_until)
+
+    # --- API giống SubtitleApiService ---
+
+    def create_session_id(self) -> str:
+        return create_session_id()
+
+    def start_translation_job(self, srt_lines: List[Dict], prompt: str, system_instruction: str,
+                              session_id: Optional[str] = None,
+                              callback_url: Optional[str] = None,
+                              model: str = DEFAULT_MODEL,
+                              payload_stats: Optional[Dict] = None) -> Tuple[bool, str, Optional[str]]:
+        """Gửi job tới endpoint tốt nhất, lỗi tạm thời thì chuyển sang endpoint kế tiếp"""
+        session_id = session_id or self.create_session_id()
+        candidates = self._candidates()
+        if not candidates:
+            return False, "Chưa đăng nhập endpoint nào", None
+        errors = []
+        for endpoint in candidates:
+            started = time.monotonic()
+            success, message, accepted_id = endpoint.api.start_translation_job(
+                srt_lines, prompt, system_instruction, session_id=session_id, callback_url=callback_url,
+                model=model, payload_stats=payload_stats)
+            now = time.monotonic()
+            if success:
+                with self._lock:
+                    endpoint.observe_latency(now - started)
+                    endpoint.record_success()
+                    endpoint.active_sessions += 1
+                    self._pinned[accepted_id] = endpoint
+                    self._active.add(accepted_id)
+                if len(self.endpoints) > 1:
+                    logger.info(f"Session {accepted_id} -> {endpoint.url}")
+                return True, message, accepted_id
+
+            kind = classify_error(message)
+            if kind not in TRANSIENT_ERRORS:
+                return False, message, None
+            with self._lock:
+                opened = endpoint.record_failure(now)
+            errors.append(f"{endpoint.url}: {message}")
+            logger.warning(f"Endpoint {endpoint.url} từ chối job ({kind}){' — tạm ngắt' if opened else ''}, "
+                           f"thử endpoint khác...")
+        return False, " | ".join(errors), None
+
+    def _release(self, session_id: str):
+        """Session đã kết thúc (đã lấy kết quả, thất bại hoặc bị hủy): bỏ khỏi bảng định tuyến"""
+        with self._lock:
+            endpoint = self._pinned.pop(session_id, None)
+            if session_id in self._active:
+                self._active.discard(session_id)
+                endpoint.active_sessions -= 1
+
+    def _endpoint_for(self, session_id: str) -> Tuple[Optional[Endpoint], Optional[Dict]]:
+        """
+        Endpoint đã nhận session. Session không rõ nguồn (vd. resume từ journal) thì
+        hỏi lần lượt các endpoint và chỉ ghim vào endpoint trả về trạng thái thật của job;
+        trả về kèm status đã lấy được để khỏi poll lại. Không tìm thấy thì không ghim gì,
+        và nếu có endpoint không hỏi được thì trả về lỗi đó (session có thể nằm ở đó).
+        """
+        with self._lock:
+            endpoint = self._pinned.get(session_id)
+        if endpoint is not None:
+            return endpoint, None
+        not_found = unavailable = None
+        for endpoint in self.endpoints:
+            if not endpoint.auth.is_authenticated():
+                continue
+            status = endpoint.api.poll_status(session_id)
+            if is_job_not_found(status):
+                not_found = status
+                continue
+            if is_status_unavailable(status):
+                unavailable = status
+                continue
+            with self._lock:
+                self._pinned[session_id] = endpoint
+            return endpoint, status
+        return None, unavailable or not_found
+
+    def poll_status(self, session_id: str) -> Dict:
+        endpoint, status = self._endpoint_for(session_id)
+        if endpoint is None:
+            return status or {"status": "failed", "error": f"{JOB_NOT_FOUND_ERROR} với ID: {session_id}"}
+        if status is None:
+            status = endpoint.api.poll_status(session_id)
+        if is_status_unavailable(status):
+            # Mất kết nối / 5xx / 401: job có thể vẫn chạy, giữ nguyên định tuyến
+            with self._lock:
+                endpoint.record_failure(time.monotonic())
+        elif status.get("status", "").lower() == "failed":
+            self._release(session_id)
+        return status
+
+    def cancel_job(self, session_id: str) -> Dict:
+        endpoint, _ = self._endpoint_for(session_id)
+        if endpoint is None:
+            return {"status": "failed", "error": f"{JOB_NOT_FOUND_ERROR} với ID: {session_id}"}
+        status = endpoint.api.cancel_job(session_id)
+        self._release(session_id)
+        return status
+
+    def get_results(self, session_id: str, exclude: Optional[Iterable[int]] = None) -> Dict:
+        endpoint, _ = self._endpoint_for(session_id)
+        if endpoint is None:
+            return {"status": "failed", "error": f"{JOB_NOT_FOUND_ERROR} với ID: {session_id}"}
+        results = endpoint.api.get_results(session_id, exclude)
+        if results.get("status", "").lower() in _TERMINAL_STATUSES and not is_status_unavailable(results):
+            self._release(session_id)
+        return results
@@ -0,0 +1,111 @@
+"""
+Translation memory trên đĩa (SQLite): lưu bản dịch theo hash của
+(text, prompt, systemInstruction, model) để lần dịch lại chỉ gửi các dòng chưa có.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Optional, Dict, Iterable, Tuple
+
+from .paths import app_data_dir
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    key TEXT PRIMARY KEY,
+    translated TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used);
+"""
+
+# SQLite giới hạn số tham số trong một câu lệnh
+_SQL_CHUNK = 500
+
+def default_cache_path() -> str:
+    return os.path.join(app_data_dir(), "translation_cache.db")
+
+def make_cache_key(text: str, prompt: str, system_instruction: str, model: str) -> str:
+    """Hash SHA-256 của bộ (text, prompt, systemInstruction, model)"""
+    digest = hashlib.sha256()
+    for part in (model, system_instruction, prompt, text):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+class TranslationCache:
+    """
+    Cache bản dịch giới hạn theo số dòng, loại bỏ theo LRU (cột last_used).
+    An toàn khi dùng chung giữa nhiều thread của batch.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 500_000):
+        self.path = path or default_cache_path()
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Trả về {key: bản dịch} cho các key có trong cache và cập nhật thời điểm dùng"""
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, str] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique_keys), _SQL_CHUNK):
+                chunk = unique_keys[start:start + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, translated FROM translations WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany("UPDATE translations SET last_used = ? WHERE key = ?",
+                                       ((now, key) for key in found))
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        """Lưu các cặp (key, bản dịch) rồi loại bỏ bớt nếu vượt max_entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO translations (key, translated, last_used) VALUES (?, ?, ?)",
+                    ((key, translated, now) for key, translated in items)
+                )
+                self._evict_locked()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def _evict_locked(self):
+        excess = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY last_used ASC LIMIT ?)", (excess,)
+            )
+            logger.debug(f"Cache bản dịch: đã loại bỏ {excess} dòng cũ nhất")
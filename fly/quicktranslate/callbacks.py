@@ -0,0 +1,145 @@
+"""
+Receiver webhook nhúng: nhận callback hoàn thành job từ SubPhim Server
+(xem docs/SubtitleApi-Documentation.md, mục "Webhook Callback") để job
+không phải polling /status liên tục.
+"""
+import json
+import socket
+import ipaddress
+import logging
+import secrets
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, Dict
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+logger = logging.getLogger(__name__)
+
+class _Waiter:
+    __slots__ = ('event', 'payload')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.payload: Optional[Dict] = None
+
+class CallbackReceiver:
+    """
+    HTTP server nhỏ chạy trong thread nền. Mỗi session đăng ký sẽ có URL riêng
+    dạng <public_url>/callback/<sessionId>?token=<secret>; request không đúng
+    token bị từ chối.
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 0, public_url: Optional[str] = None,
+                 safety_poll_interval: float = 60.0):
+        self.host = host
+        self.port = port
+        self.public_url = public_url.rstrip('/') if public_url else None
+        # Khi có callback, polling chỉ còn là lưới an toàn phòng callback bị mất
+        self.safety_poll_interval = safety_poll_interval
+        self._token = secrets.token_urlsafe(16)
+        self._waiters: Dict[str, _Waiter] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'CallbackReceiver':
+        if self._server is not None:
+            return self
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        if self.public_url is None:
+            self.public_url = f"http://{self._guess_public_host()}:{self.port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="CallbackReceiver")
+        self._thread.start()
+        logger.info(f"Callback receiver đang lắng nghe tại {self.host}:{self.port} (URL công khai: {self.public_url})")
+        return self
+
+    def _guess_public_host(self) -> str:
+        """Host cho URL công khai khi không có public_url: địa chỉ bind, hoặc IP của hostname"""
+        if self.host not in ("", "0.0.0.0"):
+            return self.host
+        host = socket.gethostbyname(socket.gethostname())
+        if ipaddress.ip_address(host).is_loopback:
+            # Nhiều distro map hostname về 127.0.1.1: server từ xa không gọi được
+            logger.warning(f"Hostname trỏ về {host}, server ở máy khác sẽ không gọi được callback tới đây. "
+                           f"Hãy chỉ định URL công khai (--callback-url) hoặc địa chỉ bind (--callback-host).")
+        return host
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        with self._lock:
+            for waiter in self._waiters.values():
+                waiter.event.set()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def register(self, session_id: str) -> str:
+        """Đăng ký chờ callback cho session, trả về callbackUrl để gửi kèm job"""
+        with self._lock:
+            self._waiters.setdefault(session_id, _Waiter())
+        return f"{self.public_url}/callback/{quote(session_id, safe='')}?token={self._token}"
+
+    def unregister(self, session_id: str):
+        with self._lock:
+            self._waiters.pop(session_id, None)
+
+    def wait(self, session_id: str, timeout: float) -> Optional[Dict]:
+        """Chờ tối đa `timeout` giây; trả về payload callback nếu đã nhận, ngược lại None"""
+        with self._lock:
+            waiter = self._waiters.get(session_id)
+        if waiter is None or not waiter.event.wait(timeout):
+            return None
+        with self._lock:
+            waiter.event.clear()
+            return waiter.payload
+
+    def _deliver(self, session_id: str, payload: Dict) -> bool:
+        with self._lock:
+            waiter = self._waiters.get(session_id)
+            if waiter is None:
+                return False
+            waiter.payload = payload
+            waiter.event.set()
+        return True
+
+    def _make_handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug("Callback receiver: " + format, *args)
+
+            def _reply(self, code: int):
+                self.send_response(code)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                parts = urlsplit(self.path)
+                segments = parts.path.strip('/').split('/')
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if len(segments) != 2 or segments[0] != "callback":
+                    return self._reply(404)
+                if parse_qs(parts.query).get("token", [None])[0] != receiver._token:
+                    return self._reply(403)
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    return self._reply(400)
+                session_id = unquote(segments[1])
+                if not receiver._deliver(session_id, payload):
+                    return self._reply(404)
+                logger.info(f"Nhận callback cho session {session_id}: {payload.get('status')}")
+                self._reply(200)
+
+        return Handler
@@ -0,0 +1,298 @@
+"""
+Chế độ batch không GUI và entry point dòng lệnh.
+GUI (tkinter) chỉ được import khi thực sự mở giao diện.
+"""
+import os
+import sys
+import glob
+import time
+import signal
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, List, Tuple, Iterable
+
+from .api import ServerConfig, AuthService, SubtitleApiService, DEFAULT_MODEL
+from .balancer import LoadBalancedApiService
+from .cache import TranslationCache
+from .credentials import TokenStore
+from .journal import JobJournal
+from .metrics import JsonLinesExporter, PrometheusExporter, combine_hooks
+from .payload import SUPPORTED_ENCODINGS
+from .prefilter import RULES as PREFILTER_RULES, PrefilterPolicy
+from .scheduler import JobScheduler, SchedulerPolicy, QuotaDeferred, PRIORITY_NORMAL, PRIORITY_RESUME, format_reset_time
+from .sharding import ShardPolicy
+from .callbacks import CallbackReceiver
+from .jobs import (DEFAULT_PROMPT, DEFAULT_SYSTEM_INSTRUCTION, OUTPUT_FOLDER_NAME,
+                   JobResult, get_output_path, run_translation_job)
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(threadName)s - %(message)s'
+
+def collect_srt_files(inputs: Iterable[str], recursive: bool = False) -> List[str]:
+    """Mở rộng danh sách thư mục / glob / file thành danh sách file .srt (bỏ qua thư mục 'Đã dịch')"""
+    found: Dict[str, None] = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*.srt') if recursive else os.path.join(item, '*.srt')
+            candidates = glob.glob(pattern, recursive=recursive)
+        elif glob.has_magic(item):
+            candidates = glob.glob(item, recursive=True)
+        else:
+            candidates = [item]
+        for path in sorted(candidates):
+            if not os.path.isfile(path):
+                logger.warning(f"Bỏ qua, không phải file: {path}")
+                continue
+            if os.path.basename(os.path.dirname(path)) == OUTPUT_FOLDER_NAME:
+                continue
+            found.setdefault(os.path.abspath(path), None)
+    return list(found)
+
+def run_batch(translator: SubtitleApiService, files: List[str], prompt: str, instruction: str,
+              concurrency: int = 4, priorities: Optional[Dict[str, int]] = None, **job_options) -> List[JobResult]:
+    """
+    Dịch nhiều file song song với tối đa `concurrency` job cùng lúc, in tổng kết throughput.
+    File có độ ưu tiên nhỏ hơn trong `priorities` được bắt đầu (và gửi session) trước.
+    `job_options` được chuyển nguyên cho run_translation_job (vd. callback_receiver, scheduler).
+    """
+    results: List[JobResult] = []
+    failures: List[Tuple[str, str]] = []
+    deferred: List[Tuple[str, float]] = []
+    stopped: List[str] = []
+    priorities = priorities or {}
+    started = time.monotonic()
+
+    def translate_one(filepath: str) -> Optional[JobResult]:
+        name = os.path.basename(filepath)
+        return run_translation_job(translator, filepath, prompt, instruction,
+                                   log=lambda message: logger.info(f"[{name}] {message}"),
+                                   priority=priorities.get(filepath, PRIORITY_NORMAL), **job_options)
+
+    # Executor chạy theo thứ tự submit nên sắp xếp trước (sort ổn định giữ thứ tự đầu vào)
+    ordered = sorted(files, key=lambda f: priorities.get(f, PRIORITY_NORMAL))
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="BatchWorker") as executor:
+        futures = {executor.submit(translate_one, f): f for f in ordered}
+        for future in as_completed(futures):
+            filepath = futures[future]
+            try:
+                result = future.result()
+            except QuotaDeferred as e:
+                logger.warning(f"⏸ {os.path.basename(filepath)}: {e}")
+                deferred.append((filepath, e.reset_at))
+                continue
+            except Exception as e:
+                logger.error(f"❌ {os.path.basename(filepath)}: {e}")
+                failures.append((filepath, str(e)))
+                continue
+            if result is None:
+                stopped.append(filepath)
+            else:
+                results.append(result)
+                logger.info(f"✅ {os.path.basename(filepath)} -> {result.output_path} ({result.elapsed:.1f}s)")
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    total_lines = sum(r.total_lines for r in results)
+    cache_hits = sum(r.cache_hits for r in results)
+    print(f"\n=== Tổng kết: {len(results)}/{len(files)} file thành công, {len(failures)} lỗi, "
+          f"{len(deferred)} hoãn, {elapsed:.1f}s ===")
+    print(f"Throughput: {len(results) / elapsed * 60:.2f} file/phút, {total_lines / elapsed:.1f} dòng/s")
+    if cache_hits:
+        print(f"Cache bản dịch: {cache_hits}/{total_lines} dòng lấy từ cache ({cache_hits / total_lines:.0%})")
+    for filepath, error in failures:
+        print(f"  LỖI {filepath}: {error}")
+    if deferred:
+        reset_at = max(reset for _, reset in deferred)
+        print(f"Hết lượt dịch: {len(deferred)} file được hoãn, chạy lại với --resume sau {format_reset_time(reset_at)}.")
+        for filepath, _ in deferred:
+            print(f"  HOÃN {filepath}")
+    if stopped:
+        print(f"Đã dừng: {len(stopped)} file chưa dịch xong, chạy lại với --resume để tiếp tục.")
+    return results
+
+def run_cli(args: argparse.Namespace) -> int:
+    """Chạy chế độ batch không GUI. Trả về exit code."""
+    journal = None if args.no_journal else JobJournal(args.journal)
+    prompt = _read_text_arg(args.prompt, args.prompt_file, DEFAULT_PROMPT)
+    instruction = _read_text_arg(args.instruction, args.instruction_file, DEFAULT_SYSTEM_INSTRUCTION)
+
+    # Mỗi nhóm: (prompt, instruction, model) -> danh sách file
+    groups: Dict[Tuple[str, str, str], List[str]] = {}
+    priorities: Dict[str, int] = {}
+    if args.resume:
+        if journal is None:
+            logger.error("--resume cần journal (bỏ --no-journal).")
+            return 2
+        for _, job in journal.resumable_jobs():
+            groups.setdefault((job["prompt"], job["system_instruction"], job["model"]), []).append(job["input_path"])
+            priorities[job["input_path"]] = PRIORITY_RESUME
+    if args.inputs:
+        files = collect_srt_files(args.inputs, recursive=args.recursive)
+        if args.skip_existing:
+            output_ext = args.format if args.format != "srt" else None
+            files = [f for f in files if not os.path.exists(get_output_path(f, output_ext))]
+        if files:
+            groups.setdefault((prompt, instruction, args.model), []).extend(files)
+    total_files = sum(len(files) for files in groups.values())
+    if not total_files:
+        logger.error("Không tìm thấy file SRT nào cần dịch.")
+        return 2
+
+    urls = [url.strip().rstrip('/') for url in args.server.split(',') if url.strip()]
+    config = ServerConfig(base_url=urls[0], endpoints=urls[1:], request_compression=args.compress)
+    config.pool_maxsize = max(config.pool_maxsize, args.concurrency)
+    token_store = None if args.no_token_cache else TokenStore()
+    if config.endpoints:
+        # Nhiều server: một service vừa đăng nhập vừa phân phối job giữa các endpoint
+        auth = translator = LoadBalancedApiService(config, token_store=token_store)
+    else:
+        auth = AuthService(config, token_store=token_store)
+        translator = SubtitleApiService(config, auth)
+
+    username = args.username or os.environ.get("SUBPHIM_USERNAME")
+    password = args.password or os.environ.get("SUBPHIM_PASSWORD")
+    if auth.restore_session(username):
+        # Token còn hạn từ lần chạy trước: gửi job ngay; có password thì tự đăng nhập lại khi token bị từ chối
+        expires_at = auth.session.expires_at
+        logger.info(f"Dùng lại phiên đăng nhập đã lưu của {auth.session.username}"
+                    + (f" (hết hạn {format_reset_time(expires_at)})." if expires_at else "."))
+        if password:
+            auth.remember_credentials(username or auth.session.username, password)
+    elif username and password:
+        success, message = auth.login(username, password)
+        if not success:
+            logger.error(f"Lỗi đăng nhập: {message}")
+            return 1
+    elif auth.is_authenticated():
+        logger.warning("Chỉ một số server có phiên đăng nhập đã lưu; cần password để đăng nhập các server còn lại.")
+    else:
+        logger.error("Cần username/password (tham số hoặc biến môi trường SUBPHIM_USERNAME/SUBPHIM_PASSWORD), "
+                     "hoặc phiên đăng nhập còn hạn đã lưu từ lần chạy trước.")
+        return 2
+
+    callback_receiver = None
+    if args.callback_port is not None or args.callback_url:
+        callback_receiver = CallbackReceiver(host=args.callback_host, port=args.callback_port or 0,
+                                             public_url=args.callback_url).start()
+
+    sharding = None
+    if args.shard_lines or args.shard_bytes:
+        sharding = ShardPolicy(max_lines=args.shard_lines or ShardPolicy.max_lines,
+                               max_bytes=args.shard_bytes or ShardPolicy.max_bytes,
+                               concurrency=args.shard_concurrency)
+    cache = TranslationCache(args.cache, max_entries=args.cache_max_entries) if args.cache is not None else None
+    try:
+        prefilter = PrefilterPolicy.from_rules(args.prefilter) if args.prefilter else None
+    except ValueError as e:
+        logger.error(str(e))
+        return 2
+    scheduler = JobScheduler(SchedulerPolicy(submit_rate=args.submit_rate, submit_burst=args.submit_burst,
+                                             max_sessions=args.max_sessions, wait_for_quota=args.wait_quota))
+    metrics_hook = combine_hooks([
+        JsonLinesExporter(args.metrics_jsonl) if args.metrics_jsonl else None,
+        PrometheusExporter(args.metrics_prom) if args.metrics_prom else None,
+    ])
+
+    logger.info(f"Bắt đầu dịch {total_files} file với tối đa {args.concurrency} job song song.")
+    stop = threading.Event()
+    previous_handler = signal.signal(signal.SIGINT, _make_stop_handler(stop))
+    succeeded = 0
+    try:
+        for (group_prompt, group_instruction, group_model), files in groups.items():
+            if stop.is_set():
+                break
+            results = run_batch(translator, files, group_prompt, group_instruction,
+                                concurrency=args.concurrency, priorities=priorities, scheduler=scheduler,
+                                should_stop=stop.is_set,
+                                callback_receiver=callback_receiver,
+                                cache=cache, model=group_model, sharding=sharding,
+                                recovery_rounds=args.recovery_rounds, journal=journal, metrics_hook=metrics_hook,
+                                output_format=args.format, prefilter=prefilter, progressive=args.progressive)
+            succeeded += len(results)
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        if callback_receiver:
+            callback_receiver.stop()
+        if cache:
+            cache.close()
+    if stop.is_set():
+        return 130
+    return 0 if succeeded == total_files else 1
+
+def _make_stop_handler(stop: threading.Event):
+    """Ctrl+C lần đầu: dừng các job và hủy session trên server; lần hai: thoát ngay"""
+    def handler(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        stop.set()
+        logger.warning("Đang dừng, hủy các job đang chạy trên server... (Ctrl+C lần nữa để thoát ngay)")
+    return handler
+
+def _read_text_arg(value: Optional[str], path: Optional[str], default: str) -> str:
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    return value or default
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="QuickTranslate Client cho SubPhim Server. Không có tham số: mở GUI.")
+    parser.add_argument("inputs", nargs="*", help="Thư mục, glob hoặc file .srt cần dịch (chế độ batch không GUI)")
+    parser.add_argument("--server", default=ServerConfig.base_url, help="URL server; nhiều server phân cách bằng dấu phẩy để cân bằng tải/failover (mặc định: %(default)s)")
+    parser.add_argument("--compress", choices=SUPPORTED_ENCODINGS,
+                        help="Nén body gửi job (server không hỗ trợ thì tự gửi lại không nén)")
+    parser.add_argument("-u", "--username", help="Username (hoặc SUBPHIM_USERNAME)")
+    parser.add_argument("-p", "--password", help="Password (hoặc SUBPHIM_PASSWORD)")
+    parser.add_argument("--no-token-cache", action="store_true",
+                        help="Không dùng lại/lưu token đăng nhập (mặc định token được lưu ở ~/.quicktranslate/tokens.json)")
+    parser.add_argument("-j", "--concurrency", type=int, default=4, help="Số job dịch chạy song song (mặc định: %(default)s)")
+    parser.add_argument("--max-sessions", type=int, default=SchedulerPolicy.max_sessions,
+                        help="Số session chạy trên server cùng lúc, tính cả shard (mặc định: %(default)s)")
+    parser.add_argument("--submit-rate", type=float, default=SchedulerPolicy.submit_rate,
+                        help="Số session gửi tối đa mỗi giây, 0 = không giới hạn (mặc định: %(default)s)")
+    parser.add_argument("--submit-burst", type=int, default=SchedulerPolicy.submit_burst,
+                        help="Số session được gửi dồn một lúc (mặc định: %(default)s)")
+    parser.add_argument("--wait-quota", action="store_true",
+                        help="Hết lượt dịch thì chờ tới lúc reset (0h giờ VN) thay vì hoãn các file còn lại")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Tìm file .srt trong cả thư mục con")
+    parser.add_argument("--skip-existing", action="store_true", help="Bỏ qua file đã có bản dịch trong 'Đã dịch'")
+    parser.add_argument("--format", choices=("srt", "vtt"), default="srt", help="Định dạng file kết quả (mặc định: %(default)s)")
+    parser.add_argument("--progressive", action="store_true",
+                        help="Tải dần các dòng đã dịch trong lúc job chạy và ghi file xem trước <tên>_vi.preview.<đuôi>")
+    parser.add_argument("--prompt", help="Prompt dịch")
+    parser.add_argument("--prompt-file", help="Đọc prompt từ file")
+    parser.add_argument("--instruction", help="System instruction")
+    parser.add_argument("--instruction-file", help="Đọc system instruction từ file")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model AI (mặc định: %(default)s)")
+    parser.add_argument("--cache", nargs="?", const="", metavar="PATH",
+                        help="Dùng cache bản dịch SQLite (mặc định ~/.quicktranslate/translation_cache.db)")
+    parser.add_argument("--cache-max-entries", type=int, default=500_000, help="Số dòng tối đa giữ trong cache (LRU)")
+    parser.add_argument("--shard-lines", type=int, help="Chia file lớn thành shard tối đa N dòng, mỗi shard một session")
+    parser.add_argument("--shard-bytes", type=int, help="Giới hạn kích thước (byte) mỗi shard")
+    parser.add_argument("--shard-concurrency", type=int, default=ShardPolicy.concurrency,
+                        help="Số shard của một file chạy song song (mặc định: %(default)s)")
+    parser.add_argument("--prefilter", nargs="?", const="all", metavar="RULES",
+                        help=f"Giữ nguyên dòng không cần dịch và gộp dòng trùng; RULES: all hoặc một số trong "
+                             f"{','.join(PREFILTER_RULES)} (mặc định khi bật: all)")
+    parser.add_argument("--recovery-rounds", type=int, default=2,
+                        help="Số lần gửi lại các dòng bị thiếu trong kết quả (mặc định: %(default)s)")
+    parser.add_argument("--journal", metavar="PATH", help="File journal (mặc định ~/.quicktranslate/journal.json)")
+    parser.add_argument("--no-journal", action="store_true", help="Không ghi journal (không resume được khi bị ngắt)")
+    parser.add_argument("--resume", action="store_true", help="Tiếp tục các job dở dang trong journal")
+    parser.add_argument("--metrics-jsonl", metavar="PATH", help="Ghi số liệu từng job (thời gian từng pha, request, byte) vào file JSON-lines")
+    parser.add_argument("--metrics-prom", metavar="PATH", help="Ghi số liệu tổng hợp dạng text Prometheus vào file (cập nhật sau mỗi job)")
+    parser.add_argument("--callback-port", type=int, help="Bật callback receiver trên port này thay vì polling liên tục")
+    parser.add_argument("--callback-host", default="0.0.0.0", help="Địa chỉ bind của callback receiver (mặc định: %(default)s)")
+    parser.add_argument("--callback-url", help="URL công khai mà server gọi tới để đến callback receiver (vd. http://1.2.3.4:8765)")
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    """Entry point: có file/thư mục đầu vào thì chạy batch không GUI, ngược lại mở GUI"""
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    args = build_arg_parser().parse_args(argv)
+    if args.inputs or args.resume:
+        sys.exit(run_cli(args))
+
+    from .gui import run_gui
+    run_gui()
@@ -0,0 +1,86 @@
+"""
+Lưu token đăng nhập trên đĩa để các lần chạy sau (batch, headless, mở lại GUI) dùng
+lại ngay thay vì đăng nhập lại mỗi tiến trình. Chỉ lưu token và hạn dùng, không bao
+giờ lưu mật khẩu; file chỉ chủ sở hữu đọc/ghi được (0600).
+"""
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+from .api import UserSession
+from .journal import atomic_write_json
+from .paths import app_data_dir
+
+logger = logging.getLogger(__name__)
+
+TOKEN_FILE = "tokens.json"
+
+def _entry_key(base_url: str, username: str) -> str:
+    return f"{username}@{base_url.rstrip('/')}"
+
+class TokenStore:
+    """Token theo server + username, dùng chung cho mọi AuthService / endpoint trong tiến trình"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(app_data_dir(), TOKEN_FILE)
+        self._lock = threading.Lock()
+
+    def load(self, base_url: str, username: Optional[str] = None) -> Optional[UserSession]:
+        """Phiên còn hạn đã lưu cho server (username None: phiên đăng nhập gần nhất)"""
+        base_url = base_url.rstrip('/')
+        with self._lock:
+            entries = self._read()
+        matches = sorted((entry for entry in entries.values()
+                          if entry.get('base_url') == base_url and username in (None, entry.get('username'))),
+                         key=lambda entry: entry.get('saved_at', 0), reverse=True)
+        for entry in matches:
+            session = UserSession(token=entry.get('token'), user_id=entry.get('user_id'),
+                                  username=entry.get('username'), expires_at=entry.get('expires_at'))
+            if session.token and not session.is_expired():
+                return session
+        return None
+
+    def save(self, base_url: str, session: UserSession):
+        """Lưu token vừa đăng nhập (và bỏ các token đã hết hạn)"""
+        with self._lock:
+            entries = {key: entry for key, entry in self._read().items()
+                       if not UserSession(entry.get('token'), entry.get('user_id'), entry.get('username'),
+                                          entry.get('expires_at')).is_expired(margin=0)}
+            entries[_entry_key(base_url, session.username)] = {
+                'base_url': base_url.rstrip('/'),
+                'username': session.username,
+                'user_id': session.user_id,
+                'token': session.token,
+                'expires_at': session.expires_at,
+                'saved_at': time.time(),
+            }
+            self._write(entries)
+
+    def remove(self, base_url: str, username: str):
+        """Bỏ token bị server từ chối để lần chạy sau đăng nhập lại"""
+        with self._lock:
+            entries = self._read()
+            if entries.pop(_entry_key(base_url, username), None) is not None:
+                self._write(entries)
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Không đọc được file token {self.path}: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, entries: Dict[str, Dict]):
+        # mkstemp của atomic_write_json tạo file 0600; chmod lại phòng umask/hệ thống khác
+        try:
+            atomic_write_json(self.path, entries)
+            os.chmod(self.path, 0o600)
+        except OSError as e:
+            logger.warning(f"Không lưu được token vào {self.path}: {e}")
@@ -0,0 +1,56 @@
+"""
+Phân loại thông báo lỗi khi gửi job (chuỗi trả về từ start_translation_job),
+để quyết định chuyển sang endpoint khác, chờ rồi thử lại hay dừng hẳn.
+"""
+import re
+from typing import Dict
+
+NO_SERVER_ERROR = "Không có server dịch nào khả dụng"
+NO_API_KEY_ERROR = "Không có API key nào khả dụng"
+QUOTA_ERROR = "hết lượt dịch"
+CANCELLED_ERROR = "Đã hủy bởi người dùng"    # error của job đã bị hủy qua /cancel
+JOB_NOT_FOUND_ERROR = "Không tìm thấy job"   # /status, /results, /cancel trả 404
+UNCONFIRMED_ERROR = "Không rõ server đã nhận job chưa"   # request gửi job có thể đã tới server
+
+# Status 'failed' do client tự tạo khi không hỏi được server (không phải trạng thái thật của job)
+_UNAVAILABLE_PREFIXES = ("Lỗi kết nối", "Lỗi HTTP", "Response không hợp lệ")
+
+# Loại lỗi
+ERROR_NO_SERVER = "no_server"        # server hết worker dịch, thử lại sau / endpoint khác
+ERROR_NO_API_KEY = "no_api_key"      # mọi key đang cooldown
+ERROR_QUOTA = "quota"                # hết lượt trong ngày, thử lại vô ích
+ERROR_CONNECTION = "connection"      # không kết nối được (request chưa tới server)
+ERROR_UNCONFIRMED = "unconfirmed"    # lỗi sau khi đã gửi request: gửi lại có thể bị tính lượt hai lần
+ERROR_SERVER = "server_error"        # 5xx
+ERROR_REJECTED = "rejected"          # request bị từ chối (4xx khác)
+
+# Lỗi do endpoint tạm thời không phục vụ được: chuyển endpoint / thử lại sau
+TRANSIENT_ERRORS = frozenset({ERROR_NO_SERVER, ERROR_NO_API_KEY, ERROR_CONNECTION, ERROR_SERVER})
+
+_STATUS_RE = re.compile(r"Lỗi (\d{3})\b")
+
+def classify_error(message: str) -> str:
+    """Phân loại thông báo lỗi dạng 'Lỗi <code>: <body>' / 'Lỗi kết nối: ...'"""
+    message = message or ""
+    if NO_SERVER_ERROR in message:
+        return ERROR_NO_SERVER
+    if NO_API_KEY_ERROR in message:
+        return ERROR_NO_API_KEY
+    if QUOTA_ERROR in message:
+        return ERROR_QUOTA
+    if UNCONFIRMED_ERROR in message:
+        return ERROR_UNCONFIRMED
+    if "Lỗi kết nối" in message:
+        return ERROR_CONNECTION
+    match = _STATUS_RE.search(message)
+    if match and match.group(1).startswith("5"):
+        return ERROR_SERVER
+    return ERROR_REJECTED
+
+def is_status_unavailable(status: Dict) -> bool:
+    """True nếu poll_status/get_results thất bại vì mất kết nối, 5xx, 401... chứ server chưa trả lời về job"""
+    return str(status.get("error") or "").startswith(_UNAVAILABLE_PREFIXES)
+
+def is_job_not_found(status: Dict) -> bool:
+    """True nếu server trả lời job không tồn tại (404)"""
+    return str(status.get("error") or "").startswith(JOB_NOT_FOUND_ERROR)
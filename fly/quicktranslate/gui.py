@@ -0,0 +1,437 @@
+"""
+Giao diện tkinter của QuickTranslate Client.
+"""
+import os
+import logging
+import threading
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, scrolledtext
+from typing import Optional
+
+from .api import ServerConfig, AuthService, SubtitleApiService
+from .balancer import LoadBalancedApiService
+from .cache import TranslationCache
+from .credentials import TokenStore
+from .journal import JobJournal
+from .jobs import DEFAULT_PROMPT, DEFAULT_SYSTEM_INSTRUCTION, run_translation_job
+from .logpump import LogPump
+from .prefilter import PrefilterPolicy
+from .scheduler import JobScheduler, QuotaDeferred, PRIORITY_RESUME
+
+logger = logging.getLogger(__name__)
+
+class TranslationApp:
+    """Ứng dụng GUI dịch SRT"""
+    
+    LOG_TICK_MS = 100
+
+    def __init__(self, root: tk.Tk, log_max_lines: int = 2000, status_log_interval: float = 2.0):
+        self.root = root
+        self.root.title("QuickTranslate Client")
+        self.root.geometry("900x750")
+        self.root.minsize(800, 650)
+        
+        self.config = ServerConfig()
+        self.token_store = TokenStore()
+        self.auth = AuthService(self.config, token_store=self.token_store)
+        self.translator: Optional[SubtitleApiService] = None
+        self.cache: Optional[TranslationCache] = None
+        self.journal = JobJournal()
+        # Dùng chung cho mọi job: giới hạn tốc độ gửi, chờ khi server bận / hết lượt dịch
+        self.scheduler = JobScheduler()
+        
+        self.is_translating = False
+        self.stop_requested = False
+        # Log: gom theo nhịp LOG_TICK_MS, widget chỉ giữ log_max_lines dòng gần nhất
+        self.log_pump = LogPump(status_interval=status_log_interval)
+        self.log_max_lines = log_max_lines
+        
+        self._create_ui()
+        self._update_log()
+        self._restore_session()
+    
+    def _create_ui(self):
+        """Tạo giao diện người dùng"""
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky="nsew")
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        
+        # === Server & Auth ===
+        server_frame = ttk.LabelFrame(main_frame, text="1. Cấu hình & Đăng nhập", padding="5")
+        server_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
+        server_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(server_frame, text="Server URL:").grid(row=0, column=0, sticky="w", padx=5)
+        self.server_url_entry = ttk.Entry(server_frame, width=60)
+        self.server_url_entry.grid(row=0, column=1, sticky="ew", padx=5)
+        self.server_url_entry.insert(0, "http://localhost:5000")
+        
+        auth_subframe = ttk.Frame(server_frame)
+        auth_subframe.grid(row=1, column=0, columnspan=2, sticky='ew', pady=5)
+        ttk.Label(auth_subframe, text="Username:").pack(side="left", padx=(5,2))
+        self.username_entry = ttk.Entry(auth_subframe, width=20)
+        self.username_entry.pack(side="left", padx=(0,10))
+        
+        ttk.Label(auth_subframe, text="Password:").pack(side="left", padx=(5,2))
+        self.password_entry = ttk.Entry(auth_subframe, width=20, show="*")
+        self.password_entry.pack(side="left", padx=(0,10))
+        
+        ttk.Button(auth_subframe, text="Đăng nhập", command=self._login).pack(side="left", padx=5)
+        ttk.Button(auth_subframe, text="Đăng ký", command=self._register_popup).pack(side="left", padx=5)
+        
+        self.auth_status_label = ttk.Label(server_frame, text="Chưa đăng nhập", foreground="red")
+        self.auth_status_label.grid(row=2, column=0, columnspan=2, pady=5)
+        
+        # === Translation Settings ===
+        settings_frame = ttk.LabelFrame(main_frame, text="2. Cài đặt dịch", padding="5")
+        settings_frame.grid(row=1, column=0, sticky="ew", pady=(0, 10))
+        settings_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(settings_frame, text="Prompt:").grid(row=0, column=0, sticky="nw", padx=5)
+        self.prompt_text = scrolledtext.ScrolledText(settings_frame, width=70, height=4)
+        self.prompt_text.grid(row=0, column=1, sticky="ew", padx=5, pady=5)
+        self.prompt_text.insert("1.0", DEFAULT_PROMPT)
+        
+        ttk.Label(settings_frame, text="System Instruction:").grid(row=1, column=0, sticky="nw", padx=5)
+        self.instruction_text = scrolledtext.ScrolledText(settings_frame, width=70, height=4)
+        self.instruction_text.grid(row=1, column=1, sticky="ew", padx=5, pady=5)
+        self.instruction_text.insert("1.0", DEFAULT_SYSTEM_INSTRUCTION)
+
+        self.use_cache_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(settings_frame, text="Dùng cache bản dịch (không gửi lại các dòng đã dịch)",
+                        variable=self.use_cache_var).grid(row=2, column=1, sticky="w", padx=5)
+        self.prefilter_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Giữ nguyên dòng không cần dịch (♪, số, [hiệu ứng]) và gộp dòng trùng",
+                        variable=self.prefilter_var).grid(row=3, column=1, sticky="w", padx=5)
+        self.progressive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(settings_frame, text="Xem trước: tải dần các dòng đã dịch và ghi file .preview trong lúc chờ",
+                        variable=self.progressive_var).grid(row=4, column=1, sticky="w", padx=5)
+        
+        # === File Selection ===
+        file_frame = ttk.LabelFrame(main_frame, text="3. Chọn file", padding="5")
+        file_frame.grid(row=2, column=0, sticky="ew", pady=(0, 10))
+        file_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(file_frame, text="File SRT cần dịch:").grid(row=0, column=0, sticky="w", padx=5)
+        self.file_entry = ttk.Entry(file_frame, width=60)
+        self.file_entry.grid(row=0, column=1, sticky="ew", padx=5)
+        ttk.Button(file_frame, text="Chọn File...", command=self._select_srt_file).grid(row=0, column=2, padx=5)
+        
+        # === Action & Progress ===
+        action_frame = ttk.LabelFrame(main_frame, text="4. Thực thi", padding="10")
+        action_frame.grid(row=3, column=0, sticky="ew", pady=(0, 10))
+        action_frame.columnconfigure(1, weight=1)
+
+        self.start_btn = ttk.Button(action_frame, text="🚀 Bắt đầu dịch", command=self._start_translation, style="Accent.TButton")
+        self.start_btn.grid(row=0, column=0, padx=5, pady=5)
+        
+        self.stop_btn = ttk.Button(action_frame, text="⏹ Dừng", command=self._stop_translation, state="disabled")
+        self.stop_btn.grid(row=1, column=0, padx=5, pady=5)
+
+        self.progress_bar = ttk.Progressbar(action_frame, variable=tk.DoubleVar(value=0), maximum=100)
+        self.progress_bar.grid(row=0, column=1, sticky="ew", padx=10, pady=5)
+        
+        self.progress_label = ttk.Label(action_frame, text="Sẵn sàng")
+        self.progress_label.grid(row=1, column=1, sticky="ew", padx=10, pady=5)
+        
+        # === Log ===
+        log_frame = ttk.LabelFrame(main_frame, text="Log", padding="5")
+        log_frame.grid(row=4, column=0, sticky="nsew", pady=(0, 10))
+        log_frame.columnconfigure(0, weight=1)
+        log_frame.rowconfigure(0, weight=1)
+        main_frame.rowconfigure(4, weight=1)
+        
+        self.log_text = scrolledtext.ScrolledText(log_frame, height=10, state="disabled")
+        self.log_text.grid(row=0, column=0, sticky="nsew")
+        ttk.Button(log_frame, text="Xóa Log", command=self._clear_log).grid(row=1, column=0, sticky="e", pady=5)
+
+        style = ttk.Style()
+        style.configure("Accent.TButton", font=("Segoe UI", 10, "bold"), padding=10)
+
+    def _update_server_url(self):
+        urls = [url.strip().rstrip('/') for url in self.server_url_entry.get().split(',') if url.strip()]
+        if not urls or urls == self.config.all_endpoints:
+            # Cùng server: giữ AuthService (phiên đăng nhập, pool kết nối)
+            return
+        self.config.base_url, self.config.endpoints = urls[0], urls[1:]
+        if self.config.endpoints:
+            self.auth = LoadBalancedApiService(self.config, token_store=self.token_store)
+        else:
+            self.auth = AuthService(self.config, token_store=self.token_store)
+        self.auth.restore_session()
+        self.translator = None if not self.auth.is_authenticated() else self._create_translator()
+        self._log(f"Server URL đã cập nhật: {', '.join(self.config.all_endpoints)}")
+
+    def _restore_session(self):
+        """Dùng lại token còn hạn đã lưu từ lần trước: vào thẳng trạng thái đã đăng nhập"""
+        self.auth.restore_session()
+        if not self.auth.is_authenticated():
+            return
+        username = self.auth.session.username
+        self.translator = self._create_translator()
+        self.username_entry.insert(0, username)
+        self.auth_status_label.config(text=f"Đã đăng nhập: {username} (phiên đã lưu)", foreground="green")
+        self._log(f"Dùng lại phiên đăng nhập đã lưu của {username}.")
+        self._offer_resume()
+
+    def _create_translator(self):
+        if isinstance(self.auth, LoadBalancedApiService):
+            return self.auth
+        return SubtitleApiService(self.config, self.auth)
+            
+    def _login(self):
+        username = self.username_entry.get().strip()
+        password = self.password_entry.get()
+        if not username or not password:
+            messagebox.showerror("Lỗi", "Vui lòng nhập username và password")
+            return
+        
+        self._update_server_url()
+        success, message = self.auth.login(username, password)
+        
+        if success:
+            self.translator = self._create_translator()
+            self.auth_status_label.config(text=f"Đã đăng nhập: {self.auth.session.username}", foreground="green")
+            self._log(message)
+            self._offer_resume()
+        else:
+            messagebox.showerror("Lỗi đăng nhập", message)
+            self._log(f"Lỗi đăng nhập: {message}")
+    
+    def _offer_resume(self):
+        """Sau khi đăng nhập: nếu journal còn job dở dang thì hỏi có tiếp tục không"""
+        if self.is_translating:
+            return
+        # resumable_jobs() hash lại mọi file đầu vào: chạy ngoài thread giao diện
+        threading.Thread(target=self._find_resumable_jobs, daemon=True, name="JournalScan").start()
+
+    def _find_resumable_jobs(self):
+        try:
+            jobs = self.journal.resumable_jobs()
+        except Exception as e:
+            logger.error(f"Lỗi khi đọc journal: {e}", exc_info=True)
+            return
+        if jobs:
+            self.root.after(0, lambda: self._confirm_resume(jobs))
+
+    def _confirm_resume(self, jobs):
+        if self.is_translating:
+            return
+        names = "\n".join(f"- {os.path.basename(job['input_path'])}" for _, job in jobs[:10])
+        if not messagebox.askyesno("Job dở dang", f"Có {len(jobs)} job chưa hoàn thành từ lần chạy trước:\n{names}\n\nTiếp tục các job này?"):
+            return
+        self._set_translating()
+        threading.Thread(target=self._resume_worker,
+                         args=([job for _, job in jobs], self.use_cache_var.get(), self._prefilter_policy(),
+                               self.progressive_var.get()),
+                         daemon=True, name="TranslationWorker").start()
+
+    def _prefilter_policy(self) -> Optional[PrefilterPolicy]:
+        return PrefilterPolicy() if self.prefilter_var.get() else None
+
+    def _resume_worker(self, jobs, use_cache: bool, prefilter: Optional[PrefilterPolicy], progressive: bool):
+        done = 0
+        try:
+            if use_cache and self.cache is None:
+                self.cache = TranslationCache()
+            for job in jobs:
+                if self.stop_requested:
+                    break
+                try:
+                    result = run_translation_job(
+                        self.translator, job["input_path"], job["prompt"], job["system_instruction"],
+                        log=self._log,
+                        on_progress=self._set_progress,
+                        should_stop=lambda: self.stop_requested,
+                        cache=self.cache if use_cache else None,
+                        model=job["model"],
+                        journal=self.journal,
+                        prefilter=prefilter,
+                        scheduler=self.scheduler,
+                        priority=PRIORITY_RESUME,
+                        progressive=progressive,
+                    )
+                except QuotaDeferred as e:
+                    self._log(f"⏸ {e}")
+                    break
+                except Exception as e:
+                    logger.error(f"Lỗi khi tiếp tục job {job['input_path']}: {e}", exc_info=True)
+                    self._log(f"❌ LỖI ({os.path.basename(job['input_path'])}): {e}")
+                    continue
+                if result is not None:
+                    done += 1
+                    self._log(f"🎉 Đã tiếp tục xong: {result.output_path}")
+            self._log(f"Đã hoàn thành {done}/{len(jobs)} job dở dang.")
+        finally:
+            self.root.after(0, self._translation_completed)
+
+    def _register_popup(self):
+        reg_win = tk.Toplevel(self.root)
+        reg_win.title("Đăng ký tài khoản mới")
+        reg_win.geometry("350x200")
+        reg_win.transient(self.root)
+        reg_win.grab_set()
+
+        frame = ttk.Frame(reg_win, padding=10)
+        frame.pack(expand=True, fill="both")
+        
+        ttk.Label(frame, text="Username:").grid(row=0, column=0, sticky='w', pady=2)
+        reg_user = ttk.Entry(frame)
+        reg_user.grid(row=0, column=1, sticky='ew', pady=2)
+
+        ttk.Label(frame, text="Password:").grid(row=1, column=0, sticky='w', pady=2)
+        reg_pass = ttk.Entry(frame, show="*")
+        reg_pass.grid(row=1, column=1, sticky='ew', pady=2)
+
+        ttk.Label(frame, text="Email:").grid(row=2, column=0, sticky='w', pady=2)
+        reg_email = ttk.Entry(frame)
+        reg_email.grid(row=2, column=1, sticky='ew', pady=2)
+
+        def do_register():
+            u, p, e = reg_user.get().strip(), reg_pass.get(), reg_email.get().strip()
+            if not all([u, p, e]):
+                messagebox.showerror("Lỗi", "Vui lòng nhập đủ thông tin.", parent=reg_win)
+                return
+            
+            self._update_server_url()
+            success, message = self.auth.register(u, p, e)
+            if success:
+                messagebox.showinfo("Thành công", message, parent=reg_win)
+                self._log(f"Đăng ký thành công cho user '{u}'.")
+                reg_win.destroy()
+            else:
+                messagebox.showerror("Lỗi", message, parent=reg_win)
+                self._log(f"Lỗi đăng ký: {message}")
+
+        ttk.Button(frame, text="Đăng ký", command=do_register).grid(row=3, columnspan=2, pady=10)
+
+    def _select_srt_file(self):
+        filepath = filedialog.askopenfilename(
+            title="Chọn file .SRT",
+            filetypes=[("SRT files", "*.srt"), ("All files", "*.*")]
+        )
+        if filepath:
+            self.file_entry.delete(0, tk.END)
+            self.file_entry.insert(0, filepath)
+            self._log(f"Đã chọn file: {os.path.basename(filepath)}")
+    
+    def _log(self, message: str):
+        self.log_pump.put(message)
+    
+    def _update_log(self):
+        lines = self.log_pump.drain()
+        if lines:
+            self.log_text.config(state="normal")
+            self.log_text.insert(tk.END, "\n".join(lines[-self.log_max_lines:]) + "\n")
+            # Widget chứa log_max_lines dòng + một dòng trống cuối
+            excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - self.log_max_lines
+            if excess > 0:
+                self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_text.see(tk.END)
+            self.log_text.config(state="disabled")
+        self.root.after(self.LOG_TICK_MS, self._update_log)
+    
+    def _clear_log(self):
+        self.log_text.config(state="normal")
+        self.log_text.delete("1.0", tk.END)
+        self.log_text.config(state="disabled")
+
+    def _start_translation(self):
+        if not self.auth.is_authenticated() or self.translator is None:
+            messagebox.showerror("Lỗi", "Vui lòng đăng nhập trước")
+            return
+        
+        filepath = self.file_entry.get().strip()
+        if not filepath or not os.path.isfile(filepath):
+            messagebox.showerror("Lỗi", "Vui lòng chọn một file SRT hợp lệ")
+            return
+        
+        prompt = self.prompt_text.get("1.0", tk.END).strip()
+        instruction = self.instruction_text.get("1.0", tk.END).strip()
+        
+        if not prompt or not instruction:
+            messagebox.showerror("Lỗi", "Vui lòng nhập Prompt và System Instruction")
+            return
+        
+        self._set_translating()
+        
+        thread = threading.Thread(
+            target=self._translation_worker,
+            args=(filepath, prompt, instruction, self.use_cache_var.get(), self._prefilter_policy(),
+                  self.progressive_var.get()),
+            daemon=True,
+            name="TranslationWorker"
+        )
+        thread.start()
+    
+    def _set_translating(self):
+        self.is_translating = True
+        self.stop_requested = False
+        self.start_btn.config(state="disabled")
+        self.stop_btn.config(state="normal")
+        self.progress_bar['value'] = 0
+
+    def _translation_worker(self, filepath: str, prompt: str, instruction: str, use_cache: bool,
+                            prefilter: Optional[PrefilterPolicy], progressive: bool):
+        try:
+            if use_cache and self.cache is None:
+                self.cache = TranslationCache()
+            result = run_translation_job(
+                self.translator, filepath, prompt, instruction,
+                log=self._log,
+                on_progress=self._set_progress,
+                should_stop=lambda: self.stop_requested,
+                cache=self.cache if use_cache else None,
+                journal=self.journal,
+                prefilter=prefilter,
+                scheduler=self.scheduler,
+                progressive=progressive,
+            )
+            if result is None:
+                self._log("Người dùng đã yêu cầu dừng.")
+                return
+
+            self._log("🎉 Dịch thành công!")
+            self._log(f"File kết quả đã được lưu tại: {result.output_path}")
+            self.root.after(0, lambda: messagebox.showinfo("Hoàn thành", f"Đã dịch xong!\nFile đã được lưu tại:\n{result.output_path}"))
+
+        except Exception as e:
+            logger.error(f"Lỗi trong quá trình dịch: {e}", exc_info=True)
+            self._log(f"❌ LỖI: {e}")
+            self.root.after(0, lambda: messagebox.showerror("Lỗi", str(e)))
+        finally:
+            self.root.after(0, self._translation_completed)
+
+    def _set_progress(self, progress: float, status_text: str):
+        self.root.after(0, lambda: self.progress_bar.config(value=progress))
+        self.root.after(0, lambda: self.progress_label.config(text=status_text))
+            
+    def _stop_translation(self):
+        """
+        Dừng quá trình dịch: worker bỏ ngay request đang chờ và hủy session trên server
+        (xem run_translation_job), session bị hủy được ghi vào journal.
+        """
+        if self.is_translating:
+            self.stop_requested = True
+            self._log("...Đang dừng và hủy job trên server...")
+            self.stop_btn.config(state="disabled")
+    
+    def _translation_completed(self):
+        """Được gọi khi dịch xong hoặc bị lỗi/dừng"""
+        self.is_translating = False
+        self.start_btn.config(state="normal")
+        self.stop_btn.config(state="disabled")
+        self.progress_label.config(text="Sẵn sàng")
+
+
+def run_gui():
+    """Mở cửa sổ GUI và chạy main loop của Tk"""
+    try:
+        root = tk.Tk()
+        app = TranslationApp(root)
+        root.mainloop()
+    except Exception as e:
+        logging.critical(f"Unhandled exception in main loop: {e}", exc_info=True)
+        messagebox.showerror("Lỗi nghiêm trọng", f"Ứng dụng gặp lỗi không xác định:\n{e}")
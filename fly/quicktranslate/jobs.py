@@ -0,0 +1,721 @@
+"""
+Luồng dịch một file SRT, dùng chung cho GUI và chế độ dòng lệnh.
+"""
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from typing import Optional, Dict, List, Callable, Tuple, TypeVar
+
+from .api import SubtitleApiService, DEFAULT_MODEL
+from .cache import TranslationCache, make_cache_key
+from .callbacks import CallbackReceiver
+from .errors import CANCELLED_ERROR, ERROR_UNCONFIRMED, classify_error, is_status_unavailable
+from .journal import JobJournal, SESSION_CANCELLED, SESSION_DONE, SESSION_FAILED, file_sha256, make_job_key
+from .metrics import JobMetrics, MetricsHook, bind_job_metrics
+from .payload import format_size
+from .polling import AdaptivePoller, format_eta
+from .prefilter import PrefilterPlan, PrefilterPolicy, prefilter_lines
+from .scheduler import JobScheduler, QuotaDeferred, PRIORITY_NORMAL
+from .sharding import ShardPolicy, plan_shards
+from .srt import SrtEntry, parse_srt_file, write_subtitles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT = "Dịch phụ đề sau sang tiếng Việt.\nGiữ nguyên format: index|text đã dịch\nChỉ trả về kết quả dịch, không giải thích."
+DEFAULT_SYSTEM_INSTRUCTION = "Bạn là dịch giả phụ đề phim chuyên nghiệp.\n- Dịch tự nhiên, phù hợp ngữ cảnh\n- Giữ nguyên tên riêng phổ biến\n- Không thêm bớt ý nghĩa"
+OUTPUT_FOLDER_NAME = "Đã dịch"
+
+# Nhịp kiểm tra yêu cầu dừng khi đang chờ một request HTTP
+STOP_CHECK_INTERVAL = 0.1
+# Số lần hỏi trạng thái session cũ khi resume trước khi bỏ cuộc (server không trả lời được)
+REATTACH_POLL_ATTEMPTS = 3
+# Số lần poll liên tiếp không hỏi được server (mất kết nối, 5xx, 401) trước khi bỏ cuộc
+MAX_UNAVAILABLE_POLLS = 10
+
+T = TypeVar("T")
+
+class SessionFailed(Exception):
+    """Server báo session thất bại (mọi batch lỗi); `received` là các dòng đã nhận trước đó"""
+
+    def __init__(self, message: str, received: Dict[int, str]):
+        super().__init__(message)
+        self.received = received
+
+@dataclass
+class JobResult:
+    """Kết quả của một job dịch file"""
+    input_path: str
+    output_path: str
+    total_lines: int
+    elapsed: float
+    cache_hits: int = 0
+
+def get_output_path(filepath: str, output_format: Optional[str] = None) -> str:
+    """
+    Đường dẫn file kết quả: <thư mục file>/Đã dịch/<tên>_vi<đuôi>.
+    Có output_format (vd. 'vtt') thì đuôi file theo định dạng đó.
+    """
+    base_dir = os.path.dirname(filepath)
+    name, ext = os.path.splitext(os.path.basename(filepath))
+    if output_format:
+        ext = f".{output_format}"
+    return os.path.join(base_dir, OUTPUT_FOLDER_NAME, f"{name}_vi{ext}")
+
+def run_translation_job(translator: SubtitleApiService, filepath: str, prompt: str, instruction: str,
+                        log: Callable[[str], None] = logger.info,
+                        on_progress: Optional[Callable[[float, str], None]] = None,
+                        should_stop: Callable[[], bool] = lambda: False,
+                        callback_receiver: Optional[CallbackReceiver] = None,
+                        cache: Optional[TranslationCache] = None,
+                        model: str = DEFAULT_MODEL,
+                        sharding: Optional[ShardPolicy] = None,
+                        recovery_rounds: int = 2,
+                        journal: Optional[JobJournal] = None,
+                        metrics_hook: Optional[MetricsHook] = None,
+                        output_format: str = "srt",
+                        prefilter: Optional[PrefilterPolicy] = None,
+                        scheduler: Optional[JobScheduler] = None,
+                        priority: int = PRIORITY_NORMAL,
+                        progressive: bool = False) -> Optional[JobResult]:
+    """
+    Dịch trọn vẹn một file SRT: phân tích, gửi job, polling, lấy kết quả và ghi file.
+    Có callback_receiver thì chờ webhook hoàn thành, polling chỉ còn là lưới an toàn.
+    Có cache thì các dòng đã dịch trước đó (cùng prompt/instruction/model) được điền
+    sẵn, chỉ gửi các dòng chưa có lên server.
+    Có sharding thì file lớn được chia thành nhiều session gửi song song.
+    Dòng bị thiếu trong kết quả được gửi lại tối đa `recovery_rounds` lần.
+    Có journal thì mỗi session được ghi lại, lần chạy sau với cùng file/cấu hình
+    sẽ gắn lại vào session còn dở thay vì gửi lại; cách chia dòng (shard, cache hit, lọc trước)
+    được dựng lại từ journal chứ không tính lại theo tham số của lần chạy này.
+    Có metrics_hook thì khi job kết thúc (kể cả lỗi/dừng), hook nhận một bản ghi
+    thời gian từng pha và số request/byte/poll/retry (xem quicktranslate.metrics).
+    File kết quả được ghi streaming qua file tạm rồi rename (output_format 'srt' hoặc 'vtt').
+    Có prefilter thì dòng không cần dịch (♪, số, [hiệu ứng], chỉ có tag) được giữ nguyên
+    và dòng trùng nội dung chỉ gửi một lần.
+    Có scheduler (dùng chung cho cả batch) thì mỗi session chờ tới lượt theo `priority`,
+    tốc độ gửi và số session đồng thời; lỗi hết server/API key được chờ rồi gửi lại,
+    hết lượt dịch thì raise QuotaDeferred (job vẫn nằm trong journal để resume).
+    Có progressive thì khi job đang chạy, các dòng đã dịch xong được tải dần (chỉ dòng mới)
+    và ghi vào file xem trước <tên>_vi.preview.<đuôi> (dòng chưa dịch giữ bản gốc); lần tải
+    cuối chỉ còn các dòng chưa nhận. File xem trước bị xóa khi ghi xong file kết quả.
+    should_stop có hiệu lực ngay cả khi đang gửi/tải dở (request bị bỏ lại chạy nốt ở nền);
+    session đang chạy được hủy trên server (trả lại server dịch và lượt dịch chưa dùng) và
+    ghi vào journal là 'cancelled'. Session đã xong trên server thì giữ lại để resume.
+    Returns: JobResult, hoặc None nếu bị dừng giữa chừng. Lỗi được raise ra ngoài.
+    """
+    metrics = JobMetrics(filepath)
+    with bind_job_metrics(metrics):
+        try:
+            result = _run_job(translator, filepath, prompt, instruction, log, on_progress or (lambda progress, text: None),
+                              should_stop, callback_receiver, cache, model, sharding, recovery_rounds, journal, metrics,
+                              output_format, prefilter, scheduler, priority, progressive)
+        except Exception as e:
+            if metrics_hook:
+                outcome = "deferred" if isinstance(e, QuotaDeferred) else "failed"
+                metrics_hook(metrics.to_record(outcome, error=str(e)))
+            raise
+    if metrics_hook:
+        if result is None:
+            metrics_hook(metrics.to_record("stopped"))
+        else:
+            metrics_hook(metrics.to_record("completed", result.total_lines, result.cache_hits))
+    return result
+
+def _run_job(translator: SubtitleApiService, filepath: str, prompt: str, instruction: str,
+             log: Callable[[str], None], report: Callable[[float, str], None], should_stop: Callable[[], bool],
+             callback_receiver: Optional[CallbackReceiver], cache: Optional[TranslationCache], model: str,
+             sharding: Optional[ShardPolicy], recovery_rounds: int, journal: Optional[JobJournal],
+             metrics: JobMetrics, output_format: str, prefilter: Optional[PrefilterPolicy],
+             scheduler: Optional[JobScheduler], priority: int, progressive: bool) -> Optional[JobResult]:
+    started = time.monotonic()
+
+    # 1. Đọc và phân tích file SRT
+    log(f"Đang đọc file: {os.path.basename(filepath)}")
+    with metrics.span("parse"):
+        original_entries = list(parse_srt_file(filepath))
+    if not original_entries:
+        raise ValueError("File SRT rỗng hoặc không hợp lệ.")
+
+    # Chuyển đổi sang định dạng mà API yêu cầu
+    srt_lines_for_api = [{"index": entry.index, "text": entry.text} for entry in original_entries]
+    log(f"Đã phân tích được {len(srt_lines_for_api)} dòng phụ đề.")
+
+    job_key = None
+    layout = None
+    if journal is not None:
+        file_hash = file_sha256(filepath)
+        job_key = make_job_key(file_hash, prompt, instruction, model)
+        journal.begin_job(job_key, filepath, file_hash, prompt, instruction, model)
+        layout = journal.get_layout(job_key)
+
+    cache_keys: Dict[int, str] = {}
+    cached_translations: Dict[int, str] = {}
+    if cache is not None:
+        with metrics.span("cache"):
+            cache_keys = {line["index"]: make_cache_key(line["text"], prompt, instruction, model)
+                          for line in srt_lines_for_api}
+            cached = cache.get_many(cache_keys.values())
+        cached_translations = {index: cached[key] for index, key in cache_keys.items() if key in cached}
+
+    restored = _restore_layout(layout, srt_lines_for_api, cached_translations, log) if layout is not None else None
+    if restored is not None:
+        translations_map, plan, shards = restored
+        cache_hit_indices = [index for index in layout["cache_hits"] if index in cached_translations]
+        srt_lines_for_api = [line for shard in shards for line in shard]
+    else:
+        translations_map = dict(cached_translations)
+        cache_hit_indices = list(cached_translations)
+        cache_hits = len(cache_hit_indices)
+        if cache is not None:
+            if cache_hits:
+                srt_lines_for_api = [line for line in srt_lines_for_api if line["index"] not in translations_map]
+            total = len(original_entries)
+            log(f"Cache bản dịch: {cache_hits} hit / {total - cache_hits} miss ({cache_hits / total:.0%}).")
+
+        plan = None
+        if prefilter is not None and srt_lines_for_api:
+            plan = prefilter_lines(srt_lines_for_api, prefilter)
+            translations_map.update(plan.passthrough)
+            log(f"Lọc trước: giữ nguyên {len(plan.passthrough)} dòng, gộp {plan.duplicate_count} dòng trùng; "
+                f"gửi {len(plan.submit)}/{len(srt_lines_for_api)} dòng.")
+            srt_lines_for_api = plan.submit
+        shards = plan_shards(srt_lines_for_api, original_entries, sharding) if sharding else [srt_lines_for_api]
+
+    cache_hits = len(cache_hit_indices)
+    if journal is not None and srt_lines_for_api:
+        journal.set_layout(job_key, [[line["index"] for line in shard] for shard in shards],
+                           cache_hit_indices,
+                           plan.passthrough if plan is not None else None,
+                           plan.duplicates if plan is not None else None)
+
+    output_path = get_output_path(filepath, output_format if output_format != "srt" else None)
+    preview = None
+
+    # 2. Gửi job dịch cho các dòng còn thiếu
+    if srt_lines_for_api:
+        if progressive:
+            preview = _PreviewWriter(_preview_path(output_path), original_entries, translations_map, plan, output_format)
+        ctx = _JobContext(translator, prompt, instruction, model, log, report, should_stop, callback_receiver,
+                          metrics, recovery_rounds, journal, job_key, scheduler, priority, preview,
+                          stop_requested=should_stop)
+        try:
+            if len(shards) > 1:
+                server_translations = _translate_shards(ctx, shards, (sharding or ShardPolicy()).concurrency)
+            else:
+                server_translations = _translate_lines(ctx, srt_lines_for_api)
+        except Exception:
+            if journal is not None:
+                journal.fail_job(job_key)
+            raise
+        if server_translations is None:
+            return None
+        if not server_translations:
+            if journal is not None:
+                journal.fail_job(job_key)
+            raise Exception("Kết quả trả về không có nội dung dịch.")
+        if plan is not None:
+            server_translations = plan.expand(server_translations)
+        translations_map.update(server_translations)
+        if cache is not None:
+            with metrics.span("cache"):
+                cache.put_many((cache_keys[index], text) for index, text in server_translations.items()
+                               if index in cache_keys)
+    else:
+        log("Không còn dòng nào cần gửi lên server (đã có trong cache hoặc được giữ nguyên).")
+        report(100, "Hoàn thành không cần gửi server")
+
+    # 5. Xây dựng lại file SRT và lưu
+    log(f"Đang ghi file {output_format.upper()} đã dịch...")
+    with metrics.span("write"):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        write_subtitles(output_path, original_entries, translations_map, output_format)
+    if preview is not None:
+        preview.discard()
+
+    if journal is not None:
+        journal.remove_job(job_key)
+
+    return JobResult(filepath, output_path, len(original_entries), time.monotonic() - started, cache_hits)
+
+def _restore_layout(layout: Dict, lines: List[Dict], cached: Dict[int, str],
+                    log: Callable[[str], None]) -> Optional[Tuple[Dict[int, str], Optional[PrefilterPlan], List[List[Dict]]]]:
+    """
+    Dựng lại đúng các shard đã gửi ở lần chạy trước từ layout trong journal (không tính lại
+    theo cache, prefilter và tham số shard hiện tại) để các session cũ được gắn lại.
+    Dòng từng lấy từ cache mà nay cache không còn thì được gửi thêm trong một shard mới.
+    Returns: (bản dịch có sẵn, plan lọc trước, shards), None nếu layout không khớp file.
+    """
+    by_index = {line["index"]: line for line in lines}
+    try:
+        shards = [[by_index[index] for index in shard] for shard in layout["shards"]]
+        translations = {index: cached[index] for index in layout["cache_hits"] if index in cached}
+        missing = [by_index[index] for index in layout["cache_hits"] if index not in cached]
+        plan = None
+        if layout["prefilter"] is not None:
+            passthrough = {index: by_index[index]["text"] for index in layout["prefilter"]["passthrough"]}
+            plan = PrefilterPlan(submit=[], passthrough=passthrough, duplicates=layout["prefilter"]["duplicates"])
+            translations.update(passthrough)
+    except KeyError:
+        log("Layout trong journal không khớp với file, chia lại các dòng cần gửi.")
+        return None
+    if missing:
+        log(f"{len(missing)} dòng lần trước lấy từ cache nay không còn trong cache, gửi thêm.")
+        shards.append(missing)
+    if plan is not None:
+        plan.submit = [line for shard in shards for line in shard]
+    log(f"Dùng lại cách chia của lần chạy trước: {len(shards)} session "
+        f"({', '.join(str(len(shard)) for shard in shards)} dòng).")
+    return translations, plan, shards
+
+def _preview_path(output_path: str) -> str:
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.preview{ext}"
+
+class _PreviewWriter:
+    """File xem trước của chế độ progressive: ghi lại mỗi khi nhận thêm dòng (từ mọi shard)"""
+
+    def __init__(self, path: str, entries: List[SrtEntry], translations: Dict[int, str],
+                 plan: Optional[PrefilterPlan], output_format: str):
+        self.path = path
+        self._entries = entries
+        self._translations = dict(translations)   # cache hit + dòng giữ nguyên
+        self._plan = plan
+        self._format = output_format
+        self._lock = threading.Lock()
+        self._written = False
+
+    def add(self, translations: Dict[int, str]):
+        if self._plan is not None:
+            translations = self._plan.expand(translations)
+        with self._lock:
+            self._translations.update(translations)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_subtitles(self.path, self._entries, self._translations, self._format, missing_prefix="")
+            self._written = True
+
+    @property
+    def line_count(self) -> int:
+        with self._lock:
+            return len(self._translations)
+
+    def discard(self):
+        with self._lock:
+            if self._written:
+                try:
+                    os.unlink(self.path)
+                except OSError:
+                    pass
+                self._written = False
+
+@dataclass
+class _JobContext:
+    """Những thứ mà mọi session của một job dùng chung"""
+    translator: SubtitleApiService
+    prompt: str
+    instruction: str
+    model: str
+    log: Callable[[str], None]
+    report: Callable[[float, str], None]
+    should_stop: Callable[[], bool]
+    callback_receiver: Optional[CallbackReceiver]
+    metrics: JobMetrics
+    recovery_rounds: int = 2
+    journal: Optional[JobJournal] = None
+    job_key: Optional[str] = None
+    scheduler: Optional[JobScheduler] = None
+    priority: int = PRIORITY_NORMAL
+    preview: Optional[_PreviewWriter] = None
+    # Yêu cầu dừng của người dùng (should_stop của shard còn tính cả shard khác bị lỗi):
+    # chỉ khi người dùng dừng thì session mới bị hủy trên server
+    stop_requested: Callable[[], bool] = lambda: False
+
+def _translate_lines(ctx: _JobContext, lines: List[Dict]) -> Optional[Dict[int, str]]:
+    """
+    Dịch `lines` qua một session; nếu kết quả thiếu dòng (partialcompleted, failed hoặc
+    results không đủ) thì chỉ gửi lại các dòng còn thiếu, tối đa ctx.recovery_rounds lần.
+    Session failed được tính như partialcompleted không trả về dòng nào: bản dịch đã có
+    (của các lần trước, các shard khác) được giữ lại. Dòng vẫn thiếu sau cùng được để
+    build_srt đánh dấu [LỖI DỊCH]; kết quả có thể rỗng, người gọi quyết định. None nếu bị dừng.
+    """
+    translations: Dict[int, str] = {}
+    pending = lines
+    for attempt in range(ctx.recovery_rounds + 1):
+        if attempt:
+            ctx.log(f"Gửi lại {len(pending)} dòng còn thiếu (lần {attempt}/{ctx.recovery_rounds})...")
+        try:
+            result = _submit_and_wait(ctx, pending)
+        except SessionFailed as e:
+            ctx.log(f"Session thất bại ({e}), nhận được {len(e.received)} dòng.")
+            result = e.received
+        if result is None:
+            return None
+        translations.update(result)
+        pending = [line for line in pending if line["index"] not in translations]
+        if not pending:
+            break
+        ctx.log(f"Kết quả còn thiếu {len(pending)}/{len(lines)} dòng.")
+
+    if pending:
+        ctx.log(f"⚠ Còn {len(pending)} dòng chưa dịch được sau {ctx.recovery_rounds} lần gửi lại.")
+    return translations
+
+def _submit_and_wait(ctx: _JobContext, lines: List[Dict]) -> Optional[Dict[int, str]]:
+    """
+    Gửi một session dịch cho `lines` và chờ đến khi có kết quả. None nếu bị dừng.
+    Nếu journal có session dở cho đúng tập dòng này thì gắn lại vào đó.
+    Có scheduler thì session giữ một chỗ của scheduler cho tới khi có kết quả.
+    """
+    journal = ctx.journal
+    scheduler = ctx.scheduler
+    indices = [line["index"] for line in lines]
+    if journal is not None:
+        resumed_id = journal.find_session(ctx.job_key, indices)
+        if resumed_id:
+            status_data = _reattach_status(ctx, resumed_id)
+            if status_data is None:
+                return None
+            status = status_data.get('status', 'unknown').lower()
+            if status != 'failed':
+                ctx.metrics.observe_status(resumed_id, status)
+                ctx.log(f"Gắn lại vào session đã gửi trước đó: {resumed_id} ({status})")
+                if scheduler is not None and not scheduler.acquire(ctx.priority, ctx.should_stop, submit=False):
+                    return None
+                try:
+                    # Callback URL của lần chạy trước không còn hiệu lực nên chỉ polling
+                    return _await_session(replace(ctx, callback_receiver=None), resumed_id, len(lines))
+                finally:
+                    if scheduler is not None:
+                        scheduler.release()
+            ctx.log(f"Session {resumed_id} không còn dùng được trên server "
+                    f"({status_data.get('error') or status}), gửi lại.")
+            journal.set_session_state(ctx.job_key, resumed_id, SESSION_FAILED)
+
+    ctx.log("Đang gửi yêu cầu dịch đến server...")
+    requested_id = ctx.translator.create_session_id()
+    receiver = ctx.callback_receiver
+    callback_url = receiver.register(requested_id) if receiver else None
+    payload_stats = {}
+
+    def send():
+        with ctx.metrics.span("upload"):
+            submitted = _interruptible(
+                lambda: ctx.translator.start_translation_job(
+                    lines, ctx.prompt, ctx.instruction, session_id=requested_id, callback_url=callback_url,
+                    model=ctx.model, payload_stats=payload_stats),
+                ctx.should_stop, on_abandoned=lambda result: _adopt_abandoned_session(ctx, result, indices))
+        return submitted if submitted is not None else (False, "Đã dừng trong lúc gửi job", None)
+
+    try:
+        if scheduler is None:
+            submitted = send()
+        else:
+            submitted = scheduler.submit(ctx.priority, send, ctx.should_stop, ctx.log)
+        if submitted is None or (not submitted[0] and ctx.should_stop()):
+            return None
+        success, message, session_id = submitted
+        if payload_stats:
+            size_text = format_size(payload_stats["raw_bytes"])
+            if payload_stats["encoding"]:
+                size_text += f" -> {format_size(payload_stats['sent_bytes'])} ({payload_stats['encoding']})"
+            ctx.log(f"Kích thước payload: {size_text}")
+
+        if not success:
+            if journal is not None and classify_error(message) == ERROR_UNCONFIRMED:
+                # Server có thể đã nhận job: ghi lại để lần resume gắn vào session thay vì gửi lại
+                journal.add_session(ctx.job_key, requested_id, indices)
+            raise Exception(f"Không thể bắt đầu job: {message}")
+
+        try:
+            ctx.log(f"Server đã chấp nhận job. Session ID: {session_id}")
+            ctx.metrics.observe_status(session_id, "pending")
+            if journal is not None:
+                journal.add_session(ctx.job_key, session_id, indices)
+            return _await_session(ctx, session_id, len(lines))
+        finally:
+            if scheduler is not None:
+                scheduler.release()
+    finally:
+        if receiver:
+            receiver.unregister(requested_id)
+
+def _reattach_status(ctx: _JobContext, session_id: str) -> Optional[Dict]:
+    """
+    Trạng thái của session cũ trong journal. Không hỏi được server (mất kết nối, 5xx, 401)
+    thì thử lại vài lần rồi raise chứ không coi là session đã mất: session có thể vẫn đang
+    chạy, gửi lại sẽ tốn lượt dịch hai lần. None nếu bị dừng.
+    """
+    for attempt in range(1, REATTACH_POLL_ATTEMPTS + 1):
+        status = ctx.translator.poll_status(session_id)
+        if not is_status_unavailable(status):
+            return status
+        if attempt == REATTACH_POLL_ATTEMPTS:
+            raise Exception(f"Không kiểm tra được session {session_id} trên server ({status.get('error')}); "
+                            f"dừng resume để không gửi lại job có thể vẫn đang chạy.")
+        ctx.log(f"Không kiểm tra được session {session_id} ({status.get('error')}), thử lại...")
+        _sleep(2 ** attempt, ctx.should_stop)
+        if ctx.should_stop():
+            return None
+    return None
+
+def _await_session(ctx: _JobContext, session_id: str, entry_count: int) -> Optional[Dict[int, str]]:
+    """Chờ kết quả một session và cập nhật trạng thái của nó trong journal"""
+    try:
+        result = _wait_and_fetch_results(ctx, session_id, entry_count)
+    except Exception:
+        if ctx.journal is not None:
+            ctx.journal.set_session_state(ctx.job_key, session_id, SESSION_FAILED)
+        raise
+    if result is None:
+        if ctx.stop_requested():
+            _cancel_session(ctx, session_id)
+    elif ctx.journal is not None:
+        ctx.journal.set_session_state(ctx.job_key, session_id, SESSION_DONE)
+    return result
+
+def _cancel_session(ctx: _JobContext, session_id: str):
+    """
+    Hủy session trên server khi người dùng dừng. Session đã xong (hoặc không liên lạc được
+    server) thì giữ nguyên trong journal để lần resume sau gắn lại.
+    """
+    status = ctx.translator.cancel_job(session_id)
+    if status.get('error') != CANCELLED_ERROR:
+        ctx.log(f"Không hủy session {session_id}: {status.get('error') or status.get('status')}")
+        return
+    ctx.log(f"Đã hủy session {session_id} trên server "
+            f"({status.get('completedLines', 0)}/{status.get('totalLines', '?')} dòng đã dịch xong).")
+    if ctx.journal is not None:
+        ctx.journal.set_session_state(ctx.job_key, session_id, SESSION_CANCELLED)
+
+def _adopt_abandoned_session(ctx: _JobContext, submitted: Tuple[bool, str, Optional[str]], indices: List[int]):
+    """Job gửi dở lúc dừng vẫn tới được server: ghi vào journal, người dùng dừng thì hủy luôn"""
+    success, _, session_id = submitted
+    if not success:
+        return
+    if ctx.journal is not None:
+        ctx.journal.add_session(ctx.job_key, session_id, indices)
+    if ctx.stop_requested():
+        _cancel_session(ctx, session_id)
+
+def _interruptible(call: Callable[[], T], should_stop: Callable[[], bool],
+                   on_abandoned: Optional[Callable[[T], None]] = None) -> Optional[T]:
+    """
+    Chạy một request HTTP trong thread riêng và chờ theo nhịp ngắn, để yêu cầu dừng có hiệu
+    lực ngay cả khi đang upload/tải dở. None nếu bị dừng; request bị bỏ lại vẫn chạy nốt
+    ở nền và `on_abandoned` nhận kết quả của nó.
+    """
+    if should_stop():
+        return None
+    lock = threading.Lock()
+    finished = threading.Event()
+    abandoned = threading.Event()
+    outcome: List[Tuple[bool, object]] = []
+
+    def run():
+        try:
+            result = (True, call())
+        except Exception as e:
+            result = (False, e)
+        with lock:
+            outcome.append(result)
+        finished.set()
+        if abandoned.is_set() and result[0] and on_abandoned is not None:
+            try:
+                on_abandoned(result[1])
+            except Exception as e:
+                logger.error(f"Lỗi khi xử lý request bị bỏ dở: {e}", exc_info=True)
+
+    # copy_context để request vẫn được tính vào metrics của job
+    threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True,
+                     name=threading.current_thread().name).start()
+    while not finished.wait(STOP_CHECK_INTERVAL):
+        if should_stop():
+            with lock:
+                if not outcome:
+                    abandoned.set()
+                    return None
+    ok, value = outcome[0]
+    if not ok:
+        raise value
+    return value
+
+def _translate_shards(ctx: _JobContext, shards: List[List[Dict]], concurrency: int) -> Optional[Dict[int, str]]:
+    """
+    Gửi mỗi shard thành một session riêng, chạy song song và gộp kết quả theo index.
+    Tiến trình báo lên là tổng số dòng đã dịch của mọi shard.
+    """
+    total = sum(len(shard) for shard in shards)
+    completed = [0] * len(shards)
+    lock = threading.Lock()
+    failed = threading.Event()
+    ctx.log(f"Chia {total} dòng thành {len(shards)} shard ({', '.join(str(len(s)) for s in shards)} dòng).")
+
+    def shard_context(i: int) -> _JobContext:
+        prefix = f"[shard {i + 1}/{len(shards)}]"
+
+        def report(progress: float, text: str):
+            with lock:
+                completed[i] = int(len(shards[i]) * progress / 100)
+                done = sum(completed)
+            ctx.report(done * 100 / total, f"{len(shards)} shard | {done}/{total} dòng ({done * 100 / total:.1f}%) | {prefix} {text}")
+
+        return replace(ctx, log=lambda message: ctx.log(f"{prefix} {message}"), report=report,
+                       should_stop=lambda: failed.is_set() or ctx.should_stop())
+
+    translations: Dict[int, str] = {}
+    errors: List[Exception] = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ShardWorker") as executor:
+        # copy_context để request trong thread shard vẫn được tính vào metrics của job
+        futures = [executor.submit(contextvars.copy_context().run, _translate_lines, shard_context(i), shard)
+                   for i, shard in enumerate(shards)]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.set()
+                errors.append(e)
+                continue
+            if result is not None:
+                translations.update(result)
+
+    if errors:
+        raise errors[0]
+    if ctx.should_stop():
+        return None
+    return translations
+
+def _wait_and_fetch_results(ctx: _JobContext, session_id: str, entry_count: int) -> Optional[Dict[int, str]]:
+    """
+    Chờ job hoàn thành (polling hoặc callback) rồi tải kết quả. None nếu bị dừng.
+    Có ctx.preview thì tải dần các dòng đã dịch xong trong lúc job đang chạy.
+    Raises SessionFailed nếu server báo job thất bại. Poll không hỏi được server thì
+    chờ rồi poll tiếp (job có thể vẫn chạy), quá MAX_UNAVAILABLE_POLLS lần liên tiếp thì raise.
+    """
+    translator, log, should_stop, receiver = ctx.translator, ctx.log, ctx.should_stop, ctx.callback_receiver
+    received: Dict[int, str] = {}
+    seen: set = set()           # index đã nhận (kể cả dòng server trả về rỗng), không tải lại
+
+    def fetch() -> Optional[Tuple[Dict, Dict[int, str]]]:
+        """Tải kết quả, trả về (response, các dòng mới nhận); None nếu bị dừng"""
+        exclude = set(seen)
+        result_data = _interruptible(
+            lambda: translator.get_results(session_id, exclude=exclude) if exclude else translator.get_results(session_id),
+            should_stop)
+        if result_data is None:
+            return None
+        items = result_data.get('results') or []
+        new = {item['index']: item['translated'] for item in items
+               if item.get('translated') and item['index'] not in received}
+        seen.update(item['index'] for item in items)
+        received.update(new)
+        return result_data, new
+
+    # 3. Polling để lấy trạng thái
+    progress = 0.0
+    fetched_at = 0              # completedLines lúc tải từng phần gần nhất
+    callback_data: Optional[Dict] = None
+    unavailable_polls = 0
+    poller = AdaptivePoller(
+        min_interval=translator.config.poll_min_interval,
+        max_interval=translator.config.poll_max_interval,
+        initial_interval=3 if entry_count < 500 else 5,
+    )
+    while not should_stop():
+        if callback_data is not None:
+            status_data = callback_data
+        else:
+            status_data = _interruptible(lambda: translator.poll_status(session_id), should_stop)
+            if status_data is None:
+                break
+        status = status_data.get('status', 'unknown').lower()
+        if is_status_unavailable(status_data):
+            unavailable_polls += 1
+            if unavailable_polls >= MAX_UNAVAILABLE_POLLS:
+                raise Exception(f"Không hỏi được trạng thái job sau {unavailable_polls} lần: {status_data.get('error')}")
+            log(f"Không hỏi được trạng thái job ({status_data.get('error')}), thử lại...")
+            callback_data = None
+            _sleep(poller.next_delay(), should_stop)
+            continue
+        unavailable_polls = 0
+        ctx.metrics.observe_status(session_id, status)
+
+        log(f"Trạng thái job: {status}, Tiến trình: {status_data.get('progress', 0):.1f}%")
+
+        if status == 'completed':
+            ctx.report(100, "Hoàn thành! Đang lấy kết quả...")
+            log("Job hoàn thành. Đang tải kết quả...")
+            break
+
+        if status == 'partialcompleted':
+            log(f"Job hoàn thành một phần ({status_data.get('error') or 'có batch lỗi'}). Đang tải các dòng đã dịch...")
+            break
+
+        if status == 'failed':
+            ctx.metrics.observe_status(session_id, None)
+            raise SessionFailed(status_data.get('error') or 'Lỗi không xác định từ server.', received)
+
+        progress = status_data.get('progress', progress)
+        completed_lines = status_data.get('completedLines', 0)
+        total_lines = status_data.get('totalLines', entry_count)
+
+        poller.observe(status, completed_lines, total_lines)
+        status_text = f"Trạng thái: {status.capitalize()} | {completed_lines}/{total_lines} dòng ({progress:.1f}%)"
+        eta = poller.eta()
+        if eta is not None:
+            status_text += f" | Còn ~{format_eta(eta)}"
+        ctx.report(progress, status_text)
+
+        if ctx.preview is not None and status == 'processing' and completed_lines > fetched_at:
+            fetched_at = completed_lines
+            fetched = fetch()
+            if fetched is None:
+                break
+            _, new = fetched
+            if new:
+                ctx.preview.add(new)
+                log(f"Đã nhận trước {len(received)}/{total_lines} dòng, cập nhật {os.path.basename(ctx.preview.path)}")
+
+        if receiver:
+            callback_data = _wait_for_callback(receiver, session_id, receiver.safety_poll_interval, should_stop)
+        else:
+            _sleep(poller.next_delay(), should_stop)
+
+    ctx.metrics.observe_status(session_id, None)
+    if should_stop():
+        return None
+
+    # 4. Lấy kết quả cuối cùng (chỉ các dòng chưa nhận trong lúc chạy)
+    log("Đang lấy kết quả dịch..." if not seen else f"Đang lấy nốt kết quả dịch (đã có {len(received)} dòng)...")
+    with ctx.metrics.span("download"):
+        fetched = fetch()
+    if fetched is None:
+        return None
+    result_data, _ = fetched
+    if result_data.get('status', '').lower() not in ('completed', 'partialcompleted'):
+        raise Exception(f"Lấy kết quả thất bại: {result_data.get('error', 'Không có dữ liệu trả về')}")
+    return received
+
+def _sleep(seconds: float, should_stop: Callable[[], bool]):
+    """Ngủ theo từng nhịp ngắn để vẫn phản hồi yêu cầu dừng"""
+    deadline = time.monotonic() + seconds
+    while not should_stop():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 0.5))
+
+def _wait_for_callback(receiver: CallbackReceiver, session_id: str, seconds: float,
+                       should_stop: Callable[[], bool]) -> Optional[Dict]:
+    """Chờ callback theo từng nhịp ngắn để vẫn phản hồi yêu cầu dừng"""
+    deadline = time.monotonic() + seconds
+    while not should_stop():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        payload = receiver.wait(session_id, min(remaining, 0.5))
+        if payload is not None:
+            return payload
+    return None
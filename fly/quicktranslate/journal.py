@@ -0,0 +1,224 @@
+"""
+Nhật ký job trên đĩa: ghi lại mỗi session đã gửi (theo file đầu vào, hash nội dung,
+layout shard và trạng thái) để lần chạy sau gắn lại vào session còn dở qua
+poll_status/get_results thay vì gửi lại và tốn lượt dịch lần nữa.
+Mọi lần ghi đều atomic (file tạm + os.replace).
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Optional, Dict, List, Iterable, Tuple
+
+from .paths import app_data_dir
+from .ranges import to_ranges, from_ranges
+
+logger = logging.getLogger(__name__)
+
+# Trạng thái job
+JOB_RUNNING = "running"
+JOB_FAILED = "failed"
+# Trạng thái session
+SESSION_SUBMITTED = "submitted"
+SESSION_DONE = "done"
+SESSION_FAILED = "failed"
+SESSION_CANCELLED = "cancelled"     # người dùng dừng, đã hủy trên server
+
+def default_journal_path() -> str:
+    return os.path.join(app_data_dir(), "journal.json")
+
+def file_sha256(filepath: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_job_key(file_hash: str, prompt: str, system_instruction: str, model: str) -> str:
+    """Job được nhận diện theo nội dung file và cấu hình dịch, không theo đường dẫn"""
+    digest = hashlib.sha256()
+    for part in (file_hash, model, system_instruction, prompt):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()[:32]
+
+def atomic_write_json(path: str, data) -> None:
+    """Ghi JSON nguyên tử (xem atomic_write_text)"""
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=1))
+
+def atomic_write_text(path: str, text: str) -> None:
+    """
+    Ghi text vào file tạm cùng thư mục rồi os.replace, không bao giờ để lại file dở.
+    File tạm đặt theo tên file đích (vd. '.tokens.json-*.tmp').
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class JobJournal:
+    """
+    Journal JSON dùng chung giữa các thread của một tiến trình.
+    Job hoàn thành bị xóa khỏi journal; job còn lại là job có thể resume.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_journal_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("jobs", {})
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            logger.warning(f"Không đọc được journal {self.path}: {e}. Bắt đầu journal mới.")
+            return {}
+
+    def _save_locked(self):
+        atomic_write_json(self.path, {"version": 1, "jobs": self._jobs})
+
+    def begin_job(self, job_key: str, input_path: str, file_hash: str, prompt: str,
+                  system_instruction: str, model: str):
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_key)
+            if job is None:
+                job = self._jobs[job_key] = {
+                    "input_path": os.path.abspath(input_path),
+                    "file_hash": file_hash,
+                    "prompt": prompt,
+                    "system_instruction": system_instruction,
+                    "model": model,
+                    "created_at": now,
+                    "shards": [],
+                    "sessions": {},
+                }
+            job["state"] = JOB_RUNNING
+            job["updated_at"] = now
+            self._save_locked()
+
+    def set_layout(self, job_key: str, shards: List[List[int]], cache_hits: Iterable[int],
+                   passthrough: Optional[Iterable[int]] = None, duplicates: Optional[Dict[int, List[int]]] = None):
+        """
+        Ghi cách job được chia để gửi: index của từng shard, các dòng lấy từ cache và
+        (nếu có lọc trước) các dòng giữ nguyên / dòng trùng. Lần resume dựng lại đúng các
+        shard này thay vì tính lại theo cache, prefilter và tham số shard hiện tại.
+        """
+        with self._lock:
+            job = self._jobs.get(job_key)
+            if job is None:
+                return
+            job["shards"] = [to_ranges(indices) for indices in shards]
+            job["cache_hits"] = to_ranges(cache_hits)
+            job["prefilter"] = None if passthrough is None else {
+                "passthrough": to_ranges(passthrough),
+                "duplicates": {str(index): to_ranges(copies) for index, copies in (duplicates or {}).items()},
+            }
+            self._save_locked()
+
+    def get_layout(self, job_key: str) -> Optional[Dict]:
+        """
+        Layout đã ghi bởi set_layout, dạng danh sách index:
+        {"shards", "cache_hits", "prefilter": None | {"passthrough", "duplicates"}}.
+        None nếu job chưa có layout (hoặc journal của phiên bản cũ không ghi đủ).
+        """
+        with self._lock:
+            job = self._jobs.get(job_key)
+            if job is None or not job.get("shards") or "cache_hits" not in job:
+                return None
+            prefilter = job.get("prefilter")
+            return {
+                "shards": [from_ranges(ranges) for ranges in job["shards"]],
+                "cache_hits": from_ranges(job["cache_hits"]),
+                "prefilter": None if prefilter is None else {
+                    "passthrough": from_ranges(prefilter["passthrough"]),
+                    "duplicates": {int(index): from_ranges(copies)
+                                   for index, copies in prefilter["duplicates"].items()},
+                },
+            }
+
+    def find_session(self, job_key: str, indices: Iterable[int]) -> Optional[str]:
+        """Session chưa thất bại/bị hủy của job có đúng tập dòng này (để gắn lại), nếu có"""
+        ranges = to_ranges(indices)
+        with self._lock:
+            job = self._jobs.get(job_key)
+            if job is None:
+                return None
+            for session_id, session in job["sessions"].items():
+                if session["state"] not in (SESSION_FAILED, SESSION_CANCELLED) and session["indices"] == ranges:
+                    return session_id
+        return None
+
+    def add_session(self, job_key: str, session_id: str, indices: Iterable[int]):
+        with self._lock:
+            job = self._jobs.get(job_key)
+            if job is None:
+                return
+            job["sessions"][session_id] = {
+                "indices": to_ranges(indices),
+                "state": SESSION_SUBMITTED,
+                "submitted_at": time.time(),
+            }
+            job["updated_at"] = time.time()
+            self._save_locked()
+
+    def set_session_state(self, job_key: str, session_id: str, state: str):
+        with self._lock:
+            session = self._jobs.get(job_key, {}).get("sessions", {}).get(session_id)
+            if session is None:
+                return
+            session["state"] = state
+            self._save_locked()
+
+    def remove_job(self, job_key: str):
+        """Xóa job khỏi journal (đã ghi xong file kết quả, hoặc không còn resume được)"""
+        with self._lock:
+            if self._jobs.pop(job_key, None) is not None:
+                self._save_locked()
+
+    def fail_job(self, job_key: str):
+        with self._lock:
+            job = self._jobs.get(job_key)
+            if job is None:
+                return
+            job["state"] = JOB_FAILED
+            job["updated_at"] = time.time()
+            self._save_locked()
+
+    def resumable_jobs(self) -> List[Tuple[str, Dict]]:
+        """
+        Các job dở dang còn resume được. Job có file đầu vào đã mất hoặc đã bị sửa
+        thì không thể gắn lại nữa và bị xóa khỏi journal.
+        """
+        jobs = []
+        for job_key, job in self.unfinished_jobs():
+            path = job["input_path"]
+            if not os.path.isfile(path) or file_sha256(path) != job["file_hash"]:
+                logger.warning(f"Bỏ job dở của {path}: file không còn hoặc đã thay đổi.")
+                self.remove_job(job_key)
+                continue
+            jobs.append((job_key, job))
+        return jobs
+
+    def unfinished_jobs(self) -> List[Tuple[str, Dict]]:
+        """Các job chưa hoàn thành, mới nhất trước"""
+        with self._lock:
+            jobs = [(key, dict(job)) for key, job in self._jobs.items()]
+        return sorted(jobs, key=lambda item: item[1].get("updated_at", 0), reverse=True)
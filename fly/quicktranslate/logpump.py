@@ -0,0 +1,79 @@
+"""
+Hàng đợi log cho GUI: gom nhiều dòng thành một lần chèn mỗi nhịp, giới hạn backlog
+và giảm tần suất các dòng trạng thái lặp lại ("Trạng thái job: processing...").
+Không phụ thuộc tkinter để dùng được cả ngoài GUI.
+"""
+import re
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Dòng trạng thái polling: khóa rate-limit là phần đầu dòng tới hết dấu ':'
+# (gồm cả tiền tố shard/file), nên mỗi shard/file được giới hạn riêng.
+_STATUS_RE = re.compile(r"^(.*?Trạng thái(?: job)?:)")
+
+class LogPump:
+    """
+    Thread nào cũng có thể put(); thread UI gọi drain() mỗi nhịp để lấy các dòng mới.
+    Dòng trạng thái cùng khóa chỉ được đưa ra tối đa một lần mỗi `status_interval` giây;
+    dòng bị giữ lại là dòng mới nhất và được đưa ra khi hết khoảng chờ hoặc ngay trước
+    dòng log thường kế tiếp, nên trạng thái cuối cùng không bị mất.
+    """
+
+    def __init__(self, status_interval: float = 2.0, max_pending: int = 10_000, timestamps: bool = True):
+        self.status_interval = status_interval
+        self.timestamps = timestamps
+        self.dropped = 0
+        self._pending: deque = deque()
+        self._max_pending = max_pending
+        self._last_emit: Dict[str, float] = {}
+        self._held: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, message: str, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        if self.timestamps:
+            line = f"[{datetime.now().strftime('%H:%M:%S')}] {message}"
+        else:
+            line = message
+        match = _STATUS_RE.match(message) if self.status_interval > 0 else None
+        with self._lock:
+            if match is None:
+                self._flush_held(now, force=True)
+                self._append(line)
+                return
+            key = match.group(1)
+            last = self._last_emit.get(key)
+            if last is not None and now - last < self.status_interval:
+                self._held[key] = (now, line)
+                return
+            self._held.pop(key, None)
+            self._last_emit[key] = now
+            self._append(line)
+
+    def drain(self, now: Optional[float] = None) -> List[str]:
+        """Lấy toàn bộ các dòng đang chờ (theo thứ tự)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._flush_held(now, force=False)
+            lines = list(self._pending)
+            self._pending.clear()
+        return lines
+
+    def _append(self, line: str):
+        # UI bị treo lâu thì bỏ các dòng cũ nhất thay vì để backlog phình ra
+        if len(self._pending) >= self._max_pending:
+            self._pending.popleft()
+            self.dropped += 1
+        self._pending.append(line)
+
+    def _flush_held(self, now: float, force: bool):
+        if not self._held:
+            return
+        for key, (held_at, line) in sorted(self._held.items(), key=lambda item: item[1][0]):
+            if force or now - self._last_emit.get(key, 0.0) >= self.status_interval:
+                del self._held[key]
+                self._last_emit[key] = now
+                self._append(line)
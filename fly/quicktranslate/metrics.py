@@ -0,0 +1,249 @@
+"""
+Đo thời gian từng pha của job dịch và số request/byte/poll/retry, xuất qua hook.
+
+Một JobMetrics được gắn vào job đang chạy (contextvar), nên tầng HTTP ghi nhận
+request mà không cần truyền tham số qua từng hàm. Khi job kết thúc, bản ghi
+(dict) được chuyển cho metrics hook: JsonLinesExporter, PrometheusExporter hoặc
+bất kỳ callable nào nhận một dict.
+"""
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .journal import atomic_write_text
+from .polling import QUEUED_STATUSES
+
+# Các pha của một job, theo thứ tự
+PHASES = ("parse", "cache", "upload", "queued", "processing", "download", "write")
+
+MetricsHook = Callable[[Dict], None]
+
+_current: contextvars.ContextVar = contextvars.ContextVar("quicktranslate_job_metrics", default=None)
+
+class JobMetrics:
+    """
+    Số liệu của một job. Thời gian các pha là tổng cộng dồn của mọi session
+    (khi chia shard, các session chạy song song nên tổng có thể lớn hơn thời gian thực).
+    """
+
+    def __init__(self, input_path: str):
+        self.input_path = input_path
+        self.started = time.monotonic()
+        self.phases: Dict[str, float] = {}
+        self.requests: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.sessions = 0
+        self._session_states: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def add_phase(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def span(self, phase: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(phase, time.monotonic() - start)
+
+    def record_request(self, endpoint: str, bytes_sent: int, bytes_received: int, retries: int = 0):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.bytes_sent += bytes_sent
+            self.bytes_received += bytes_received
+            self.retries += retries
+
+    def observe_status(self, session_id: str, status: Optional[str]):
+        """
+        Ghi nhận trạng thái server của một session: khoảng thời gian từ lần quan sát
+        trước được tính vào 'queued' (pending/distributing) hoặc 'processing'.
+        status=None kết thúc việc theo dõi session.
+        """
+        now = time.monotonic()
+        with self._lock:
+            previous = self._session_states.pop(session_id, None)
+            if previous is None and status is not None:
+                self.sessions += 1
+            if previous is not None:
+                phase, since = previous
+                self.phases[phase] = self.phases.get(phase, 0.0) + now - since
+            if status is not None:
+                self._session_states[session_id] = ("queued" if status in QUEUED_STATUSES else "processing", now)
+
+    def to_record(self, outcome: str, total_lines: int = 0, cache_hits: int = 0,
+                  error: Optional[str] = None) -> Dict:
+        for session_id in list(self._session_states):
+            self.observe_status(session_id, None)
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "input_path": self.input_path,
+                "outcome": outcome,
+                "error": error,
+                "total_s": time.monotonic() - self.started,
+                "phases": {phase: self.phases.get(phase, 0.0) for phase in PHASES},
+                "lines": total_lines,
+                "cache_hits": cache_hits,
+                "sessions": self.sessions,
+                "requests": sum(self.requests.values()),
+                "requests_by_endpoint": dict(self.requests),
+                "polls": self.requests.get("status", 0),
+                "retries": self.retries,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+            }
+
+@contextmanager
+def bind_job_metrics(metrics: Optional[JobMetrics]):
+    """Gắn `metrics` làm số liệu của job hiện tại (trong context/thread hiện tại)"""
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+def current_job_metrics() -> Optional[JobMetrics]:
+    return _current.get()
+
+def record_request(endpoint: str, bytes_sent: int, bytes_received: int, retries: int = 0):
+    """Gọi từ tầng HTTP; không làm gì nếu không có job nào đang đo"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.record_request(endpoint, bytes_sent, bytes_received, retries)
+
+def combine_hooks(hooks: Iterable[Optional[MetricsHook]]) -> Optional[MetricsHook]:
+    """Gộp nhiều hook thành một (None nếu không có hook nào)"""
+    hooks = [hook for hook in hooks if hook is not None]
+    if not hooks:
+        return None
+    if len(hooks) == 1:
+        return hooks[0]
+
+    def fan_out(record: Dict):
+        for hook in hooks:
+            hook(record)
+    return fan_out
+
+# ==============================================================================
+# EXPORTERS
+# ==============================================================================
+
+class JsonLinesExporter:
+    """Ghi mỗi job thành một dòng JSON (append) vào file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+DEFAULT_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class PrometheusExporter:
+    """
+    Tổng hợp các job thành metric dạng text của Prometheus (histogram thời gian job
+    và từng pha, counter request/byte/poll/retry). Nếu có `path` thì ghi đè file sau
+    mỗi job (ghi tạm rồi rename), phù hợp với textfile collector của node_exporter.
+    """
+
+    def __init__(self, path: Optional[str] = None, buckets=DEFAULT_BUCKETS, prefix: str = "quicktranslate"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._job_duration = _Histogram(buckets)
+        self._phase_duration = {phase: _Histogram(buckets) for phase in PHASES}
+        self._jobs: Dict[str, int] = {}
+        self._counters = {"requests": 0, "polls": 0, "retries": 0, "bytes_sent": 0, "bytes_received": 0, "lines": 0}
+        self._requests_by_endpoint: Dict[str, int] = {}
+
+    def __call__(self, record: Dict):
+        with self._lock:
+            self._jobs[record["outcome"]] = self._jobs.get(record["outcome"], 0) + 1
+            self._job_duration.observe(record["total_s"])
+            for phase, seconds in record["phases"].items():
+                if phase in self._phase_duration:
+                    self._phase_duration[phase].observe(seconds)
+            for name in self._counters:
+                self._counters[name] += record.get(name, 0)
+            for endpoint, count in record.get("requests_by_endpoint", {}).items():
+                self._requests_by_endpoint[endpoint] = self._requests_by_endpoint.get(endpoint, 0) + count
+            if self.path:
+                self._write(self._render())
+
+    def render(self) -> str:
+        with self._lock:
+            return self._render()
+
+    def _render(self) -> str:
+        p = self.prefix
+        out: List[str] = []
+
+        out.append(f"# HELP {p}_jobs_total Số job dịch đã kết thúc theo kết quả")
+        out.append(f"# TYPE {p}_jobs_total counter")
+        for outcome, count in sorted(self._jobs.items()):
+            out.append(f'{p}_jobs_total{{outcome="{outcome}"}} {count}')
+
+        out.append(f"# HELP {p}_job_duration_seconds Thời gian client quan sát cho cả job")
+        out.append(f"# TYPE {p}_job_duration_seconds histogram")
+        out.extend(self._histogram_lines(f"{p}_job_duration_seconds", self._job_duration, ""))
+
+        out.append(f"# HELP {p}_phase_duration_seconds Thời gian từng pha của job")
+        out.append(f"# TYPE {p}_phase_duration_seconds histogram")
+        for phase, histogram in self._phase_duration.items():
+            out.extend(self._histogram_lines(f"{p}_phase_duration_seconds", histogram, f'phase="{phase}"'))
+
+        out.append(f"# HELP {p}_http_requests_total Số request HTTP theo endpoint")
+        out.append(f"# TYPE {p}_http_requests_total counter")
+        for endpoint, count in sorted(self._requests_by_endpoint.items()):
+            out.append(f'{p}_http_requests_total{{endpoint="{endpoint}"}} {count}')
+
+        for name, help_text in (("polls", "Số lần poll trạng thái"), ("retries", "Số lần retry HTTP"),
+                                ("bytes_sent", "Số byte đã gửi"), ("bytes_received", "Số byte đã nhận"),
+                                ("lines", "Số dòng phụ đề đã xử lý")):
+            out.append(f"# HELP {p}_{name}_total {help_text}")
+            out.append(f"# TYPE {p}_{name}_total counter")
+            out.append(f"{p}_{name}_total {self._counters[name]}")
+        return "\n".join(out) + "\n"
+
+    @staticmethod
+    def _histogram_lines(name: str, histogram: _Histogram, labels: str) -> List[str]:
+        sep = "," if labels else ""
+        lines = [f'{name}_bucket{{{labels}{sep}le="{bound}"}} {count}'
+                 for bound, count in zip(histogram.buckets, histogram.counts)]
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {histogram.total}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram.sum}")
+        lines.append(f"{name}_count{suffix} {histogram.total}")
+        return lines
+
+    def _write(self, text: str):
+        atomic_write_text(self.path, text)
+        # File tạm của mkstemp là 0600; textfile collector thường chạy bằng user khác
+        os.chmod(self.path, 0o644)
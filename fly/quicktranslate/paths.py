@@ -0,0 +1,10 @@
+"""
+Vị trí lưu dữ liệu cục bộ của client (cache bản dịch, ...).
+"""
+import os
+
+def app_data_dir() -> str:
+    """Thư mục dữ liệu của client: $QUICKTRANSLATE_HOME hoặc ~/.quicktranslate"""
+    path = os.environ.get("QUICKTRANSLATE_HOME") or os.path.join(os.path.expanduser("~"), ".quicktranslate")
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,38 @@
+"""
+Mã hóa body request: JSON nhanh (orjson nếu có) và nén gzip tùy chọn.
+"""
+import gzip
+import json
+from typing import Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson là tùy chọn
+    orjson = None
+
+# Chỉ các Content-Encoding mà AddRequestDecompression() của server giải nén được
+SUPPORTED_ENCODINGS = ("gzip",)
+
+def dumps_json(obj) -> bytes:
+    """JSON dạng bytes UTF-8, gọn nhất có thể"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def compress_body(body: bytes, encoding: Optional[str], min_bytes: int = 0) -> Tuple[bytes, Optional[str]]:
+    """
+    Nén body theo `encoding` ('gzip'). Trả về (body, Content-Encoding) —
+    Content-Encoding là None nếu không nén (body nhỏ hơn min_bytes).
+    """
+    if not encoding or len(body) < min_bytes:
+        return body, None
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0), "gzip"
+    raise ValueError(f"Không hỗ trợ nén '{encoding}' (chỉ hỗ trợ: {', '.join(SUPPORTED_ENCODINGS)})")
+
+def format_size(num_bytes: int) -> str:
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    if num_bytes < 1024 * 1024:
+        return f"{num_bytes / 1024:.1f} KB"
+    return f"{num_bytes / (1024 * 1024):.2f} MB"
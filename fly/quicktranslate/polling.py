@@ -0,0 +1,90 @@
+"""
+Lập lịch polling thích ứng cho /api/subtitle/status: ước lượng tốc độ dịch từ
+các mẫu completedLines liên tiếp, hẹn lần poll tiếp theo gần thời điểm dự kiến
+xong và lùi dần khi job còn nằm trong hàng đợi (pending/distributing).
+"""
+import time
+import random
+from typing import Optional
+
+QUEUED_STATUSES = frozenset({'pending', 'distributing'})
+
+def format_eta(seconds: float) -> str:
+    """Định dạng số giây thành chuỗi ngắn gọn: 45s, 3m05s, 1h02m"""
+    seconds = max(0, int(round(seconds)))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+class AdaptivePoller:
+    """
+    Gọi observe() sau mỗi lần poll, rồi next_delay() để biết phải chờ bao lâu.
+    Tốc độ được tính trung bình từ mẫu đầu tiên ở trạng thái processing, vì
+    server báo tiến trình theo từng batch nên tốc độ tức thời rất giật cục.
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_interval: float = 30.0,
+                 initial_interval: float = 3.0, queued_backoff: float = 1.5, jitter: float = 0.2):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.queued_backoff = queued_backoff
+        self.jitter = jitter
+        self.poll_count = 0
+        self._status = 'unknown'
+        self._completed = 0
+        self._total = 0
+        self._queued_delay = initial_interval
+        self._idle_delay = initial_interval
+        self._origin: Optional[tuple] = None      # (thời điểm, completedLines) mẫu processing đầu tiên
+        self._last_progress_at: Optional[float] = None
+        self._rate: Optional[float] = None        # dòng / giây
+
+    def observe(self, status: str, completed_lines: int, total_lines: int, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self.poll_count += 1
+        self._status = status
+        self._total = total_lines
+
+        if status in QUEUED_STATUSES:
+            self._completed = completed_lines
+            return
+
+        if self._origin is None:
+            self._origin = (now, completed_lines)
+        elif completed_lines > self._completed:
+            origin_time, origin_lines = self._origin
+            elapsed = now - origin_time
+            if elapsed > 0:
+                self._rate = (completed_lines - origin_lines) / elapsed
+            self._idle_delay = self.initial_interval
+        elif self._rate is None:
+            # Chưa có tiến trình nào: lùi dần như khi đang trong hàng đợi
+            self._idle_delay = min(self._idle_delay * self.queued_backoff, self.max_interval)
+        self._completed = completed_lines
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Tốc độ dịch ước lượng (dòng/giây), None nếu chưa đủ dữ liệu"""
+        return self._rate
+
+    def eta(self) -> Optional[float]:
+        """Số giây còn lại dự kiến, None nếu chưa ước lượng được"""
+        if not self._rate or self._total <= 0:
+            return None
+        return max(0.0, (self._total - self._completed) / self._rate)
+
+    def next_delay(self) -> float:
+        if self._status in QUEUED_STATUSES:
+            delay = self._queued_delay
+            self._queued_delay = min(self._queued_delay * self.queued_backoff, self.max_interval)
+        else:
+            eta = self.eta()
+            delay = self._idle_delay if eta is None else eta
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(max(delay, self.min_interval), self.max_interval)
@@ -0,0 +1,87 @@
+"""
+Lọc trước các dòng không cần gửi lên server: dòng chỉ có ký hiệu nhạc, chỉ có số,
+chỉ là hiệu ứng âm thanh trong ngoặc, chỉ có tag định dạng — giữ nguyên tại chỗ;
+các dòng trùng nội dung trong cùng job được gộp thành một dòng gửi đi rồi
+bản dịch được chép lại cho mọi index.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+_TAG_RE = re.compile(r"<[^>]*>|\{\\[^}]*\}")                          # <i>, </font>, {\an8}
+_MUSIC_RE = re.compile(r"^[\s♪♫♬#*~\-.…]*[♪♫♬][\s♪♫♬#*~\-.…]*$")
+_NUMBER_RE = re.compile(r"^[\s\d.,:;/%+\-–—!?]*\d[\s\d.,:;/%+\-–—!?]*$")
+_BRACKETS_RE = re.compile(r"^(?:\s*-?\s*(?:\[[^\]]*\]|\([^)]*\)|（[^）]*）)\s*)+$")
+
+RULES = ("music", "numbers", "brackets", "tags", "dedupe")
+
+@dataclass
+class PrefilterPolicy:
+    """Các luật lọc trước; tắt luật nào thì dòng tương ứng vẫn được gửi dịch"""
+    music: bool = True          # chỉ có ♪ / ♫ (không có lời)
+    numbers: bool = True        # chỉ có số và dấu câu: "1984", "3:00", "- 42!"
+    brackets: bool = True       # toàn bộ dòng là hiệu ứng trong ngoặc: "[door slams]", "(sighs)"
+    tags: bool = True           # chỉ có tag định dạng, không có chữ
+    dedupe: bool = True         # gộp các dòng trùng nội dung
+
+    @classmethod
+    def from_rules(cls, rules: str) -> "PrefilterPolicy":
+        """Tạo từ chuỗi 'music,numbers,...' hoặc 'all'"""
+        names = {name.strip() for name in rules.split(",") if name.strip()}
+        if "all" in names:
+            return cls()
+        unknown = names - set(RULES)
+        if unknown:
+            raise ValueError(f"Luật lọc không hợp lệ: {', '.join(sorted(unknown))} (hỗ trợ: all, {', '.join(RULES)})")
+        return cls(**{name: name in names for name in RULES})
+
+    def passes_through(self, text: str) -> bool:
+        """True nếu dòng không cần dịch và được giữ nguyên"""
+        plain = _TAG_RE.sub("", text).strip()
+        if not plain:
+            return self.tags
+        if self.music and _MUSIC_RE.match(plain):
+            return True
+        if self.numbers and _NUMBER_RE.match(plain):
+            return True
+        return bool(self.brackets and _BRACKETS_RE.match(plain))
+
+@dataclass
+class PrefilterPlan:
+    """Kết quả lọc: dòng cần gửi, dòng giữ nguyên và các index trùng của mỗi dòng gửi"""
+    submit: List[Dict]
+    passthrough: Dict[int, str] = field(default_factory=dict)
+    duplicates: Dict[int, List[int]] = field(default_factory=dict)
+
+    @property
+    def duplicate_count(self) -> int:
+        return sum(len(indices) for indices in self.duplicates.values())
+
+    def expand(self, translations: Dict[int, str]) -> Dict[int, str]:
+        """Chép bản dịch của mỗi dòng đại diện sang các dòng trùng với nó"""
+        expanded = dict(translations)
+        for index, copies in self.duplicates.items():
+            translated = translations.get(index)
+            if translated is not None:
+                for copy in copies:
+                    expanded[copy] = translated
+        return expanded
+
+def prefilter_lines(lines: List[Dict], policy: PrefilterPolicy) -> PrefilterPlan:
+    """Chia `lines` (dạng {"index", "text"} của API) theo `policy`"""
+    plan = PrefilterPlan(submit=[])
+    representative: Dict[str, int] = {}
+    for line in lines:
+        text = line["text"]
+        if policy.passes_through(text):
+            plan.passthrough[line["index"]] = text
+            continue
+        if policy.dedupe:
+            key = text.strip()
+            first = representative.get(key)
+            if first is not None:
+                plan.duplicates.setdefault(first, []).append(line["index"])
+                continue
+            representative[key] = line["index"]
+        plan.submit.append(line)
+    return plan
@@ -0,0 +1,18 @@
+"""
+Biểu diễn tập index dòng dạng đoạn liên tiếp: gọn cho journal và cho ?exclude= của /results.
+"""
+from typing import Iterable, List
+
+def to_ranges(indices: Iterable[int]) -> List[List[int]]:
+    """[1,2,3,7,8] -> [[1,3],[7,8]]"""
+    ranges: List[List[int]] = []
+    for index in sorted(indices):
+        if ranges and index == ranges[-1][1] + 1:
+            ranges[-1][1] = index
+        else:
+            ranges.append([index, index])
+    return ranges
+
+def from_ranges(ranges: Iterable[Iterable[int]]) -> List[int]:
+    """[[1,3],[7,8]] -> [1,2,3,7,8]"""
+    return [index for start, end in ranges for index in range(start, end + 1)]
@@ -0,0 +1,213 @@
+"""
+Điều phối việc gửi session lên server cho cả batch: hàng đợi ưu tiên, giới hạn tốc độ
+gửi (token bucket), giới hạn số session chạy cùng lúc và chính sách chờ theo loại lỗi
+server trả về (hết server dịch, API key đang cooldown, hết lượt dịch trong ngày).
+"""
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Tuple
+
+from .errors import ERROR_NO_API_KEY, ERROR_QUOTA, TRANSIENT_ERRORS, classify_error
+
+logger = logging.getLogger(__name__)
+
+# Server reset lượt dịch lúc 0h giờ Việt Nam
+QUOTA_RESET_TZ = timezone(timedelta(hours=7))
+
+# Độ ưu tiên (số nhỏ được gửi trước)
+PRIORITY_RESUME = 0     # job dở dang: đã tốn lượt dịch, nên xong trước
+PRIORITY_NORMAL = 10
+
+SubmitResult = Tuple[bool, str, Optional[str]]
+
+@dataclass
+class SchedulerPolicy:
+    """Giới hạn và thời gian chờ của JobScheduler"""
+    submit_rate: float = 1.0        # số session gửi tối đa mỗi giây (0 = không giới hạn)
+    submit_burst: int = 4           # số session được gửi dồn một lúc
+    max_sessions: int = 16          # số session đang chạy trên server cùng lúc (toàn client)
+    busy_backoff: float = 5.0       # chờ khi hết server dịch / 5xx / mất kết nối, nhân đôi nếu lỗi liên tiếp
+    key_cooldown: float = 60.0      # chờ khi mọi API key của server đang cooldown
+    max_backoff: float = 300.0
+    max_attempts: int = 10          # số lần gửi một session trước khi bỏ cuộc (không tính chờ hết lượt)
+    wait_for_quota: bool = False    # hết lượt dịch: chờ tới lúc reset thay vì hoãn job
+
+class QuotaDeferred(Exception):
+    """Job bị hoãn vì hết lượt dịch trong ngày; resume được sau `reset_at` (epoch)"""
+
+    def __init__(self, message: str, reset_at: float):
+        super().__init__(message)
+        self.reset_at = reset_at
+
+def next_quota_reset(now: Optional[float] = None) -> float:
+    """Thời điểm (epoch) server reset lượt dịch tiếp theo"""
+    current = datetime.fromtimestamp(time.time() if now is None else now, QUOTA_RESET_TZ)
+    midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+def format_reset_time(reset_at: float) -> str:
+    return datetime.fromtimestamp(reset_at).strftime('%d/%m %H:%M')
+
+class TokenBucket:
+    """Token bucket (không tự khóa, dùng dưới lock của người gọi)"""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Số giây tới khi có token kế tiếp"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+class JobScheduler:
+    """
+    Dùng chung cho mọi job của một batch (kể cả các thread shard). Mỗi lần gửi session
+    đi qua submit(): chờ tới lượt theo độ ưu tiên, có token và còn chỗ trong
+    max_sessions; session gửi thành công giữ chỗ cho tới khi release().
+    Lỗi tạm thời làm dừng gửi với mọi job (không chỉ job gặp lỗi), vì server bận là
+    bận với tất cả.
+    """
+
+    def __init__(self, policy: Optional[SchedulerPolicy] = None):
+        self.policy = policy or SchedulerPolicy()
+        self.active_sessions = 0
+        self.quota_reset_at: Optional[float] = None   # epoch; None = còn lượt
+        self._bucket = TokenBucket(self.policy.submit_rate, self.policy.submit_burst)
+        self._paused_until = 0.0
+        self._failure_streak = 0
+        self._waiting: list = []                       # heap (priority, ticket) của các lần gửi đang chờ
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def submit(self, priority: int, send: Callable[[], SubmitResult], should_stop: Callable[[], bool],
+               log: Callable[[str], None] = logger.info) -> Optional[SubmitResult]:
+        """
+        Gọi `send()` (start_translation_job) khi tới lượt, tự chờ rồi gửi lại theo loại lỗi.
+        Trả về kết quả của send() (thành công thì đang giữ một chỗ session), None nếu bị dừng.
+        Raises QuotaDeferred nếu hết lượt dịch và policy không chờ.
+        """
+        attempts = 0
+        while True:
+            if not self.acquire(priority, should_stop):
+                return None
+            success, message, session_id = send()
+            if success:
+                with self._cond:
+                    self._failure_streak = 0
+                return success, message, session_id
+            self.release()
+
+            kind = classify_error(message)
+            if kind == ERROR_QUOTA:
+                reset_at = self._exhaust_quota()
+                if self.policy.wait_for_quota:
+                    log(f"Hết lượt dịch, chờ tới {format_reset_time(reset_at)} để gửi tiếp...")
+                continue
+            attempts += 1
+            if kind not in TRANSIENT_ERRORS or attempts >= self.policy.max_attempts:
+                return success, message, session_id
+            delay = self._pause(kind)
+            log(f"Server chưa nhận job ({kind}), tạm dừng gửi {delay:.0f}s "
+                f"(lần {attempts}/{self.policy.max_attempts})...")
+
+    def acquire(self, priority: int, should_stop: Callable[[], bool], submit: bool = True) -> bool:
+        """
+        Chờ một chỗ session. submit=False dùng cho session đã có trên server (resume):
+        chỉ cần còn chỗ, không tốn token và không bị chặn bởi backoff/hết lượt.
+        False nếu bị dừng trong lúc chờ.
+        """
+        ticket = (priority, next(self._tickets))
+        with self._cond:
+            if submit:
+                heapq.heappush(self._waiting, ticket)
+            try:
+                while not should_stop():
+                    if submit:
+                        self._check_quota()
+                    delay = self._admission_delay(ticket) if submit else 0.0
+                    if self.active_sessions >= self.policy.max_sessions:
+                        delay = max(delay, 0.5)
+                    if delay <= 0 and (not submit or self._bucket.try_take()):
+                        self.active_sessions += 1
+                        return True
+                    self._cond.wait(min(max(delay, 0.05), 0.5))
+                return False
+            finally:
+                if submit:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def release(self):
+        """Trả chỗ của một session đã kết thúc"""
+        with self._cond:
+            self.active_sessions -= 1
+            self._cond.notify_all()
+
+    def _admission_delay(self, ticket) -> float:
+        """Số giây ước tính trước khi `ticket` được gửi (0 = có thể gửi ngay nếu còn token)"""
+        if self._waiting[0] != ticket:
+            return 0.5
+        paused = self._paused_until - time.monotonic()
+        if paused > 0:
+            return paused
+        if self.quota_reset_at is not None:
+            return self.quota_reset_at - time.time()
+        return self._bucket.wait_time()
+
+    def _check_quota(self):
+        if self.quota_reset_at is None:
+            return
+        if time.time() >= self.quota_reset_at:
+            self.quota_reset_at = None
+        elif not self.policy.wait_for_quota:
+            raise QuotaDeferred(f"Hết lượt dịch hôm nay, job được hoãn tới sau "
+                                f"{format_reset_time(self.quota_reset_at)}", self.quota_reset_at)
+
+    def _exhaust_quota(self) -> float:
+        with self._cond:
+            if self.quota_reset_at is None:
+                self.quota_reset_at = next_quota_reset()
+                logger.warning(f"Hết lượt dịch, ngừng gửi job mới tới {format_reset_time(self.quota_reset_at)}.")
+            self._cond.notify_all()
+            return self.quota_reset_at
+
+    def _pause(self, kind: str) -> float:
+        """Dừng gửi với mọi job; lỗi của request gửi trong lúc đang dừng không tăng backoff"""
+        with self._cond:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._failure_streak += 1
+            base = self.policy.key_cooldown if kind == ERROR_NO_API_KEY else self.policy.busy_backoff
+            delay = min(self.policy.max_backoff, base * 2 ** (self._failure_streak - 1))
+            delay *= random.uniform(1.0, 1.2)
+            self._paused_until = now + delay
+            self._cond.notify_all()
+            return delay
@@ -0,0 +1,67 @@
+"""
+Chia file SRT lớn thành nhiều shard, mỗi shard gửi thành một session riêng.
+Điểm cắt ưu tiên khoảng lặng dài nhất giữa hai câu thoại gần giới hạn shard,
+để mỗi shard giữ được ngữ cảnh liền mạch nhất có thể.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from .srt import SrtEntry
+
+# Ước lượng phần JSON bao quanh mỗi dòng: {"index": 123, "text": "..."},
+_LINE_OVERHEAD_BYTES = 32
+
+@dataclass
+class ShardPolicy:
+    """Cấu hình chia shard: một shard bị cắt khi vượt max_lines hoặc max_bytes"""
+    max_lines: int = 1000
+    max_bytes: int = 256 * 1024
+    concurrency: int = 4
+    # Tìm điểm cắt trong phần cuối shard (tỉ lệ so với số dòng của shard)
+    gap_window: float = 0.2
+
+def _line_bytes(line: Dict) -> int:
+    return len(line["text"].encode('utf-8')) + _LINE_OVERHEAD_BYTES
+
+def plan_shards(lines: List[Dict], entries: Sequence[SrtEntry], policy: ShardPolicy) -> List[List[Dict]]:
+    """
+    Chia `lines` ({"index", "text"}) thành các shard theo policy.
+    `entries` dùng để tra timestamp theo index khi chọn điểm cắt.
+    """
+    if not lines:
+        return []
+    timings = {entry.index: (entry.start_ms, entry.end_ms) for entry in entries}
+    shards: List[List[Dict]] = []
+    current: List[Dict] = []
+    current_bytes = 0
+
+    for line in lines:
+        size = _line_bytes(line)
+        if current and (len(current) >= policy.max_lines or current_bytes + size > policy.max_bytes):
+            cut = _best_cut(current, timings, policy.gap_window)
+            shards.append(current[:cut])
+            current = current[cut:]
+            current_bytes = sum(_line_bytes(l) for l in current)
+        current.append(line)
+        current_bytes += size
+
+    if current:
+        shards.append(current)
+    return shards
+
+def _best_cut(shard: List[Dict], timings: Dict[int, tuple], gap_window: float) -> int:
+    """Vị trí cắt (1..len) có khoảng lặng lớn nhất trong `gap_window` cuối shard"""
+    count = len(shard)
+    window = max(1, int(count * gap_window))
+    best_cut, best_gap = count, -1
+    for cut in range(count - window, count):
+        if cut <= 0:
+            continue
+        prev_timing = timings.get(shard[cut - 1]["index"])
+        next_timing = timings.get(shard[cut]["index"])
+        if prev_timing is None or next_timing is None:
+            continue
+        gap = next_timing[0] - prev_timing[1]
+        if gap >= best_gap:
+            best_cut, best_gap = cut, gap
+    return best_cut
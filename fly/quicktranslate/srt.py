@@ -0,0 +1,179 @@
+"""
+Tiện ích SRT: phân tích (streaming) và dựng lại / ghi file phụ đề (SRT hoặc VTT).
+Module này không phụ thuộc requests/tkinter.
+"""
+import os
+import re
+import uuid
+import logging
+from typing import Optional, Dict, List, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+class SrtEntry:
+    """Một khối trong file SRT (thời gian lưu dạng mili-giây)"""
+    __slots__ = ('index', 'start_ms', 'end_ms', 'text')
+
+    def __init__(self, index: int, start_ms: int, end_ms: int, text: str):
+        self.index = index
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.text = text
+
+    @property
+    def start_time(self) -> str:
+        return format_srt_timestamp(self.start_ms)
+
+    @property
+    def end_time(self) -> str:
+        return format_srt_timestamp(self.end_ms)
+
+    def __repr__(self) -> str:
+        return f"SrtEntry(index={self.index}, start_ms={self.start_ms}, end_ms={self.end_ms}, text={self.text!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SrtEntry):
+            return NotImplemented
+        return (self.index, self.start_ms, self.end_ms, self.text) == (other.index, other.start_ms, other.end_ms, other.text)
+
+_SRT_TIMING_RE = re.compile(
+    r'(\d{2}):(\d{2}):(\d{2})[,\.](\d{3})\s*-->\s*(\d{2}):(\d{2}):(\d{2})[,\.](\d{3})'
+)
+
+def format_srt_timestamp(ms: int) -> str:
+    """Chuyển mili-giây thành timestamp SRT dạng HH:MM:SS,mmm"""
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+def format_vtt_timestamp(ms: int) -> str:
+    """Chuyển mili-giây thành timestamp WebVTT dạng HH:MM:SS.mmm"""
+    return format_srt_timestamp(ms).replace(',', '.')
+
+def _iter_text_lines(content: str) -> Iterator[str]:
+    """Duyệt từng dòng của chuỗi (CRLF, CR hoặc LF) mà không tạo bản sao toàn bộ nội dung"""
+    pos, length = 0, len(content)
+    while pos < length:
+        nl = content.find('\n', pos)
+        end = length if nl == -1 else nl
+        line = content[pos:end]
+        if '\r' in line:
+            # Dòng kết thúc bằng \r\n hoặc file dùng \r kiểu Mac cũ
+            parts = line.split('\r')
+            if parts[-1] == '':
+                parts.pop()
+            yield from parts
+        else:
+            yield line
+        pos = end + 1
+
+def _iter_srt_entries(lines: Iterable[str]) -> Iterator[SrtEntry]:
+    """Gom các dòng thành khối (ngăn cách bởi dòng trống) và chuyển thành SrtEntry"""
+    block: List[str] = []
+    for raw_line in lines:
+        line = raw_line.rstrip('\r\n')
+        if line.strip():
+            block.append(line)
+            continue
+        if block:
+            entry = _parse_srt_block(block)
+            if entry is not None:
+                yield entry
+            block = []
+    if block:
+        entry = _parse_srt_block(block)
+        if entry is not None:
+            yield entry
+
+def _parse_srt_block(block: List[str]) -> Optional[SrtEntry]:
+    if len(block) < 3:
+        return None
+    try:
+        index = int(block[0].strip())
+    except ValueError:
+        logger.warning("Could not parse SRT block: %s", '\n'.join(block))
+        return None
+    time_match = _SRT_TIMING_RE.match(block[1].strip())
+    if not time_match:
+        return None
+    h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, time_match.groups())
+    start_ms = ((h1 * 60 + m1) * 60 + s1) * 1000 + ms1
+    end_ms = ((h2 * 60 + m2) * 60 + s2) * 1000 + ms2
+    text = '\n'.join(block[2:]).strip()
+    return SrtEntry(index, start_ms, end_ms, text)
+
+def parse_srt(content: str) -> Iterator[SrtEntry]:
+    """Phân tích nội dung SRT đã có trong bộ nhớ thành các khối (generator)"""
+    return _iter_srt_entries(_iter_text_lines(content))
+
+def parse_srt_file(filepath: str, encoding: str = 'utf-8-sig') -> Iterator[SrtEntry]:
+    """Đọc và phân tích file SRT theo từng dòng, không nạp toàn bộ file vào bộ nhớ"""
+    with open(filepath, 'r', encoding=encoding) as f:
+        yield from _iter_srt_entries(f)
+
+def build_srt(entries: Iterable[SrtEntry], translations: Dict[int, str]) -> str:
+    """Xây dựng lại nội dung file SRT từ kết quả dịch"""
+    return ''.join(_iter_srt_chunks(entries, translations))
+
+MISSING_PREFIX = "[LỖI DỊCH] "
+
+def _translated_text(entry: SrtEntry, translations: Dict[int, str], missing_prefix: str = MISSING_PREFIX) -> str:
+    translated_text = translations.get(entry.index)
+    if translated_text is None:
+        translated_text = f"{missing_prefix}{entry.text}"
+    return translated_text
+
+def _iter_srt_chunks(entries: Iterable[SrtEntry], translations: Dict[int, str],
+                     missing_prefix: str = MISSING_PREFIX) -> Iterator[str]:
+    separator = ''
+    for entry in entries:
+        yield (
+            f"{separator}{entry.index}\n"
+            f"{format_srt_timestamp(entry.start_ms)} --> {format_srt_timestamp(entry.end_ms)}\n"
+            f"{_translated_text(entry, translations, missing_prefix)}\n"
+        )
+        separator = '\n'
+
+def _iter_vtt_chunks(entries: Iterable[SrtEntry], translations: Dict[int, str],
+                     missing_prefix: str = MISSING_PREFIX) -> Iterator[str]:
+    yield "WEBVTT\n"
+    for entry in entries:
+        yield (
+            f"\n{entry.index}\n"
+            f"{format_vtt_timestamp(entry.start_ms)} --> {format_vtt_timestamp(entry.end_ms)}\n"
+            f"{_translated_text(entry, translations, missing_prefix)}\n"
+        )
+
+SUBTITLE_FORMATS = {
+    "srt": _iter_srt_chunks,
+    "vtt": _iter_vtt_chunks,
+}
+
+def write_subtitles(path: str, entries: Iterable[SrtEntry], translations: Dict[int, str],
+                    fmt: str = "srt", buffer_size: int = 1 << 16, missing_prefix: str = MISSING_PREFIX) -> None:
+    """
+    Ghi phụ đề đã dịch (SRT hoặc VTT) theo kiểu streaming: từng khối được ghi thẳng
+    vào file tạm cùng thư mục rồi os.replace vào `path`, nên bộ nhớ không tăng theo
+    kích thước file và crash giữa chừng không để lại file cụt.
+    Dòng chưa có bản dịch được ghi là `missing_prefix` + bản gốc.
+    """
+    iter_chunks = SUBTITLE_FORMATS.get(fmt)
+    if iter_chunks is None:
+        raise ValueError(f"Định dạng phụ đề không hỗ trợ: {fmt} (hỗ trợ: {', '.join(SUBTITLE_FORMATS)})")
+    directory, name = os.path.split(os.path.abspath(path))
+    # Mở bằng 'x' (không dùng mkstemp) để file kết quả có quyền theo umask như file thường
+    tmp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, 'x', encoding='utf-8', buffering=buffer_size) as f:
+            for chunk in iter_chunks(entries, translations, missing_prefix):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise